@@ -47,6 +47,7 @@ const Account = ({ user }: any) => {
     try {
       const response = await fetch(`${API_BASE}/users/${user.uid}/avatar`, {
         method: "POST",
+        headers: { Authorization: `Bearer ${await user.getIdToken()}` },
         body: formData,
       });
 
@@ -94,14 +94,9 @@ const getRaceIcon = (race: string): string => {
   return raceIconMap[race] || "fa-question";
 };
 
-// Helper function to convert milliseconds string to seconds with 2 significant figures
-const msToSeconds = (msString: string | undefined): string => {
-  if (!msString) return 'N/A';
-  
-  // Remove commas and "ms" text, extract number
-  const msValue = parseFloat(msString.replace(/,/g, '').replace(/\s*ms/i, ''));
-  
-  if (isNaN(msValue)) return msString;
+// Helper function to convert milliseconds (normalized to a number server-side) to seconds with 2 significant figures
+const msToSeconds = (msValue: number | undefined): string => {
+  if (msValue === undefined || msValue === null) return 'N/A';
   
   // Convert to seconds
   const seconds = msValue / 1000;
@@ -110,12 +105,10 @@ const msToSeconds = (msString: string | undefined): string => {
   return `${parseFloat(seconds.toPrecision(2))}s`;
 };
 
-// Helper function to format attack with K notation
-const formatAttack = (attack: string) => {
+// Helper function to format an attack [min, max] range with K notation
+const formatAttack = (attack: number[]) => {
   if (!attack) return 'N/A';
-  return attack.split('~').map(part => {
-    const num = parseInt(part.replace(/,/g, ''), 10);
-    if (isNaN(num)) return part.trim();
+  return attack.map(num => {
     if (num >= 1000) {
       return parseFloat((num / 1000).toFixed(1)) + 'K';
     }
@@ -157,8 +150,8 @@ const MonsterDetailModal = ({ monster, onClose }: MonsterDetailModalProps) => {
 
   const sortedDrops = useMemo(() => {
     return [...monster.drops].sort((a: any, b: any) => {
-      const aValue = dropSort.key === "dropChance" ? parseFloat(a.dropChance) : a.itemName;
-      const bValue = dropSort.key === "dropChance" ? parseFloat(b.dropChance) : b.itemName;
+      const aValue = dropSort.key === "dropChance" ? a.dropChance : a.itemName;
+      const bValue = dropSort.key === "dropChance" ? b.dropChance : b.itemName;
       
       if (aValue < bValue) return dropSort.direction === "asc" ? -1 : 1;
       if (aValue > bValue) return dropSort.direction === "asc" ? 1 : -1;
@@ -599,7 +592,7 @@ const MonsterDetailModal = ({ monster, onClose }: MonsterDetailModalProps) => {
                                             )}
                                         </div>
                                     </td>
-                                    <td className={`p-3 text-right font-mono ${getTextClass()}`}>{drop.dropChance}</td>
+                                    <td className={`p-3 text-right font-mono ${getTextClass()}`}>{drop.dropChance}%</td>
                                 </tr>
                             ))}
                         </tbody>
@@ -1,11 +1,17 @@
-import { useState, useEffect, useMemo, useRef } from "react";
+import { useState, useEffect, useRef } from "react";
 import { useTheme } from "../../contexts/ThemeContext";
 import MonsterDetailModal from "./MonsterDetailModal";
 
+const API_BASE =
+  import.meta.env.VITE_API_BASE ||
+  (import.meta.env.PROD
+    ? "https://api-dyd6pxy55a-uc.a.run.app"
+    : "http://localhost:8000");
+
 interface Drop {
   itemId: number;
   itemName: string;
-  dropChance: string;
+  dropChance: number;
   isMVP: boolean;
 }
 
@@ -28,14 +34,14 @@ interface Monster {
   };
   hp?: number;
   level?: number;
-  attack?: string;
+  attack?: number[];
   defense?: number;
   magicDefense?: number;
   speed?: number;
   attackRange?: number;
   spellRange?: number;
   visionRange?: number;
-  delayMotion?: string;
+  delayMotion?: number;
   drops: Drop[];
   skills?: any[];
   spriteWidth?: number;
@@ -54,7 +60,7 @@ interface Monster {
   }[];
 }
 
-type SortOption = "id" | "level" | "baseExp" | "jobExp" | "name";
+type SortOption = "id" | "level" | "hp" | "baseExp" | "jobExp" | "name";
 type SortDirection = "asc" | "desc";
 
 // Helper function to get element color classes
@@ -217,8 +223,15 @@ const MonsterSearch = () => {
   };
 
   const [monsters, setMonsters] = useState<Monster[]>([]);
+  const [total, setTotal] = useState(0);
+  const [facets, setFacets] = useState<{ race: string[]; element: string[]; size: string[] }>({
+    race: [],
+    element: [],
+    size: [],
+  });
   const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState("");
+  const [debouncedSearch, setDebouncedSearch] = useState("");
   const [filters, setFilters] = useState<{
     race: string[];
     element: string[];
@@ -246,92 +259,70 @@ const MonsterSearch = () => {
   const itemsPerPage = 24;
   const [selectedMonster, setSelectedMonster] = useState<Monster | null>(null);
 
+  // Wait for typing to pause before querying
   useEffect(() => {
-    fetch("/data/monsters.json?v=1")
-      .then((res) => res.json())
+    const timer = setTimeout(() => setDebouncedSearch(searchTerm.trim()), 250);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
+
+  // Search, filtering, sorting and paging all happen server-side (GET /monsters)
+  useEffect(() => {
+    const params = new URLSearchParams({
+      sort: sort.key,
+      order: sort.direction,
+      page: String(page),
+      page_size: String(itemsPerPage),
+    });
+    if (debouncedSearch) params.set("q", debouncedSearch);
+    if (filters.race.length) params.set("race", filters.race.join(","));
+    if (filters.element.length) params.set("element", filters.element.join(","));
+    if (filters.size.length) params.set("size", filters.size.join(","));
+    if (filters.isMVP) params.set("mvp", "true");
+    if (filters.hideDummies) params.set("hide_dummies", "true");
+    if (filters.hideZeroExp) params.set("hide_zero_exp", "true");
+    if (filters.minLevel) params.set("min_level", filters.minLevel);
+    if (filters.maxLevel) params.set("max_level", filters.maxLevel);
+
+    const controller = new AbortController();
+    fetch(`${API_BASE}/monsters?${params}`, { signal: controller.signal })
+      .then((res) => {
+        if (!res.ok) throw new Error("Failed to load monsters");
+        return res.json();
+      })
       .then((data) => {
-        setMonsters(data);
+        setMonsters(data.items);
+        setTotal(data.total);
+        setFacets(data.facets);
         setLoading(false);
       })
       .catch((err) => {
+        if (err.name === "AbortError") return;
         console.error("Failed to load monsters", err);
         setLoading(false);
       });
-  }, []);
-
-  const races = useMemo(() => {
-    const r = new Set(monsters.map((m) => m.race));
-    return Array.from(r).sort() as string[];
-  }, [monsters]);
-
-  const elements = useMemo(() => {
-    const e = new Set(monsters.map((m) => m.element.split(" ")[0]));
-    return Array.from(e).sort() as string[];
-  }, [monsters]);
-
-  const sizes = useMemo(() => {
-    const s = new Set(monsters.map((m) => m.size));
-    return Array.from(s).sort() as string[];
-  }, [monsters]);
-
-  const filteredMonsters = useMemo(() => {
-    return monsters.filter((m) => {
-      const matchesSearch =
-        m.name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        m.id.toString().includes(searchTerm);
-      const matchesRace = filters.race.length === 0 || filters.race.includes(m.race);
-      const matchesElement =
-        filters.element.length === 0 || filters.element.some(e => m.element.startsWith(e));
-      const matchesSize = filters.size.length === 0 || filters.size.includes(m.size);
-      const matchesMvp = !filters.isMVP || m.isMVP;
-      const matchesDummies = !filters.hideDummies || (m.skills && m.skills.length > 0);
-      const matchesZeroExp = !filters.hideZeroExp || (m.baseExp !== 0 || m.jobExp !== 0);
-
-      // Range filters
-      const minLevel = filters.minLevel ? parseInt(filters.minLevel) : 0;
-      const maxLevel = filters.maxLevel ? parseInt(filters.maxLevel) : Infinity;
-      const level = m.level || 0;
-      const matchesLevel = level >= minLevel && level <= maxLevel;
-
-      return (
-        matchesSearch &&
-        matchesRace &&
-        matchesElement &&
-        matchesSize &&
-        matchesMvp &&
-        matchesDummies &&
-        matchesZeroExp &&
-        matchesLevel
-      );
-    });
-  }, [monsters, searchTerm, filters]);
-
-  const sortedMonsters = useMemo(() => {
-    return [...filteredMonsters].sort((a, b) => {
-      let aValue: any = a[sort.key] || 0;
-      let bValue: any = b[sort.key] || 0;
-
-      // Special handling for string comparison if needed, though mostly numbers here
-      if (sort.key === 'name') {
-          aValue = a.name.toLowerCase();
-          bValue = b.name.toLowerCase();
-      }
-
-      if (aValue < bValue) return sort.direction === "asc" ? -1 : 1;
-      if (aValue > bValue) return sort.direction === "asc" ? 1 : -1;
-      return 0;
-    });
-  }, [filteredMonsters, sort]);
+    return () => controller.abort();
+  }, [debouncedSearch, filters, sort, page]);
+
+  // List results are summaries; the modal needs the full record
+  const openMonster = (id: number) => {
+    fetch(`${API_BASE}/monsters/${id}`)
+      .then((res) => {
+        if (!res.ok) throw new Error("Failed to load monster");
+        return res.json();
+      })
+      .then(setSelectedMonster)
+      .catch((err) => console.error("Failed to load monster", err));
+  };
 
-  const paginatedMonsters = useMemo(() => {
-    const start = (page - 1) * itemsPerPage;
-    return sortedMonsters.slice(start, start + itemsPerPage);
-  }, [sortedMonsters, page]);
+  const races = facets.race;
+  const elements = facets.element;
+  const sizes = facets.size;
+  const paginatedMonsters = monsters;
 
   // Reset page when filters change
   useEffect(() => {
     setPage(1);
-  }, [searchTerm, filters, sort]);
+  }, [debouncedSearch, filters, sort]);
 
   const getInputClass = () => {
     if (currentTheme === "light")
@@ -396,7 +387,7 @@ const MonsterSearch = () => {
             Monster Database
           </h2>
           <div className={`text-sm ${getSubTextClass()}`}>
-            {filteredMonsters.length} Monsters Found
+            {total} Monsters Found
           </div>
         </div>
 
@@ -564,13 +555,13 @@ const MonsterSearch = () => {
             getCardClass={getCardClass}
             getTextClass={getTextClass}
             getSubTextClass={getSubTextClass}
-            onClick={() => setSelectedMonster(monster)}
+            onClick={() => openMonster(monster.id)}
           />
         ))}
       </div>
 
       {/* Pagination */}
-      {filteredMonsters.length > itemsPerPage && (
+      {total > itemsPerPage && (
         <div className="flex justify-center gap-2 mt-8">
           <button
             onClick={() => setPage((p) => Math.max(1, p - 1))}
@@ -586,22 +577,22 @@ const MonsterSearch = () => {
             Prev
           </button>
           <span className={`px-4 py-2 ${getTextClass()}`}>
-            Page {page} of {Math.ceil(filteredMonsters.length / itemsPerPage)}
+            Page {page} of {Math.ceil(total / itemsPerPage)}
           </span>
           <button
             onClick={() =>
               setPage((p) =>
                 Math.min(
-                  Math.ceil(filteredMonsters.length / itemsPerPage),
+                  Math.ceil(total / itemsPerPage),
                   p + 1
                 )
               )
             }
             disabled={
-              page >= Math.ceil(filteredMonsters.length / itemsPerPage)
+              page >= Math.ceil(total / itemsPerPage)
             }
             className={`px-4 py-2 rounded ${
-              page >= Math.ceil(filteredMonsters.length / itemsPerPage)
+              page >= Math.ceil(total / itemsPerPage)
                 ? "opacity-50 cursor-not-allowed"
                 : "hover:bg-opacity-80"
             } ${
@@ -1,5 +1,29 @@
+import { useEffect, useState } from "react"
 import { useTheme } from "../../contexts/ThemeContext"
 import LoanItemModal from "./LoanItemModal"
+import { authHeaders } from "../../firebase"
+
+const API_BASE =
+  import.meta.env.VITE_API_BASE ||
+  (import.meta.env.PROD
+    ? "https://api-dyd6pxy55a-uc.a.run.app"
+    : "http://localhost:8000")
+
+interface GearLoan {
+  id: string
+  name: string
+  borrower: string
+  date: string
+  paid: boolean
+}
+
+const toGearLoan = (loan: any): GearLoan => ({
+  id: loan.id,
+  name: loan.item_name,
+  borrower: loan.borrower_name || loan.borrower,
+  date: (loan.borrowed_at || '').slice(0, 10),
+  paid: loan.fee_status !== 'unpaid',
+})
 
 export default function GearStorage() {
   const {
@@ -10,12 +34,24 @@ export default function GearStorage() {
     getBadgeClass,
   } = useTheme()
 
-  const gearLoans = [
-    { id: 1, name: '+10 Pike [4]', borrower: 'xX_Slayer_Xx', date: '2025-05-12', paid: true },
-    { id: 2, name: 'Ghostring Card', borrower: 'HealerPls', date: '2025-05-14', paid: false },
-    { id: 3, name: 'Mjollnir', borrower: 'GuildLeader', date: '2025-05-10', paid: true },
-    { id: 4, name: 'Valkyrie Shield', borrower: 'TankBoii', date: '2025-05-15', paid: false },
-  ]
+  const [gearLoans, setGearLoans] = useState<GearLoan[]>([])
+
+  useEffect(() => {
+    // Only the items currently out (an indexed query), not the loan history
+    fetch(`${API_BASE}/loans/out`)
+      .then((res) => (res.ok ? res.json() : []))
+      .then((loans) => setGearLoans(loans.map(toGearLoan)))
+      .catch(() => setGearLoans([]))
+  }, [])
+
+  const returnItem = async (id: string) => {
+    const res = await fetch(`${API_BASE}/loans/${id}`, {
+      method: 'PUT',
+      headers: { 'Content-Type': 'application/json', ...(await authHeaders()) },
+      body: JSON.stringify({ status: 'returned' }),
+    })
+    if (res.ok) setGearLoans((loans) => loans.filter((loan) => loan.id !== id))
+  }
 
   const getTitleClass = () => {
     if (currentTheme === 'light')
@@ -174,6 +210,7 @@ export default function GearStorage() {
                       <button
                         className={`transition-colors ${getReturnButtonClass()}`}
                         title="Return Item"
+                        onClick={() => returnItem(item.id)}
                       >
                         {currentTheme !== 'rms' && (
                           <i className="fa-solid fa-rotate-left"></i>
@@ -24,6 +24,8 @@ const Members = () => {
     const fetchMembers = async () => {
       try {
         setLoading(true);
+        // The full list is served from the server's snapshot (ETag / 304); a ?fields= projection would
+        // be a fresh Firestore query on every load
         const response = await fetch(`${API_BASE}/users`);
         if (!response.ok) throw new Error("Failed to fetch members");
         const data = await response.json();
@@ -91,7 +93,12 @@ const Members = () => {
             >
               {member.photo_url ? (
                 <img
-                  src={member.photo_url}
+                  src={member.photo_urls?.["128"] || member.photo_url}
+                  srcSet={
+                    member.photo_urls
+                      ? `${member.photo_urls["128"]} 1x, ${member.photo_urls["256"]} 2x`
+                      : undefined
+                  }
                   alt={member.display_name}
                   className="w-full h-full object-cover"
                 />
@@ -11,7 +11,7 @@ const MvpTracker = () => {
     getStatusColor,
     mvpLayout,
   } = useTheme();
-  const { mvps, loading, reportKill } = useMvps();
+  const { mvps, loading, reportError, reportKill } = useMvps();
 
   const getTitleClass = () => {
     if (currentTheme === "light") return "text-slate-900 border-red-500";
@@ -163,6 +163,13 @@ const MvpTracker = () => {
         </div>
       </div>
 
+      {reportError && (
+        <div className="mb-4 p-3 rounded-lg border border-red-500 bg-red-500/10 text-red-500 text-sm">
+          <i className="fa-solid fa-triangle-exclamation mr-2"></i>
+          {reportError}
+        </div>
+      )}
+
       {currentTheme === "rms" && (
         <div className="col-span-3 mb-2">
           <div className="card">
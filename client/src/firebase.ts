@@ -26,4 +26,10 @@ if (location.hostname === "localhost") {
   connectFirestoreEmulator(db, '127.0.0.1', 8081);
 }
 
-export { app, analytics, auth, db };
+// Authorization header for API routes that act for the signed-in member
+async function authHeaders(): Promise<Record<string, string>> {
+  const user = auth.currentUser;
+  return user ? { Authorization: `Bearer ${await user.getIdToken()}` } : {};
+}
+
+export { app, analytics, auth, authHeaders, db };
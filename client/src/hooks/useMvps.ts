@@ -1,4 +1,5 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
+import { authHeaders } from "../firebase";
 
 const API_BASE =
   import.meta.env.VITE_API_BASE ||
@@ -10,6 +11,8 @@ export const useMvps = () => {
   const [mvps, setMvps] = useState<any[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  // Why the last kill report was refused (e.g. signed out), shown by the tracker
+  const [reportError, setReportError] = useState<string | null>(null);
 
   const fetchMvps = async () => {
     try {
@@ -68,7 +71,28 @@ export const useMvps = () => {
     return `${mvp.spawn_delay}m`;
   };
 
+  // Apply a single-location delta (from the live stream or a PUT response)
+  const applyDelta = (delta) => {
+    setMvps((prev) =>
+      prev.map((mvp) => ({
+        ...mvp,
+        locations: mvp.locations.map((loc) =>
+          loc._id === delta.id
+            ? {
+                ...loc,
+                status: delta.status,
+                respawnTime: calculateRespawnDisplay(delta),
+                respawnAt: delta.respawn_at,
+                lastKilled: delta.last_killed,
+              }
+            : loc
+        ),
+      }))
+    );
+  };
+
   const reportKill = async (locationId) => {
+    setReportError(null);
     try {
       // Optimistic update
       setMvps((prev) =>
@@ -84,23 +108,42 @@ export const useMvps = () => {
 
       const response = await fetch(`${API_BASE}/mvps/${locationId}`, {
         method: "PUT",
-        headers: { "Content-Type": "application/json" },
+        headers: { "Content-Type": "application/json", ...(await authHeaders()) },
         body: JSON.stringify({ status: "dead" }),
       });
 
-      if (response.ok) {
-        await fetchMvps();
+      if (!response.ok) {
+        const body = await response.json().catch(() => ({}));
+        throw new Error(
+          response.status === 401
+            ? "Sign in to report kills"
+            : body.error || "Failed to report kill"
+        );
       }
+      // Other clients receive the same change through /mvps/stream
+      applyDelta(await response.json());
     } catch (err) {
       console.error("Error reporting kill:", err);
+      setReportError(err.message);
       // Revert optimistic update on error
       await fetchMvps();
     }
   };
 
+  // Keep the latest fetchMvps for the long-lived stream handlers
+  const fetchRef = useRef(fetchMvps);
+  fetchRef.current = fetchMvps;
+
   useEffect(() => {
     fetchMvps();
+
+    // Live per-location updates. EventSource reconnects on its own and
+    // resumes from the last event id; 'reset' means we missed too much.
+    const source = new EventSource(`${API_BASE}/mvps/stream`);
+    source.addEventListener("mvp", (e) => applyDelta(JSON.parse(e.data)));
+    source.addEventListener("reset", () => fetchRef.current());
+    return () => source.close();
   }, []);
 
-  return { mvps, loading, error, reportKill, refetch: fetchMvps };
+  return { mvps, loading, error, reportError, reportKill, refetch: fetchMvps };
 };
@@ -25,6 +25,11 @@ cd ..
 # We will create a temporary one just for deployment purposes.
 echo "🐍 Preparing Python Virtual Environment for Deployment..."
 cd server
+# Monster database served by /monsters (app/services/monster_db.py)
+mkdir -p data
+cp ../client/public/data/monsters.json data/monsters.json
+python3 -m app.services.monster_index
+python3 -m app.services.monster_shards
 if [ ! -d "venv" ]; then
     echo "   Creating temporary venv..."
     python3 -m venv venv
@@ -1,13 +1,49 @@
+"""
+Copies Firestore data between production, the local emulator and NDJSON
+snapshot files, as a streaming pipeline:
+
+  - reads are paginated by document id, so only one page per collection
+    level is held in memory; subcollection listing runs on worker threads
+  - writes go out as WriteBatches of up to 500 documents, committed by
+    parallel workers
+  - progress is checkpointed after every page, so an interrupted run picks
+    up where it stopped (use --fresh to start over)
+
+    python migrations/seed_local.py [service-account.json]                  production -> emulator
+    python migrations/seed_local.py --dump prod.ndjson [service-account.json]  production -> file
+    python migrations/seed_local.py --restore prod.ndjson                  file -> emulator
+
+Snapshot files hold one {"path", "data"} object per line, parents before
+their subcollections. Timestamps, geopoints, references and bytes are
+tagged with "__type__" so they restore as the same Firestore types.
+"""
+import argparse
+import base64
+import json
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
 import firebase_admin
 from firebase_admin import credentials, firestore
+from google.cloud.firestore import DocumentReference, GeoPoint
 
+PROJECT_ID = "big-fish-9dbec"
+EMULATOR_HOST = "127.0.0.1:8081"
+# Documents read per query page
+PAGE_SIZE = 300
+# Firestore's limit on writes per batch
+MAX_BATCH_WRITES = 500
+WORKERS = 8
+CHECKPOINT_FILE = ".seed_checkpoint.json"
 
-def get_prod_data(service_account_path):
-    """
-    Connects to Production Firestore and reads all collections and documents.
-    """
+
+# --- Clients ---
+
+def prod_client(service_account_path):
+    """Client for the production project."""
     # Ensure no emulator env var interferes with Prod connection
     if "FIRESTORE_EMULATOR_HOST" in os.environ:
         del os.environ["FIRESTORE_EMULATOR_HOST"]
@@ -20,114 +56,389 @@ def get_prod_data(service_account_path):
     except ValueError:
         app = firebase_admin.initialize_app(cred, name='prod')
 
-    db = firestore.client(app=app)
+    return firestore.client(app=app)
+
+
+def emulator_client(service_account_path=None):
+    """
+    Client for the local emulator. Without a service account (e.g. restoring
+    a snapshot, or benchmarks seeding generated data) it connects with
+    anonymous credentials.
+    """
+    # Set emulator env var (an emulator already configured by the caller is kept)
+    os.environ.setdefault("FIRESTORE_EMULATOR_HOST", EMULATOR_HOST)
+    os.environ.setdefault("GCLOUD_PROJECT", PROJECT_ID)
+
+    print(
+        f"🔌 Connecting to Emulator at {os.environ['FIRESTORE_EMULATOR_HOST']}...")
+
+    if service_account_path:
+        # Use the same credentials for the emulator (it ignores validity but needs a structured object)
+        cred = credentials.Certificate(service_account_path)
+
+        try:
+            app = firebase_admin.get_app('local')
+        except ValueError:
+            app = firebase_admin.initialize_app(cred, name='local', options={
+                'projectId': os.environ["GCLOUD_PROJECT"]
+            })
+
+        return firestore.client(app=app)
 
-    data = {}
+    from google.auth.credentials import AnonymousCredentials
+    from google.cloud import firestore as cloud_firestore
+    return cloud_firestore.Client(project=os.environ["GCLOUD_PROJECT"], credentials=AnonymousCredentials())
 
-    # Helper to recursively read
-    def read_collection(col_ref, parent_path=""):
-        col_data = {}
-        for doc in col_ref.stream():
-            doc_path = f"{parent_path}/{doc.id}" if parent_path else doc.id
-            doc_dict = doc.to_dict()
 
-            # Recursively get subcollections
-            sub_cols_data = {}
-            for sub_col in doc.reference.collections():
-                sub_cols_data[sub_col.id] = read_collection(sub_col, doc_path)
+# --- Snapshot value encoding ---
 
-            col_data[doc.id] = {
-                "data": doc_dict,
-                "subcollections": sub_cols_data
-            }
-        return col_data
+class Reference(str):
+    """A document path read from a snapshot; the Firestore sink turns it into a reference."""
 
-    print("📥 Fetching data from Production...")
-    # list_collections() gets root collections
-    for col in db.collections():
-        print(f"   Reading collection: {col.id}")
-        data[col.id] = read_collection(col)
 
-    return data
+def encode_value(value):
+    if isinstance(value, datetime):
+        return {"__type__": "timestamp", "value": value.isoformat()}
+    if isinstance(value, GeoPoint):
+        return {"__type__": "geopoint", "latitude": value.latitude, "longitude": value.longitude}
+    if isinstance(value, DocumentReference):
+        return {"__type__": "reference", "path": value.path}
+    if isinstance(value, Reference):
+        return {"__type__": "reference", "path": str(value)}
+    if isinstance(value, bytes):
+        return {"__type__": "bytes", "value": base64.b64encode(value).decode('ascii')}
+    if isinstance(value, dict):
+        return {key: encode_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [encode_value(item) for item in value]
+    return value
 
 
-def write_local_data(data, service_account_path):
+def decode_value(value):
+    if isinstance(value, dict):
+        kind = value.get("__type__")
+        if kind == "timestamp":
+            return datetime.fromisoformat(value["value"])
+        if kind == "geopoint":
+            return GeoPoint(value["latitude"], value["longitude"])
+        if kind == "reference":
+            return Reference(value["path"])
+        if kind == "bytes":
+            return base64.b64decode(value["value"])
+        return {key: decode_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [decode_value(item) for item in value]
+    return value
+
+
+# --- Sources: yield (label, records, position) per page ---
+# records is an iterable of (document path, data); position is where to
+# resume once every record of the page has been written.
+
+class FirestoreSource:
+    def __init__(self, db, collections=None, page_size=PAGE_SIZE, workers=WORKERS):
+        self.db = db
+        self.collections = collections
+        self.page_size = page_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='seed-read')
+
+    def _page(self, col_ref, after):
+        query = col_ref.order_by('__name__').limit(self.page_size)
+        if after:
+            query = query.start_after({'__name__': after})
+        return list(query.stream())
+
+    def _tree(self, docs):
+        """The page's documents, each followed by everything in its subcollections."""
+        # Listing subcollections is a round trip per document; run those in parallel
+        subcollections = self._executor.map(lambda doc: list(doc.reference.collections()), docs)
+        for doc, subs in zip(docs, subcollections):
+            yield doc.reference.path, doc.to_dict()
+            for sub in subs:
+                yield from self._collection(sub)
+
+    def _collection(self, col_ref):
+        after = None
+        while True:
+            docs = self._page(col_ref, after)
+            yield from self._tree(docs)
+            if len(docs) < self.page_size:
+                return
+            after = docs[-1].id
+
+    def pages(self, position=None):
+        position = position or {"done": [], "collection": None, "after": None}
+        roots = self.collections or sorted(col.id for col in self.db.collections())
+        for col_id in roots:
+            if col_id in position["done"]:
+                continue
+            after = position["after"] if position["collection"] == col_id else None
+            while True:
+                docs = self._page(self.db.collection(col_id), after)
+                last = len(docs) < self.page_size
+                after = docs[-1].id if docs else after
+                if last:
+                    position = {"done": position["done"] + [col_id], "collection": None, "after": None}
+                else:
+                    position = {"done": position["done"], "collection": col_id, "after": after}
+                yield col_id, self._tree(docs), position
+                if last:
+                    break
+
+    def close(self):
+        self._executor.shutdown()
+
+
+class NdjsonSource:
+    def __init__(self, path, collections=None, page_size=PAGE_SIZE):
+        self.path = path
+        self.collections = collections
+        self.page_size = page_size
+
+    def pages(self, position=None):
+        with open(self.path, 'rb') as f:
+            f.seek((position or {}).get("offset", 0))
+            while True:
+                page = []
+                for _ in range(self.page_size):
+                    line = f.readline()
+                    if not line:
+                        break
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    if self.collections and record["path"].split('/')[0] not in self.collections:
+                        continue
+                    page.append((record["path"], decode_value(record["data"])))
+                if page:
+                    yield page[0][0].split('/')[0], page, {"offset": f.tell()}
+                if not line:
+                    return
+
+    def close(self):
+        pass
+
+
+# --- Sinks ---
+
+class FirestoreSink:
     """
-    Connects to Local Emulator and writes the provided data.
+    set()s documents through WriteBatches of MAX_BATCH_WRITES, committed on
+    `workers` threads with at most two batches per worker in flight.
     """
-    # Set emulator env var
-    os.environ["FIRESTORE_EMULATOR_HOST"] = "127.0.0.1:8081"
-    os.environ["GCLOUD_PROJECT"] = "big-fish-9dbec"
 
-    print(
-        f"🔌 Connecting to Emulator at {os.environ['FIRESTORE_EMULATOR_HOST']}...")
+    def __init__(self, db, workers=WORKERS):
+        self.db = db
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='seed-write')
+        self._slots = threading.BoundedSemaphore(workers * 2)
+        self._futures = []
+        self._batch = db.batch()
+        self._pending = 0
 
-    # Use the same credentials for the emulator (it ignores validity but needs a structured object)
-    cred = credentials.Certificate(service_account_path)
+    def _localize(self, value):
+        """References from another client (or a snapshot) become references in this database."""
+        if isinstance(value, (DocumentReference, Reference)):
+            return self.db.document(value.path if isinstance(value, DocumentReference) else str(value))
+        if isinstance(value, dict):
+            return {key: self._localize(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._localize(item) for item in value]
+        return value
 
-    try:
-        app = firebase_admin.get_app('local')
-    except ValueError:
-        app = firebase_admin.initialize_app(cred, name='local', options={
-            'projectId': "big-fish-9dbec"
-        })
+    def write(self, path, data):
+        self._batch.set(self.db.document(path), self._localize(data or {}))
+        self._pending += 1
+        if self._pending == MAX_BATCH_WRITES:
+            self._submit()
+
+    def _submit(self):
+        if not self._pending:
+            return
+        self._slots.acquire()
+        future = self._executor.submit(self._batch.commit)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(future)
+        self._batch = self.db.batch()
+        self._pending = 0
+
+    def flush(self):
+        """Commits everything written so far; raises the first failed commit."""
+        self._submit()
+        futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
+
+    def position(self):
+        return None
+
+    def close(self):
+        self.flush()
+        self._executor.shutdown()
+
+
+class NdjsonSink:
+    def __init__(self, path, position=None):
+        if position:
+            # Resuming: drop anything written after the last checkpoint
+            self._file = open(path, 'r+b')
+            self._file.truncate(position["offset"])
+            self._file.seek(position["offset"])
+        else:
+            self._file = open(path, 'wb')
+
+    def write(self, path, data):
+        line = json.dumps({"path": path, "data": encode_value(data)}, separators=(',', ':'))
+        self._file.write(line.encode('utf-8') + b'\n')
+
+    def flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def position(self):
+        return {"offset": self._file.tell()}
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+# --- Pipeline ---
+
+class Checkpoint:
+    """Progress of one job (source -> sink), replaced atomically after each page."""
+
+    def __init__(self, path, job):
+        self.path = path
+        self.job = job
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return state if state.get("job") == self.job else None
 
-    db = firestore.client(app=app)
+    def save(self, state):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({**state, "job": self.job}, f)
+        os.replace(tmp, self.path)
 
-    def write_collection(col_ref, col_data):
-        for doc_id, content in col_data.items():
-            doc_ref = col_ref.document(doc_id)
-            if content.get("data"):
-                doc_ref.set(content["data"])
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
 
-            # Subcollections
-            for sub_col_id, sub_col_data in content.get("subcollections", {}).items():
-                write_collection(doc_ref.collection(sub_col_id), sub_col_data)
+
+def copy(source, sink, checkpoint=None, resume=None):
+    """Streams every record of `source` into `sink`, checkpointing after each page. Returns the total written."""
+    total = resume["written"] if resume else 0
+    for label, records, position in source.pages(resume["source"] if resume else None):
+        for path, data in records:
+            sink.write(path, data)
+            total += 1
+        sink.flush()
+        if checkpoint:
+            checkpoint.save({"source": position, "sink": sink.position(), "written": total})
+        print(f"   {label}: {total} documents so far")
+    sink.close()
+    source.close()
+    if checkpoint:
+        checkpoint.clear()
+    return total
+
+
+def _nested_records(path, col_data):
+    for doc_id, content in col_data.items():
+        doc_path = f"{path}/{doc_id}"
+        if content.get("data"):
+            yield doc_path, content["data"]
+        for sub_col_id, sub_col_data in content.get("subcollections", {}).items():
+            yield from _nested_records(f"{doc_path}/{sub_col_id}", sub_col_data)
+
+
+def write_local_data(data, service_account_path=None, workers=WORKERS):
+    """
+    Writes {collection: {doc_id: {"data", "subcollections"}}} to the emulator
+    through the batched sink.
+    """
+    sink = FirestoreSink(emulator_client(service_account_path), workers)
 
     print("📤 Writing data to Emulator...")
     for col_id, col_data in data.items():
         print(f"   Writing collection: {col_id}")
-        write_collection(db.collection(col_id), col_data)
+        for path, doc in _nested_records(col_id, col_data):
+            sink.write(path, doc)
+        sink.flush()
+    sink.close()
 
 
-if __name__ == "__main__":
-    sa_path = None
-
-    # 1. Try argument
-    if len(sys.argv) >= 2:
-        sa_path = sys.argv[1]
-
-    # 2. Try finding json in current dir or parent dir
-    if not sa_path:
-        possible_dirs = ['.', '..']
-        for d in possible_dirs:
-            try:
-                if not os.path.exists(d):
-                    continue
-                files = [f for f in os.listdir(d) if f.endswith(
-                    '.json') and 'firebase-adminsdk' in f]
-                if files:
-                    sa_path = os.path.join(d, files[0])
-                    print(f"🔍 Found service account file: {sa_path}")
-                    break
-            except OSError:
-                pass
+def find_service_account():
+    """A *firebase-adminsdk*.json in the current or parent directory, if any."""
+    for d in ['.', '..']:
+        try:
+            if not os.path.exists(d):
+                continue
+            files = [f for f in os.listdir(d) if f.endswith(
+                '.json') and 'firebase-adminsdk' in f]
+            if files:
+                sa_path = os.path.join(d, files[0])
+                print(f"🔍 Found service account file: {sa_path}")
+                return sa_path
+        except OSError:
+            pass
+    return None
 
-    if not sa_path or not os.path.exists(sa_path):
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('service_account', nargs='?', help="service account JSON (found automatically if omitted)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--dump', metavar='FILE', help="write production data to an NDJSON snapshot")
+    mode.add_argument('--restore', metavar='FILE', help="load an NDJSON snapshot into the emulator")
+    parser.add_argument('--collections', help="comma-separated root collections (default: all)")
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE)
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    parser.add_argument('--checkpoint', default=CHECKPOINT_FILE)
+    parser.add_argument('--fresh', action='store_true', help="ignore an existing checkpoint")
+    args = parser.parse_args(argv)
+
+    collections = [c for c in (args.collections or '').split(',') if c] or None
+    sa_path = args.service_account or find_service_account()
+    if not args.restore and (not sa_path or not os.path.exists(sa_path)):
         print("❌ Error: Could not find service account JSON file.")
         print(
             "Usage: python migrations/seed_local.py [path_to_service_account.json]")
         sys.exit(1)
 
-    try:
-        # 1. Read Prod
-        data = get_prod_data(sa_path)
-        print(f"✅ Fetched {len(data)} root collections.")
+    job = json.dumps({"dump": args.dump, "restore": args.restore, "collections": collections})
+    checkpoint = Checkpoint(args.checkpoint, job)
+    if args.fresh:
+        checkpoint.clear()
+    resume = checkpoint.load()
+    if resume:
+        print(f"⏩ Resuming from {args.checkpoint} ({resume['written']} documents already copied)")
+
+    if args.restore:
+        source = NdjsonSource(args.restore, collections, args.page_size)
+    else:
+        print("📥 Reading data from Production...")
+        source = FirestoreSource(prod_client(sa_path), collections, args.page_size, args.workers)
 
-        # 2. Write Local
-        write_local_data(data, sa_path)
-        print("✅ Done! Local emulator seeded.")
+    if args.dump:
+        sink = NdjsonSink(args.dump, resume["sink"] if resume else None)
+        target = args.dump
+    else:
+        sink = FirestoreSink(emulator_client(sa_path), args.workers)
+        target = "the emulator"
 
+    total = copy(source, sink, checkpoint, resume)
+    print(f"✅ Done! {total} documents copied to {target}.")
+
+
+if __name__ == "__main__":
+    try:
+        main(sys.argv[1:])
     except Exception as e:
         print(f"❌ Error: {e}")
         # Print full traceback for debugging
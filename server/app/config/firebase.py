@@ -0,0 +1,102 @@
+import os
+import threading
+
+import firebase_admin
+from firebase_admin import credentials, firestore, storage
+
+from ..services.metrics import instrument
+
+# Shared Firebase handles for the whole process.
+# Everything here is created lazily on first use and then reused, so a cold
+# start only pays for what the first request actually needs.
+
+OPTIONS = {
+    'storageBucket': 'big-fish-9dbec.firebasestorage.app'
+}
+
+_lock = threading.Lock()
+_app = None
+_db = None
+_bucket = None
+
+
+def _find_credentials():
+    """
+    Local dev or manual credential path. Returns None to fall back to
+    Application Default Credentials (Cloud Functions / Cloud Run).
+    """
+    if os.getenv("FIREBASE_CONFIG"):
+        # Cloud environment
+        return None
+
+    # Use GOOGLE_APPLICATION_CREDENTIALS env var or default credentials
+    cred_path = os.getenv("SERVICE_ACCOUNT_FILE")
+
+    # Fallback: Check project root for service account file if not provided/found
+    if not cred_path or not os.path.exists(cred_path):
+        try:
+            server_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            project_root = os.path.dirname(server_dir)
+            for f in os.listdir(project_root):
+                if f.endswith('.json') and 'firebase-adminsdk' in f:
+                    cred_path = os.path.join(project_root, f)
+                    print(f"Found service account in root: {cred_path}")
+                    break
+        except Exception:
+            pass
+
+    if cred_path and os.path.exists(cred_path):
+        return credentials.Certificate(cred_path)
+    return None
+
+
+def get_app() -> firebase_admin.App:
+    """Initializes the default Firebase app once; credential discovery runs only here."""
+    global _app
+    if _app is None:
+        with _lock:
+            if _app is None:
+                try:
+                    _app = firebase_admin.get_app()
+                except ValueError:
+                    cred = _find_credentials()
+                    if cred:
+                        _app = firebase_admin.initialize_app(cred, OPTIONS)
+                    else:
+                        _app = firebase_admin.initialize_app(options=OPTIONS)
+    return _app
+
+
+def get_db():
+    """
+    The process-wide Firestore client. One client means one gRPC channel,
+    reused (and kept warm) across requests. Wrapped so document reads and
+    writes are counted per request (see services/metrics.py).
+    """
+    global _db
+    if _db is None:
+        app = get_app()
+        with _lock:
+            if _db is None:
+                _db = instrument(firestore.client(app))
+    return _db
+
+
+def get_bucket():
+    """
+    The process-wide default Storage bucket handle.
+    With LOCAL_STORAGE_DIR set, a directory-backed stand-in is used instead
+    (served under LOCAL_STORAGE_URL if given).
+    """
+    global _bucket
+    if _bucket is None and os.getenv('LOCAL_STORAGE_DIR'):
+        from ..services.local_storage import LocalBucket
+        with _lock:
+            if _bucket is None:
+                _bucket = LocalBucket(os.environ['LOCAL_STORAGE_DIR'], os.getenv('LOCAL_STORAGE_URL'))
+    if _bucket is None:
+        app = get_app()
+        with _lock:
+            if _bucket is None:
+                _bucket = storage.bucket(app=app)
+    return _bucket
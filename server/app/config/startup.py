@@ -0,0 +1,40 @@
+import json
+import time
+from typing import Any, Dict, List, Tuple
+
+# Cold-start timing for this process. main.py records how long each import
+# phase took; the first response logs the whole report once as a JSON line
+# so it can be tracked in Cloud Logging across releases.
+
+_started = time.perf_counter()
+_phases: List[Tuple[str, float]] = []
+_first_response_ms = None
+
+
+def begin(started: float) -> None:
+    """Sets the reference point (normally the top of main.py)."""
+    global _started
+    _started = started
+
+
+def phase(name: str, since: float) -> float:
+    """Records a phase that began at perf_counter() value `since`. Returns now."""
+    now = time.perf_counter()
+    _phases.append((name, round((now - since) * 1000, 2)))
+    return now
+
+
+def first_response() -> None:
+    global _first_response_ms
+    if _first_response_ms is not None:
+        return
+    _first_response_ms = round((time.perf_counter() - _started) * 1000, 2)
+    print(json.dumps({'startup': report()}))
+
+
+def report() -> Dict[str, Any]:
+    return {
+        'phases_ms': dict(_phases),
+        'import_ms': round(sum(ms for _, ms in _phases), 2),
+        'first_response_ms': _first_response_ms,
+    }
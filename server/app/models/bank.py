@@ -0,0 +1,71 @@
+from typing import Any, Dict, List
+from datetime import datetime
+from .mvp import _parse_datetime
+
+
+class LedgerEntry:
+    """
+    One guild bank transaction. Entries are append-only: the balance is
+    adjusted when an entry is written and never recomputed from them.
+    items: [{"item_id": 607, "name": "Yggdrasil Berry", "quantity": 3}, ...]
+    """
+    collection_name = 'bank_ledger'
+    TYPES = ('deposit', 'withdrawal')
+
+    def __init__(self, data: Dict[str, Any]):
+        self.id = data.get('id')
+        self.type = data.get('type')
+        self.zeny = data.get('zeny') or 0
+        self.items: List[Dict[str, Any]] = data.get('items') or []
+        self.member = data.get('member')
+        self.note = data.get('note')
+        self.created_at = _parse_datetime(data.get('created_at'))
+
+    def validate(self) -> None:
+        """Raises ValueError if the entry can't be posted; merges repeated item ids."""
+        if self.type not in self.TYPES:
+            raise ValueError(f"type must be one of {', '.join(self.TYPES)}")
+        if not isinstance(self.member, str) or not self.member:
+            raise ValueError("member is required")
+        if not isinstance(self.zeny, int) or isinstance(self.zeny, bool) or self.zeny < 0:
+            raise ValueError("zeny must be a non-negative integer")
+        if not isinstance(self.items, list):
+            raise ValueError("items must be a list of {item_id, quantity}")
+        merged: Dict[int, Dict[str, Any]] = {}
+        for item in self.items:
+            if not isinstance(item, dict):
+                raise ValueError("items must be a list of {item_id, quantity}")
+            item_id, quantity = item.get('item_id'), item.get('quantity')
+            if not isinstance(item_id, int) or item_id <= 0:
+                raise ValueError("item_id must be a positive integer")
+            if not isinstance(quantity, int) or quantity <= 0:
+                raise ValueError(f"quantity of item {item_id} must be a positive integer")
+            entry = merged.setdefault(item_id, {'item_id': item_id, 'name': item.get('name'), 'quantity': 0})
+            entry['quantity'] += quantity
+        self.items = list(merged.values())
+        if not self.zeny and not self.items:
+            raise ValueError("A transaction needs zeny or items")
+
+    @property
+    def sign(self) -> int:
+        return 1 if self.type == 'deposit' else -1
+
+    def same_as(self, other: 'LedgerEntry') -> bool:
+        """True if `other` posts the same movement (used to recognize a replayed idempotency key)."""
+        return ((self.type, self.zeny, self.member, sorted((i['item_id'], i['quantity']) for i in self.items)) ==
+                (other.type, other.zeny, other.member, sorted((i['item_id'], i['quantity']) for i in other.items)))
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'type': self.type,
+            'zeny': self.zeny,
+            'items': self.items,
+            'member': self.member,
+            'note': self.note,
+            'created_at': self.created_at,
+        }
+        if self.id:
+            data['id'] = self.id
+        if isinstance(data['created_at'], datetime):
+            data['created_at'] = data['created_at'].isoformat()
+        return data
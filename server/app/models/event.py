@@ -0,0 +1,66 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from .mvp import _parse_datetime
+
+
+class Event:
+    """
+    A scheduled guild event (WoE, Endless Tower run, ...) with the roles it
+    needs, e.g. [{"name": "Tanks", "needed": 5}, ...].
+    Sign-ups live in events/<id>/signups/<uid>; how many each role has is
+    kept in sharded counters (see services/sharded_counter.py).
+    """
+    collection_name = 'events'
+
+    def __init__(self, data: Dict[str, Any]):
+        self.id = data.get('id')
+        self.title = data.get('title')
+        self.description = data.get('description')
+        self.starts_at = _parse_datetime(data.get('starts_at'))
+        self.roles: List[Dict[str, Any]] = data.get('roles') or []
+        self.created_by = data.get('created_by')
+        # Fixed when the event is created, so counters stay readable if the default changes
+        self.counter_shards = data.get('counter_shards')
+
+    def validate(self) -> None:
+        """Raises ValueError if the event can't be stored."""
+        if not isinstance(self.title, str) or not self.title.strip():
+            raise ValueError("title is required")
+        if self.starts_at is None:
+            raise ValueError("starts_at is required (ISO-8601)")
+        if not isinstance(self.roles, list) or not self.roles:
+            raise ValueError("roles must be a non-empty list of {name, needed}")
+        names = set()
+        for role in self.roles:
+            if not isinstance(role, dict) or not isinstance(role.get('name'), str) or not role['name'].strip():
+                raise ValueError("Each role needs a name")
+            if not isinstance(role.get('needed'), int) or role['needed'] < 0:
+                raise ValueError(f"Role {role['name']} needs a non-negative integer 'needed'")
+            if role['name'] in names:
+                raise ValueError(f"Duplicate role: {role['name']}")
+            names.add(role['name'])
+
+    def has_role(self, name: str) -> bool:
+        return any(role['name'] == name for role in self.roles)
+
+    def to_dict(self, filled: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """Firestore document; with `filled` (role -> sign-ups), the JSON response including fulfillment."""
+        data = {
+            'title': self.title,
+            'description': self.description,
+            'starts_at': self.starts_at,
+            'roles': [{'name': role['name'], 'needed': role['needed']} for role in self.roles],
+            'created_by': self.created_by,
+            'counter_shards': self.counter_shards,
+        }
+        if filled is None:
+            return data
+
+        data.pop('counter_shards')
+        data['id'] = self.id
+        if isinstance(data['starts_at'], datetime):
+            data['starts_at'] = data['starts_at'].isoformat()
+        for role in data['roles']:
+            role['filled'] = filled.get(role['name'], 0)
+        data['signups'] = sum(role['filled'] for role in data['roles'])
+        return data
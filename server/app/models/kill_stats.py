@@ -0,0 +1,120 @@
+import math
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+from .mvp import _parse_datetime
+
+
+class KillStats:
+    """
+    Running statistics of one MVP location (mvp_stats/<mvp_id>), updated
+    with every entry appended to the kill log so stats reads never scan it.
+
+    The observed respawn interval is the time from a kill to the first sign
+    the MVP is back: a sighting, or the next kill if nobody reported one
+    (then it's an upper bound). Its count, mean and variance are kept with
+    Welford's online algorithm, in minutes like spawn_delay/spawn_variance.
+    """
+    collection_name = 'mvp_stats'
+
+    def __init__(self, data: Dict[str, Any]):
+        self.kills = data.get('kills') or 0
+        self.sightings = data.get('sightings') or 0
+        self.last_killed = _parse_datetime(data.get('last_killed'))
+        # True from a kill until the first sighting or kill after it
+        self.awaiting_spawn = bool(data.get('awaiting_spawn'))
+        interval = data.get('interval') or {}
+        self.count = interval.get('count') or 0
+        self.mean = interval.get('mean') or 0.0
+        self.m2 = interval.get('m2') or 0.0
+        self.min = interval.get('min')
+        self.max = interval.get('max')
+        # Newest first: [{"at": datetime, "by": uid or None}]
+        self.recent_kills: List[Dict[str, Any]] = list(data.get('recent_kills') or [])
+        self.kills_by_member: Dict[str, int] = dict(data.get('kills_by_member') or {})
+
+    def _observe_respawn(self, at: datetime) -> Optional[float]:
+        """Folds in the interval since the last kill if this is the first sign of the respawn."""
+        if not self.awaiting_spawn or self.last_killed is None or at <= self.last_killed:
+            return None
+        minutes = (at - self.last_killed).total_seconds() / 60
+        self.count += 1
+        delta = minutes - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (minutes - self.mean)
+        self.min = minutes if self.min is None else min(self.min, minutes)
+        self.max = minutes if self.max is None else max(self.max, minutes)
+        self.awaiting_spawn = False
+        return minutes
+
+    def add_sighting(self, at: datetime) -> Optional[float]:
+        """Records the MVP seen alive at `at`; returns the respawn interval it measured, if any."""
+        self.sightings += 1
+        return self._observe_respawn(at)
+
+    def is_duplicate_kill(self, at: datetime, spawn_delay: Optional[int], spawn_variance: Optional[int]) -> bool:
+        """
+        True for a kill less than spawn_delay - spawn_variance minutes from the
+        last one (either side): the MVP can't have respawned in between, so it
+        is another member reporting the same kill.
+        """
+        if self.last_killed is None or not spawn_delay:
+            return False
+        min_respawn = timedelta(minutes=max(spawn_delay - (spawn_variance or 0), 0))
+        return abs(at - self.last_killed) < min_respawn
+
+    def add_kill(self, at: datetime, member: Optional[str], keep_recent: int) -> Optional[float]:
+        """
+        Records a kill. A backdated kill (older than the last one) is counted
+        but doesn't move last_killed or measure an interval.
+        """
+        self.kills += 1
+        interval = self._observe_respawn(at)
+        if member:
+            self.kills_by_member[member] = self.kills_by_member.get(member, 0) + 1
+        self.recent_kills.append({'at': at, 'by': member})
+        self.recent_kills.sort(key=lambda kill: _parse_datetime(kill['at']), reverse=True)
+        del self.recent_kills[keep_recent:]
+        if self.last_killed is None or at > self.last_killed:
+            self.last_killed = at
+            self.awaiting_spawn = True
+        return interval
+
+    @property
+    def variance(self) -> Optional[float]:
+        """Sample variance of the respawn interval (minutes squared)."""
+        return self.m2 / (self.count - 1) if self.count > 1 else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'kills': self.kills,
+            'sightings': self.sightings,
+            'last_killed': self.last_killed,
+            'awaiting_spawn': self.awaiting_spawn,
+            'interval': {'count': self.count, 'mean': self.mean, 'm2': self.m2, 'min': self.min, 'max': self.max},
+            'recent_kills': self.recent_kills,
+            'kills_by_member': self.kills_by_member,
+        }
+
+    def summary(self, spawn_delay: Optional[int] = None, spawn_variance: Optional[int] = None) -> Dict[str, Any]:
+        """JSON response: observed interval next to the configured respawn window."""
+        variance = self.variance
+        return {
+            'kills': self.kills,
+            'sightings': self.sightings,
+            'last_killed': self.last_killed.isoformat() if self.last_killed else None,
+            'respawn_interval': {
+                'count': self.count,
+                'mean': self.mean if self.count else None,
+                'variance': variance,
+                'stddev': math.sqrt(variance) if variance is not None else None,
+                'min': self.min,
+                'max': self.max,
+            },
+            'configured': {
+                'spawn_delay': spawn_delay,
+                'spawn_variance': spawn_variance,
+            },
+            'recent_kills': [{'at': _parse_datetime(kill['at']).isoformat(), 'by': kill.get('by')}
+                             for kill in self.recent_kills],
+            'kills_by_member': self.kills_by_member,
+        }
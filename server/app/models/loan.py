@@ -0,0 +1,73 @@
+from typing import Any, Dict
+from datetime import datetime
+from .mvp import _parse_datetime
+
+
+class Loan:
+    """
+    A piece of guild gear lent to a member. `status` is 'out' until the item
+    comes back; the borrowing fee is tracked separately in `fee_status`
+    ('none' for free loans, then 'unpaid' -> 'paid' or 'waived').
+    """
+    collection_name = 'loans'
+    STATUSES = ('out', 'returned')
+    FEE_STATUSES = ('none', 'unpaid', 'paid', 'waived')
+
+    def __init__(self, data: Dict[str, Any]):
+        self.id = data.get('id')
+        self.item_name = data.get('item_name')
+        self.item_id = data.get('item_id')
+        self.borrower = data.get('borrower')
+        self.borrower_name = data.get('borrower_name')
+        self.borrowed_at = _parse_datetime(data.get('borrowed_at'))
+        self.due_at = _parse_datetime(data.get('due_at'))
+        self.returned_at = _parse_datetime(data.get('returned_at'))
+        self.status = data.get('status') or 'out'
+        self.fee = data.get('fee') or 0
+        self.fee_status = data.get('fee_status') or ('unpaid' if self.fee else 'none')
+        self.notes = data.get('notes')
+
+    def validate(self) -> None:
+        """Raises ValueError if the loan can't be stored."""
+        if not isinstance(self.item_name, str) or not self.item_name.strip():
+            raise ValueError("item_name is required")
+        if self.item_id is not None and (not isinstance(self.item_id, int) or self.item_id <= 0):
+            raise ValueError("item_id must be a positive integer")
+        if not isinstance(self.borrower, str) or not self.borrower:
+            raise ValueError("borrower is required")
+        if self.borrowed_at is None:
+            raise ValueError("borrowed_at is required (ISO-8601)")
+        if self.due_at is not None and self.due_at < self.borrowed_at:
+            raise ValueError("due_at can't be before borrowed_at")
+        if self.status not in self.STATUSES:
+            raise ValueError(f"status must be one of {', '.join(self.STATUSES)}")
+        if not isinstance(self.fee, int) or isinstance(self.fee, bool) or self.fee < 0:
+            raise ValueError("fee must be a non-negative integer")
+        if self.fee_status not in self.FEE_STATUSES:
+            raise ValueError(f"fee_status must be one of {', '.join(self.FEE_STATUSES)}")
+        if (self.fee_status == 'none') != (self.fee == 0):
+            raise ValueError("fee_status is 'none' exactly when there is no fee")
+
+    def to_dict(self, for_response: bool = False) -> Dict[str, Any]:
+        """Firestore document (datetimes kept as timestamps so they can be queried); JSON-ready with for_response."""
+        data = {
+            'item_name': self.item_name,
+            'item_id': self.item_id,
+            'borrower': self.borrower,
+            'borrower_name': self.borrower_name,
+            'borrowed_at': self.borrowed_at,
+            'due_at': self.due_at,
+            'returned_at': self.returned_at,
+            'status': self.status,
+            'fee': self.fee,
+            'fee_status': self.fee_status,
+            'notes': self.notes,
+        }
+        if not for_response:
+            return data
+
+        data['id'] = self.id
+        for field in ('borrowed_at', 'due_at', 'returned_at'):
+            if isinstance(data[field], datetime):
+                data[field] = data[field].isoformat()
+        return data
@@ -1,5 +1,16 @@
-from typing import Optional, Dict, Any
-from datetime import datetime
+from typing import Optional, Dict, Any, Tuple
+from datetime import datetime, timedelta, timezone
+
+
+def _parse_datetime(value) -> Optional[datetime]:
+    """Accepts a datetime (incl. Firestore timestamps) or an ISO-8601 string."""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
 
 
 class Mvp:
@@ -14,8 +25,46 @@ class Mvp:
         self.notes = data.get('notes')
 
         # Handle datetime fields
-        self.last_killed = data.get('last_killed')
-        self.respawn_at = data.get('respawn_at')
+        self.last_killed = _parse_datetime(data.get('last_killed'))
+        self.respawn_at = _parse_datetime(data.get('respawn_at'))
+        self.respawn_window_start = _parse_datetime(data.get('respawn_window_start'))
+        self.respawn_window_end = _parse_datetime(data.get('respawn_window_end'))
+
+    # --- Respawn engine ---
+    # spawn_delay and spawn_variance are minutes. The MVP can appear anywhere
+    # from kill + delay to kill + delay + variance.
+
+    def respawn_window(self, killed_at: datetime) -> Tuple[datetime, datetime]:
+        """Returns (earliest, latest) respawn time for a kill at `killed_at`."""
+        start = killed_at + timedelta(minutes=self.spawn_delay or 0)
+        end = start + timedelta(minutes=self.spawn_variance or 0)
+        return start, end
+
+    def report_kill(self, killed_at: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Marks the MVP dead and computes its respawn window.
+        Returns the fields to merge into the Firestore document.
+        """
+        killed_at = _parse_datetime(killed_at) or datetime.now(timezone.utc)
+        start, end = self.respawn_window(killed_at)
+        self.status = 'dead'
+        self.last_killed = killed_at
+        self.respawn_at = start
+        self.respawn_window_start = start
+        self.respawn_window_end = end
+        return {
+            'status': self.status,
+            'last_killed': killed_at,
+            'respawn_at': start,
+            'respawn_window_start': start,
+            'respawn_window_end': end,
+        }
+
+    def has_respawned(self, now: Optional[datetime] = None) -> bool:
+        """True once a dead MVP is past the end of its respawn window."""
+        if self.status != 'dead' or self.respawn_window_end is None:
+            return False
+        return self.respawn_window_end <= (now or datetime.now(timezone.utc))
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert object to dictionary for Firestore storage/JSON response"""
@@ -28,15 +77,16 @@ class Mvp:
             "status": self.status,
             "notes": self.notes,
             "last_killed": self.last_killed,
-            "respawn_at": self.respawn_at
+            "respawn_at": self.respawn_at,
+            "respawn_window_start": self.respawn_window_start,
+            "respawn_window_end": self.respawn_window_end
         }
         if self.id:
             data['id'] = self.id
 
         # Serialize datetimes if they are objects
-        if isinstance(data['last_killed'], datetime):
-            data['last_killed'] = data['last_killed'].isoformat()
-        if isinstance(data['respawn_at'], datetime):
-            data['respawn_at'] = data['respawn_at'].isoformat()
+        for field in ('last_killed', 'respawn_at', 'respawn_window_start', 'respawn_window_end'):
+            if isinstance(data[field], datetime):
+                data[field] = data[field].isoformat()
 
         return data
@@ -0,0 +1,162 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Converters for typed path params, e.g. /items/<int:item_id>
+CONVERTERS: Dict[str, Callable[[str], Any]] = {
+    'str': str,
+    'int': int,
+}
+
+
+class _Node:
+    __slots__ = ('static', 'params', 'handlers', 'allowed')
+
+    def __init__(self):
+        # segment -> child for literal segments
+        self.static: Dict[str, '_Node'] = {}
+        # (param name, converter, child) for <param> segments, in registration order
+        self.params: List[Tuple[str, Callable[[str], Any], '_Node']] = []
+        # method -> handler for routes ending at this node
+        self.handlers: Dict[str, Callable] = {}
+        # sorted methods for the Allow header, filled in by compile()
+        self.allowed: List[str] = []
+
+
+class Router:
+    """
+    Method + path pattern registry compiled into a segment trie.
+
+    Patterns are '/'-separated; a segment written as <name> or <type:name>
+    captures a path param (types: str, int). Literal segments win over params,
+    so '/mvps/upcoming' and '/mvps/<mvp_id>' can be registered in any order.
+    """
+
+    def __init__(self):
+        self._routes: List[Tuple[str, str, Callable]] = []
+        self._root: Optional[_Node] = None
+        # Exact path -> node for patterns without params; skips the trie walk
+        self._static_paths: Dict[str, _Node] = {}
+
+    def add(self, method: str, pattern: str, handler: Callable) -> None:
+        self._routes.append((method.upper(), pattern, handler))
+        self._root = None
+
+    def routes(self) -> List[Tuple[str, str, Callable]]:
+        return list(self._routes)
+
+    def compile(self) -> None:
+        root = _Node()
+        static_paths = {}
+        for method, pattern, handler in self._routes:
+            node = root
+            segments = _split(pattern)
+            for segment in segments:
+                if segment.startswith('<') and segment.endswith('>'):
+                    kind, _, name = segment[1:-1].rpartition(':')
+                    converter = CONVERTERS[kind or 'str']
+                    for param_name, param_converter, child in node.params:
+                        if param_name == name and param_converter is converter:
+                            node = child
+                            break
+                    else:
+                        child = _Node()
+                        node.params.append((name, converter, child))
+                        node = child
+                else:
+                    node = node.static.setdefault(segment, _Node())
+            if method in node.handlers:
+                raise ValueError(f"Duplicate route: {method} {pattern}")
+            node.handlers[method] = handler
+            node.allowed = sorted(node.handlers)
+            if not any(segment.startswith('<') for segment in segments):
+                static_paths['/' + '/'.join(segments)] = node
+        self._root = root
+        self._static_paths = static_paths
+
+    def match(self, method: str, path: str) -> Tuple[Optional[Callable], Dict[str, Any], List[str]]:
+        """
+        Returns (handler, params, allowed_methods).
+        handler is None if nothing matches; allowed_methods is then empty for
+        an unknown path (404) or lists the methods the path supports (405).
+        """
+        if self._root is None:
+            self.compile()
+        params = {}
+        node = self._static_paths.get(path)
+        if node is None:
+            segments = _split(path)
+            node, params, forked = _greedy_walk(self._root, segments)
+            if node is None:
+                if not forked:
+                    return None, {}, []
+                node, found = _walk(self._root, segments)
+                if node is None:
+                    return None, {}, []
+                params = dict(found)
+        handler = node.handlers.get(method)
+        if handler is None:
+            return None, {}, node.allowed
+        return handler, params, node.allowed
+
+
+def _split(path: str) -> List[str]:
+    segments = path.strip('/').split('/')
+    if '' in segments:
+        segments = [segment for segment in segments if segment]
+    return segments
+
+
+def _greedy_walk(node: _Node, segments: List[str]):
+    """
+    Single pass taking the literal child, else the first param that converts.
+    Correct whenever it finds a node. On a dead end after passing a node where
+    another branch could also have matched (forked: a literal with params
+    beside it, or one of several params), the caller falls back to the
+    backtracking _walk; without a fork the path simply doesn't exist.
+    """
+    params = {}
+    forked = False
+    for segment in segments:
+        child = node.static.get(segment)
+        if child is not None:
+            forked = forked or bool(node.params)
+        else:
+            forked = forked or len(node.params) > 1
+            for name, converter, param_child in node.params:
+                try:
+                    params[name] = segment if converter is str else converter(segment)
+                except ValueError:
+                    continue
+                child = param_child
+                break
+            else:
+                return None, params, forked
+        node = child
+    return (node, params, forked) if node.handlers else (None, params, forked)
+
+
+def _walk(node: _Node, segments: List[str]):
+    """
+    Depth-first match with literal segments tried before params. Only
+    branches that actually fork (literal and param both possible) are kept
+    on the stack for backtracking.
+    """
+    stack = [(node, 0, ())]
+    end = len(segments)
+    while stack:
+        node, i, params = stack.pop()
+        if i == end:
+            if node.handlers:
+                return node, params
+            continue
+        segment = segments[i]
+        # Pushed first so they are tried after the literal child
+        for name, converter, child in reversed(node.params):
+            try:
+                value = segment if converter is str else converter(segment)
+            except ValueError:
+                continue
+            stack.append((child, i + 1, params + ((name, value),)))
+        child = node.static.get(segment)
+        if child is not None:
+            stack.append((child, i + 1, params))
+    return None, ()
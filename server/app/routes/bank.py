@@ -0,0 +1,290 @@
+from firebase_admin import firestore
+from firebase_functions import https_fn
+from google.api_core import exceptions
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from ..config.firebase import get_db
+from ..models.bank import LedgerEntry
+from ..models.mvp import _parse_datetime
+from ..services import auth
+from ..services.pagination import MAX_PAGE_SIZE, encode_time_cursor, decode_time_cursor
+
+# The running balance, adjusted in the same write as every ledger entry
+BALANCE_COLLECTION, BALANCE_DOC = 'bank', 'balance'
+SNAPSHOT_COLLECTION = 'bank_snapshots'
+# Seconds between materialized balance snapshots (taken on GET /bank when due)
+SNAPSHOT_INTERVAL = float(os.getenv('BANK_SNAPSHOT_INTERVAL', '3600'))
+DEFAULT_HISTORY_LIMIT = 50
+
+_IDEMPOTENCY_KEY_RE = re.compile(r'^[A-Za-z0-9_.:-]{8,128}$')
+
+
+class InsufficientBalance(Exception):
+    pass
+
+
+def _balance_ref(db):
+    return db.collection(BALANCE_COLLECTION).document(BALANCE_DOC)
+
+
+def _delta(entry: LedgerEntry) -> dict:
+    """Balance document changes for `entry`, as server-side increments."""
+    items = {}
+    for item in entry.items:
+        items[str(item['item_id'])] = {'quantity': firestore.Increment(entry.sign * item['quantity'])}
+        if item.get('name'):
+            items[str(item['item_id'])]['name'] = item['name']
+    delta = {
+        'zeny': firestore.Increment(entry.sign * entry.zeny),
+        'entries': firestore.Increment(1),
+        'updated_at': firestore.SERVER_TIMESTAMP,
+    }
+    # set(merge=True) merges nested maps leaf by leaf (items.<id>.quantity, items.<id>.name),
+    # but an empty map is itself a leaf and would replace the whole inventory
+    if items:
+        delta['items'] = items
+    return delta
+
+
+def _apply(balance: dict, entry: LedgerEntry) -> None:
+    """In-memory counterpart of _delta, for balances rebuilt from a snapshot."""
+    balance['zeny'] = balance.get('zeny', 0) + entry.sign * entry.zeny
+    items = balance.setdefault('items', {})
+    for item in entry.items:
+        current = items.setdefault(str(item['item_id']), {'quantity': 0})
+        current['quantity'] += entry.sign * item['quantity']
+        if item.get('name'):
+            current['name'] = item['name']
+    balance['entries'] = balance.get('entries', 0) + 1
+
+
+def _serialize_balance(data: dict, as_of=None) -> dict:
+    items = [{'item_id': int(item_id), 'name': item.get('name'), 'quantity': item.get('quantity', 0)}
+             for item_id, item in (data.get('items') or {}).items() if item.get('quantity')]
+    as_of = as_of or data.get('updated_at')
+    return {
+        'zeny': data.get('zeny', 0),
+        'items': sorted(items, key=lambda item: item['item_id']),
+        'entries': data.get('entries', 0),
+        'as_of': as_of.isoformat() if hasattr(as_of, 'isoformat') else as_of,
+    }
+
+
+def _entry(doc) -> LedgerEntry:
+    return LedgerEntry({**doc.to_dict(), 'id': doc.id})
+
+
+def _post_deposit(db, entry_ref, entry: LedgerEntry):
+    """Entry and balance increment in one batch; increments never lose concurrent deposits."""
+    batch = db.batch()
+    batch.create(entry_ref, {**entry.to_dict(), 'created_at': firestore.SERVER_TIMESTAMP})
+    batch.set(_balance_ref(db), _delta(entry), merge=True)
+    return batch.commit()[0].update_time
+
+
+@firestore.transactional
+def _post_withdrawal(transaction, db, entry_ref, entry: LedgerEntry):
+    """
+    Like a deposit, but in a transaction so the balance can't go negative.
+    A replayed key is recognized before the balance check, so a retry gets
+    its original entry back even if the balance has dropped since.
+    """
+    if entry_ref.get(transaction=transaction).exists:
+        raise exceptions.AlreadyExists(f"Ledger entry {entry_ref.id} already exists")
+    balance = _balance_ref(db).get(transaction=transaction).to_dict() or {}
+    if balance.get('zeny', 0) < entry.zeny:
+        raise InsufficientBalance(f"Not enough zeny: {balance.get('zeny', 0)} in the bank")
+    for item in entry.items:
+        held = ((balance.get('items') or {}).get(str(item['item_id'])) or {}).get('quantity', 0)
+        if held < item['quantity']:
+            raise InsufficientBalance(f"Not enough of item {item['item_id']}: {held} in the bank")
+    transaction.create(entry_ref, {**entry.to_dict(), 'created_at': firestore.SERVER_TIMESTAMP})
+    transaction.set(_balance_ref(db), _delta(entry), merge=True)
+
+
+def post_transaction(req: https_fn.Request, headers: dict) -> https_fn.Response:
+    """
+    Logs a deposit or withdrawal by the signed-in member.
+    Body: {type, zeny?, items?: [{item_id, name?, quantity}], note?}.
+
+    The entry is stored under its idempotency key (Idempotency-Key header or
+    "idempotency_key"), written with create() together with the balance
+    increments. Replaying a key returns the original entry (200) instead of
+    posting twice; reusing it for a different movement is a 409.
+    Without a key every request posts a new entry.
+    """
+    data = req.get_json(silent=True)
+    if not isinstance(data, dict):
+        return https_fn.Response(json.dumps({"error": "Expected a JSON object"}), status=400, headers=headers)
+    key = req.headers.get('Idempotency-Key') or data.pop('idempotency_key', None)
+    if key is not None and not _IDEMPOTENCY_KEY_RE.match(key):
+        return https_fn.Response(json.dumps({"error": "Idempotency key must be 8-128 characters of [A-Za-z0-9_.:-]"}),
+                                 status=400, headers=headers)
+    try:
+        # The ledger names whoever's token authorized the request, not a body field
+        entry = LedgerEntry({**data, 'member': auth.current_uid(), 'id': None, 'created_at': None})
+        entry.validate()
+    except ValueError as e:
+        return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
+
+    db = get_db()
+    ledger = db.collection(LedgerEntry.collection_name)
+    entry_ref = ledger.document(key) if key else ledger.document()
+    try:
+        if entry.type == 'deposit':
+            entry.created_at = _post_deposit(db, entry_ref, entry)
+        else:
+            _post_withdrawal(db.transaction(), db, entry_ref, entry)
+            entry.created_at = entry_ref.get().get('created_at')
+    except exceptions.AlreadyExists:
+        original = _entry(entry_ref.get())
+        if not original.same_as(entry):
+            return https_fn.Response(json.dumps({"error": "Idempotency key was already used for another transaction"}),
+                                     status=409, headers=headers)
+        return https_fn.Response(json.dumps(original.to_dict()), headers=headers)
+    except InsufficientBalance as e:
+        return https_fn.Response(json.dumps({"error": str(e)}), status=409, headers=headers)
+    except Exception as e:
+        print(f"Error posting bank transaction: {e}")
+        return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
+
+    entry.id = entry_ref.id
+    return https_fn.Response(json.dumps(entry.to_dict()), status=201, headers=headers)
+
+
+# Time of the newest snapshot, looked up once per instance
+_snapshot_lock = threading.Lock()
+_last_snapshot_at = None
+
+
+def _latest_snapshot(db, at=None):
+    query = db.collection(SNAPSHOT_COLLECTION)
+    if at is not None:
+        query = query.where(filter=firestore.FieldFilter('as_of', '<=', at))
+    docs = list(query.order_by('as_of', direction=firestore.Query.DESCENDING).limit(1).stream())
+    return docs[0].to_dict() if docs else None
+
+
+def take_snapshot(db, balance_doc) -> dict:
+    """
+    Copies the balance document into bank_snapshots, as of its update time:
+    every entry with created_at <= as_of is included, none after.
+    """
+    global _last_snapshot_at
+    as_of = balance_doc.update_time
+    data = {**(balance_doc.to_dict() or {}), 'as_of': as_of}
+    data.pop('updated_at', None)
+    try:
+        # Keyed by time, so instances racing to take the same snapshot write it once
+        db.collection(SNAPSHOT_COLLECTION).document(str(int(as_of.timestamp() * 1_000_000))).create(data)
+    except exceptions.AlreadyExists:
+        pass
+    with _snapshot_lock:
+        _last_snapshot_at = time.time()
+    return data
+
+
+def _maybe_snapshot(db, balance_doc) -> None:
+    global _last_snapshot_at
+    if not balance_doc.exists:
+        return
+    with _snapshot_lock:
+        last = _last_snapshot_at
+    if last is None:
+        latest = _latest_snapshot(db)
+        last = latest['as_of'].timestamp() if latest else 0.0
+        with _snapshot_lock:
+            _last_snapshot_at = last
+    if time.time() - last >= SNAPSHOT_INTERVAL:
+        try:
+            take_snapshot(db, balance_doc)
+        except Exception as e:
+            # The balance itself was read fine; a missed snapshot is taken next time
+            print(f"Error taking bank snapshot: {e}")
+
+
+def _balance_at(db, at: datetime) -> dict:
+    """Newest snapshot at or before `at`, plus the ledger entries after it up to `at`."""
+    snapshot = _latest_snapshot(db, at) or {}
+    query = db.collection(LedgerEntry.collection_name)
+    if snapshot.get('as_of'):
+        query = query.where(filter=firestore.FieldFilter('created_at', '>', snapshot['as_of']))
+    query = query.where(filter=firestore.FieldFilter('created_at', '<=', at)).order_by('created_at')
+    balance = {'zeny': snapshot.get('zeny', 0), 'items': snapshot.get('items') or {},
+               'entries': snapshot.get('entries', 0)}
+    for doc in query.stream():
+        _apply(balance, _entry(doc))
+    return _serialize_balance(balance, as_of=at)
+
+
+def get_bank(req: https_fn.Request, headers: dict) -> https_fn.Response:
+    """
+    Current zeny and inventory: a single document read. With ?at=<ISO-8601>,
+    the balance at that time, rebuilt from the nearest snapshot.
+    """
+    db = get_db()
+    try:
+        # An unencoded '+' in the UTC offset arrives as a space
+        at = _parse_datetime(req.args.get('at', '').replace(' ', '+'))
+    except ValueError:
+        return https_fn.Response(json.dumps({"error": "at must be an ISO-8601 time"}), status=400, headers=headers)
+    if at is not None:
+        return https_fn.Response(json.dumps(_balance_at(db, at)), headers=headers)
+
+    doc = _balance_ref(db).get()
+    _maybe_snapshot(db, doc)
+    return https_fn.Response(json.dumps(_serialize_balance(doc.to_dict() or {})), headers=headers)
+
+
+def create_snapshot(req: https_fn.Request, headers: dict) -> https_fn.Response:
+    """Materializes a balance snapshot now (e.g. from a scheduler)."""
+    db = get_db()
+    doc = _balance_ref(db).get()
+    if not doc.exists:
+        return https_fn.Response(json.dumps({"error": "The bank has no transactions yet"}), status=404, headers=headers)
+    snapshot = take_snapshot(db, doc)
+    return https_fn.Response(json.dumps(_serialize_balance(snapshot, as_of=snapshot['as_of'])), status=201,
+                             headers=headers)
+
+
+def list_transactions(req: https_fn.Request, headers: dict) -> https_fn.Response:
+    """
+    Ledger entries, newest first, optionally within ?from= / ?to= (ISO-8601,
+    to exclusive) and for one ?member=. Paged with ?limit= and the opaque
+    X-Next-Cursor header passed back as ?cursor=.
+    """
+    try:
+        since = _parse_datetime(req.args.get('from'))
+        until = _parse_datetime(req.args.get('to'))
+        limit = int(req.args.get('limit', DEFAULT_HISTORY_LIMIT))
+        if not 0 < limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        cursor = req.args.get('cursor')
+        if cursor:
+            created_at, after_id = decode_time_cursor(cursor)
+    except (ValueError, TypeError) as e:
+        return https_fn.Response(json.dumps({"error": str(e) or "Invalid parameters"}), status=400, headers=headers)
+
+    query = get_db().collection(LedgerEntry.collection_name)
+    member = req.args.get('member')
+    if member:
+        query = query.where(filter=firestore.FieldFilter('member', '==', member))
+    if since:
+        query = query.where(filter=firestore.FieldFilter('created_at', '>=', since))
+    if until:
+        query = query.where(filter=firestore.FieldFilter('created_at', '<', until))
+    query = (query.order_by('created_at', direction=firestore.Query.DESCENDING)
+             .order_by('__name__', direction=firestore.Query.DESCENDING))
+    if cursor:
+        query = query.start_after({'created_at': created_at, '__name__': after_id})
+    docs = list(query.limit(limit).stream())
+
+    page_headers = {**headers, 'Access-Control-Expose-Headers': 'X-Next-Cursor'}
+    if len(docs) == limit:
+        last = docs[-1]
+        page_headers['X-Next-Cursor'] = encode_time_cursor(last.get('created_at'), last.id)
+    return https_fn.Response(json.dumps([_entry(doc).to_dict() for doc in docs]), headers=page_headers)
@@ -0,0 +1,75 @@
+from firebase_functions import https_fn
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .mvp import parse_duration, mvp_summary, upcoming_mvps
+from .user import count_members, load_profile
+from ..services import auth, metrics, serializer
+
+# Shared by all dashboard requests on this instance; bounds the number of
+# concurrent Firestore calls they make.
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv('DASHBOARD_WORKERS', '4')),
+                               thread_name_prefix='dashboard')
+
+
+def _run(sections):
+    """Runs [(name, fn, *args), ...] in order; returns [(name, result, error, seconds)]."""
+    results = []
+    for name, fn, *args in sections:
+        start = time.perf_counter()
+        try:
+            results.append((name, fn(*args), None, time.perf_counter() - start))
+        except Exception as e:
+            results.append((name, None, e, time.perf_counter() - start))
+    return results
+
+
+def get_dashboard(req: https_fn.Request, headers: dict) -> https_fn.Response:
+    """
+    Everything the home view needs in one round trip: MVP status counts,
+    upcoming respawns (?within=, default 30m), member count and, for a
+    signed-in caller (Authorization: Bearer), their own profile. Sections are fetched concurrently; a failing
+    section comes back as null with its message under "errors".
+    Per-section durations are reported in the Server-Timing header.
+    """
+    started = time.perf_counter()
+    try:
+        within = parse_duration(req.args.get('within', '30m'))
+    except ValueError as e:
+        return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
+
+    # One task per independent data source. Upcoming respawns read the MVP
+    # snapshot that the summary has just loaded, so they share a task.
+    tasks = [
+        [('mvps', mvp_summary), ('upcoming', upcoming_mvps, within)],
+        [('members', count_members)],
+    ]
+    uid = auth.current_uid()
+    if uid:
+        tasks.append([('profile', load_profile, uid)])
+
+    futures = [metrics.submit(_executor, _run, task) for task in tasks]
+    body = {'mvps': None, 'upcoming': None, 'members': None, 'profile': None}
+    errors = {}
+    timings = []
+    for future in futures:
+        for name, result, error, elapsed in future.result():
+            timings.append(f"{name};dur={elapsed * 1000:.1f}")
+            if error is not None:
+                print(f"Error loading dashboard section {name}: {error}")
+                errors[name] = str(error)
+            else:
+                body[name] = {'count': result} if name == 'members' else result
+    if errors:
+        body['errors'] = errors
+    timings.append(f"total;dur={(time.perf_counter() - started) * 1000:.1f}")
+
+    dashboard_headers = {
+        **headers,
+        'Server-Timing': ', '.join(timings),
+        # Lets the browser's performance API read Server-Timing cross-origin
+        'Timing-Allow-Origin': '*',
+        'Access-Control-Expose-Headers': 'Server-Timing',
+    }
+    return https_fn.Response(serializer.dumps(body), headers=dashboard_headers)
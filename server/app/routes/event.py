@@ -0,0 +1,187 @@
+from firebase_admin import firestore
+from firebase_functions import https_fn
+from google.api_core import exceptions
+import json
+import os
+from datetime import datetime, timezone
+from ..config.firebase import get_db
+from ..models.event import Event
+from ..models.mvp import _parse_datetime
+from ..services import auth
+from ..services.pagination import parse_list_params, query_page, page_response
+from ..services.sharded_counter import ShardedCounter
+
+# Counter shards per new event. Sign-ups for one event are spread over this
+# many documents, so a rush of sign-ups doesn't contend on a single one.
+EVENT_COUNTER_SHARDS = int(os.getenv('EVENT_COUNTER_SHARDS', '8'))
+DEFAULT_EVENT_LIMIT = 20
+MAX_EVENT_LIMIT = 100
+
+
+def _event(doc) -> Event:
+    return Event({**doc.to_dict(), 'id': doc.id})
+
+
+def _role_counts(event_ref, event: Event) -> ShardedCounter:
+    return ShardedCounter(event_ref, event.counter_shards or EVENT_COUNTER_SHARDS, 'role_counts')
+
+
+def _serialize_signup(doc) -> dict:
+    data = doc.to_dict()
+    data['uid'] = doc.id
+    if data.get('signed_up_at') and hasattr(data['signed_up_at'], 'isoformat'):
+        data['signed_up_at'] = data['signed_up_at'].isoformat()
+    return data
+
+
+def list_events(req: https_fn.Request, headers: dict) -> https_fn.Response:
+    """
+    Events starting at or after ?from= (ISO-8601, default now), soonest first,
+    each with its role fulfillment. ?limit= caps the count (default 20).
+    All counter shards are fetched in one get_all round trip.
+    """
+    try:
+        since = _parse_datetime(req.args.get('from')) or datetime.now(timezone.utc)
+        limit = int(req.args.get('limit', DEFAULT_EVENT_LIMIT))
+        if not 0 < limit <= MAX_EVENT_LIMIT:
+            raise ValueError(f"limit must be between 1 and {MAX_EVENT_LIMIT}")
+    except ValueError as e:
+        return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
+
+    db = get_db()
+    query = (db.collection('events')
+             .where(filter=firestore.FieldFilter('starts_at', '>=', since))
+             .order_by('starts_at')
+             .limit(limit))
+    docs = list(query.stream())
+    events = [_event(doc) for doc in docs]
+
+    refs = [ref for doc, event in zip(docs, events) for ref in _role_counts(doc.reference, event).refs()]
+    shards = {}
+    if refs:
+        # get_all returns in no particular order; group shards by event id (events/<id>/role_counts/<n>)
+        for snapshot in db.get_all(refs):
+            shards.setdefault(snapshot.reference.path.split('/')[1], []).append(snapshot)
+    body = [event.to_dict(filled=ShardedCounter.total(shards.get(event.id, []))) for event in events]
+    return https_fn.Response(json.dumps(body), headers=headers)
+
+
+def create_event(req: https_fn.Request, headers: dict) -> https_fn.Response:
+    """Body: {title, description?, starts_at, roles: [{name, needed}]}; created_by is the signed-in member."""
+    try:
+        data = req.get_json(silent=True)
+        if not isinstance(data, dict):
+            raise ValueError("Expected a JSON object")
+        event = Event({**data, 'created_by': auth.current_uid(), 'id': None, 'counter_shards': EVENT_COUNTER_SHARDS})
+        event.validate()
+    except ValueError as e:
+        return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
+
+    try:
+        _, doc_ref = get_db().collection('events').add(event.to_dict())
+        event.id = doc_ref.id
+        return https_fn.Response(json.dumps(event.to_dict(filled={})), status=201, headers=headers)
+    except Exception as e:
+        print(f"Error creating event: {e}")
+        return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
+
+
+def get_event(req: https_fn.Request, headers: dict, event_id: str) -> https_fn.Response:
+    """One event with role fulfillment: the event document plus its counter shards."""
+    db = get_db()
+    event_ref = db.collection('events').document(event_id)
+    doc = event_ref.get()
+    if not doc.exists:
+        return https_fn.Response(json.dumps({"error": "Event not found"}), status=404, headers=headers)
+
+    event = _event(doc)
+    filled = ShardedCounter.total(db.get_all(_role_counts(event_ref, event).refs()))
+    return https_fn.Response(json.dumps(event.to_dict(filled=filled)), headers=headers)
+
+
+def list_signups(req: https_fn.Request, headers: dict, event_id: str) -> https_fn.Response:
+    """Sign-ups of an event ordered by uid; supports ?fields= and ?limit=&cursor= paging."""
+    try:
+        params = parse_list_params(req)
+        signups = get_db().collection('events').document(event_id).collection('signups')
+        items, next_cursor = query_page(signups, params, _serialize_signup)
+    except ValueError as e:
+        return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
+    return page_response(headers, items, next_cursor)
+
+
+def signup(req: https_fn.Request, headers: dict, event_id: str) -> https_fn.Response:
+    """
+    Signs the signed-in member up for one role. Body: {role, uid?, display_name?};
+    a uid other than the token's is refused.
+
+    One batch creates events/<id>/signups/<uid> and increments the role on a
+    random counter shard. create() fails on an existing sign-up, which fails
+    the whole batch, so a retried request is never counted twice: it answers
+    200 if the member already has this role, 409 if they have another.
+    Roles are not capped at `needed`; fulfillment shows any overflow.
+    """
+    data = req.get_json(silent=True) or {}
+    uid, role = auth.current_uid(), data.get('role')
+    if data.get('uid') not in (None, uid):
+        return https_fn.Response(json.dumps({"error": "Cannot sign up another member"}), status=403, headers=headers)
+    if not isinstance(role, str) or not role:
+        return https_fn.Response(json.dumps({"error": "role is required"}), status=400, headers=headers)
+
+    db = get_db()
+    event_ref = db.collection('events').document(event_id)
+    doc = event_ref.get()
+    if not doc.exists:
+        return https_fn.Response(json.dumps({"error": "Event not found"}), status=404, headers=headers)
+    event = _event(doc)
+    if not event.has_role(role):
+        return https_fn.Response(json.dumps({"error": f"Unknown role: {role}"}), status=400, headers=headers)
+
+    signup_ref = event_ref.collection('signups').document(uid)
+    record = {'role': role, 'display_name': data.get('display_name'), 'signed_up_at': firestore.SERVER_TIMESTAMP}
+    batch = db.batch()
+    batch.create(signup_ref, record)
+    _role_counts(event_ref, event).increment(batch, role)
+    try:
+        batch.commit()
+    except exceptions.AlreadyExists:
+        existing = signup_ref.get()
+        if existing.exists and existing.get('role') == role:
+            return https_fn.Response(json.dumps(_serialize_signup(existing)), headers=headers)
+        current = existing.get('role') if existing.exists else None
+        return https_fn.Response(json.dumps({"error": f"Already signed up as {current}"}), status=409, headers=headers)
+    except Exception as e:
+        print(f"Error signing {uid} up for event {event_id}: {e}")
+        return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
+
+    return https_fn.Response(json.dumps({'uid': uid, 'role': role, 'display_name': record['display_name']}),
+                             status=201, headers=headers)
+
+
+def cancel_signup(req: https_fn.Request, headers: dict, event_id: str, uid: str) -> https_fn.Response:
+    """
+    Withdraws a sign-up and decrements its role in the same batch. The delete
+    is conditional on the sign-up being unchanged since it was read, so a
+    concurrent cancel or re-sign-up can't make the counters drift.
+    """
+    db = get_db()
+    event_ref = db.collection('events').document(event_id)
+    signup_ref = event_ref.collection('signups').document(uid)
+    docs = {doc.reference.path: doc for doc in db.get_all([event_ref, signup_ref])}
+    event_doc, signup_doc = docs.get(event_ref.path), docs.get(signup_ref.path)
+    if event_doc is None or not event_doc.exists or signup_doc is None or not signup_doc.exists:
+        return https_fn.Response(json.dumps({"error": "Sign-up not found"}), status=404, headers=headers)
+
+    batch = db.batch()
+    batch.delete(signup_ref, option=db.write_option(last_update_time=signup_doc.update_time))
+    _role_counts(event_ref, _event(event_doc)).increment(batch, signup_doc.get('role'), -1)
+    try:
+        batch.commit()
+    except (exceptions.FailedPrecondition, exceptions.NotFound):
+        return https_fn.Response(json.dumps({"error": "Sign-up changed concurrently; retry"}), status=409,
+                                 headers=headers)
+    except Exception as e:
+        print(f"Error cancelling {uid} for event {event_id}: {e}")
+        return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
+
+    return https_fn.Response(json.dumps({"success": True}), headers=headers)
@@ -0,0 +1,188 @@
+from firebase_admin import firestore
+from firebase_functions import https_fn
+from google.api_core import exceptions
+import json
+from datetime import datetime, timezone
+from ..config.firebase import get_db
+from ..models.loan import Loan
+from ..services.pagination import MAX_PAGE_SIZE, encode_time_cursor, decode_time_cursor
+
+DEFAULT_LOAN_LIMIT = 50
+# Fields PUT /loans/<id> may change; the rest are fixed when the item is lent
+_UPDATABLE = ('status', 'due_at', 'fee', 'fee_status', 'notes')
+
+# Every list below is one indexed query (see firestore.indexes.json), never a
+# scan of the loan history: loans pile up for months, the open ones don't.
+
+
+def _loan(doc) -> Loan:
+    return Loan({**doc.to_dict(), 'id': doc.id})
+
+
+def _page_params(req: https_fn.Request):
+    """(limit, cursor) from ?limit=&cursor=; the cursor is the (value, id) of the last loan seen."""
+    limit = int(req.args.get('limit', DEFAULT_LOAN_LIMIT))
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    cursor = req.args.get('cursor')
+    if cursor:
+        cursor = decode_time_cursor(cursor)
+    return limit, cursor
+
+
+def _page(query, field: str, direction: str, limit: int, cursor, headers: dict) -> https_fn.Response:
+    """Runs `query` ordered by `field` (ties broken by id) and answers one page, X-Next-Cursor included."""
+    query = query.order_by(field, direction=direction).order_by('__name__', direction=direction)
+    if cursor:
+        query = query.start_after({field: cursor[0], '__name__': cursor[1]})
+    docs = list(query.limit(limit).stream())
+
+    page_headers = {**headers, 'Access-Control-Expose-Headers': 'X-Next-Cursor'}
+    if len(docs) == limit:
+        last = docs[-1]
+        page_headers['X-Next-Cursor'] = encode_time_cursor(last.get(field), last.id)
+    return https_fn.Response(json.dumps([_loan(doc).to_dict(for_response=True) for doc in docs]),
+                             headers=page_headers)
+
+
+def list_loans(req: https_fn.Request, headers: dict) -> https_fn.Response:
+    """Loan history, newest first, optionally for one ?borrower= (uid). Paged with ?limit=&cursor=."""
+    try:
+        limit, cursor = _page_params(req)
+    except (ValueError, TypeError) as e:
+        return https_fn.Response(json.dumps({"error": str(e) or "Invalid parameters"}), status=400, headers=headers)
+
+    query = get_db().collection(Loan.collection_name)
+    borrower = req.args.get('borrower')
+    if borrower:
+        query = query.where(filter=firestore.FieldFilter('borrower', '==', borrower))
+    return _page(query, 'borrowed_at', firestore.Query.DESCENDING, limit, cursor, headers)
+
+
+def list_out(req: https_fn.Request, headers: dict) -> https_fn.Response:
+    """Items currently out, most recently lent first."""
+    try:
+        limit, cursor = _page_params(req)
+    except (ValueError, TypeError) as e:
+        return https_fn.Response(json.dumps({"error": str(e) or "Invalid parameters"}), status=400, headers=headers)
+
+    query = get_db().collection(Loan.collection_name).where(filter=firestore.FieldFilter('status', '==', 'out'))
+    return _page(query, 'borrowed_at', firestore.Query.DESCENDING, limit, cursor, headers)
+
+
+def list_overdue(req: https_fn.Request, headers: dict) -> https_fn.Response:
+    """Items still out past their due date, longest overdue first. Loans without a due date never show up."""
+    try:
+        limit, cursor = _page_params(req)
+    except (ValueError, TypeError) as e:
+        return https_fn.Response(json.dumps({"error": str(e) or "Invalid parameters"}), status=400, headers=headers)
+
+    query = (get_db().collection(Loan.collection_name)
+             .where(filter=firestore.FieldFilter('status', '==', 'out'))
+             .where(filter=firestore.FieldFilter('due_at', '<', datetime.now(timezone.utc))))
+    return _page(query, 'due_at', firestore.Query.ASCENDING, limit, cursor, headers)
+
+
+def list_unpaid(req: https_fn.Request, headers: dict) -> https_fn.Response:
+    """
+    Unpaid fees grouped by member, with each member's total and loans
+    (newest first). ?member= (uid) narrows it to one borrower.
+    """
+    query = (get_db().collection(Loan.collection_name)
+             .where(filter=firestore.FieldFilter('fee_status', '==', 'unpaid')))
+    member = req.args.get('member')
+    if member:
+        query = query.where(filter=firestore.FieldFilter('borrower', '==', member))
+    else:
+        query = query.order_by('borrower')
+    query = query.order_by('borrowed_at', direction=firestore.Query.DESCENDING)
+
+    members = {}
+    for doc in query.stream():
+        loan = _loan(doc)
+        group = members.setdefault(loan.borrower, {
+            'borrower': loan.borrower, 'borrower_name': loan.borrower_name, 'total': 0, 'loans': []})
+        group['total'] += loan.fee
+        group['loans'].append(loan.to_dict(for_response=True))
+    body = {'total': sum(group['total'] for group in members.values()), 'members': list(members.values())}
+    return https_fn.Response(json.dumps(body), headers=headers)
+
+
+def create_loan(req: https_fn.Request, headers: dict) -> https_fn.Response:
+    """Body: {item_name, item_id?, borrower, borrower_name?, borrowed_at?, due_at?, fee?, notes?}"""
+    try:
+        data = req.get_json(silent=True)
+        if not isinstance(data, dict):
+            raise ValueError("Expected a JSON object")
+        loan = Loan({**data, 'id': None, 'status': 'out', 'returned_at': None, 'fee_status': None,
+                     'borrowed_at': data.get('borrowed_at') or datetime.now(timezone.utc)})
+        loan.validate()
+    except ValueError as e:
+        return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
+
+    try:
+        _, doc_ref = get_db().collection(Loan.collection_name).add(loan.to_dict())
+        loan.id = doc_ref.id
+        return https_fn.Response(json.dumps(loan.to_dict(for_response=True)), status=201, headers=headers)
+    except Exception as e:
+        print(f"Error creating loan: {e}")
+        return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
+
+
+def get_loan(req: https_fn.Request, headers: dict, loan_id: str) -> https_fn.Response:
+    doc = get_db().collection(Loan.collection_name).document(loan_id).get()
+    if not doc.exists:
+        return https_fn.Response(json.dumps({"error": "Loan not found"}), status=404, headers=headers)
+    return https_fn.Response(json.dumps(_loan(doc).to_dict(for_response=True)), headers=headers)
+
+
+def update_loan(req: https_fn.Request, headers: dict, loan_id: str) -> https_fn.Response:
+    """
+    Body: any of {status: 'returned', due_at, fee, fee_status, notes}.
+    Returning an item stamps returned_at. The write is conditional on the
+    loan being unchanged since it was read, so two officers settling the
+    same loan at once get a 409 instead of overwriting each other.
+    """
+    data = req.get_json(silent=True)
+    if not isinstance(data, dict):
+        return https_fn.Response(json.dumps({"error": "Expected a JSON object"}), status=400, headers=headers)
+    changes = {key: value for key, value in data.items() if key in _UPDATABLE}
+    if not changes:
+        return https_fn.Response(json.dumps({"error": f"Nothing to update; accepted: {', '.join(_UPDATABLE)}"}),
+                                 status=400, headers=headers)
+
+    db = get_db()
+    doc_ref = db.collection(Loan.collection_name).document(loan_id)
+    doc = doc_ref.get()
+    if not doc.exists:
+        return https_fn.Response(json.dumps({"error": "Loan not found"}), status=404, headers=headers)
+
+    current = _loan(doc)
+    if 'fee' in changes and 'fee_status' not in changes:
+        # A new fee on a free loan (or a fee dropped to 0) moves the fee status with it
+        if not changes['fee']:
+            changes['fee_status'] = 'none'
+        elif current.fee_status == 'none':
+            changes['fee_status'] = 'unpaid'
+    try:
+        if changes.get('status', current.status) != current.status:
+            if current.status == 'returned':
+                raise ValueError("A returned loan can't be reopened")
+            changes['returned_at'] = datetime.now(timezone.utc)
+        loan = Loan({**current.to_dict(), **changes, 'id': loan_id})
+        loan.validate()
+    except ValueError as e:
+        return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
+
+    stored = loan.to_dict()
+    try:
+        doc_ref.update({key: stored[key] for key in changes},
+                       option=db.write_option(last_update_time=doc.update_time))
+    except (exceptions.FailedPrecondition, exceptions.NotFound):
+        return https_fn.Response(json.dumps({"error": "Loan changed concurrently; retry"}), status=409,
+                                 headers=headers)
+    except Exception as e:
+        print(f"Error updating loan {loan_id}: {e}")
+        return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
+
+    return https_fn.Response(json.dumps(loan.to_dict(for_response=True)), headers=headers)
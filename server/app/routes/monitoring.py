@@ -0,0 +1,26 @@
+from firebase_functions import https_fn
+import hmac
+import json
+import os
+from ..services import metrics
+
+
+def get_metrics(req: https_fn.Request, headers: dict) -> https_fn.Response:
+    """
+    Request and Firestore metrics of this instance in Prometheus text format.
+    Requires `Authorization: Bearer <METRICS_TOKEN>`. Without METRICS_TOKEN
+    the endpoint is off, except against the Firestore emulator (local runs).
+    """
+    token = os.getenv('METRICS_TOKEN')
+    if not token:
+        if not os.getenv('FIRESTORE_EMULATOR_HOST'):
+            return https_fn.Response(json.dumps({"error": "Metrics are disabled (METRICS_TOKEN is not set)"}),
+                                     status=403, headers=headers)
+    elif not hmac.compare_digest(req.headers.get('Authorization', ''), f"Bearer {token}"):
+        return https_fn.Response(json.dumps({"error": "Unauthorized"}), status=401, headers=headers)
+
+    return https_fn.Response(metrics.render(), headers={
+        **headers,
+        'Content-Type': 'text/plain; version=0.0.4; charset=utf-8',
+        'Cache-Control': 'no-store',
+    })
@@ -0,0 +1,129 @@
+from firebase_functions import https_fn
+import json
+from ..services.monster_db import SORT_KEYS, get_monster_db
+from ..services.monster_index import get_monster_index
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+
+def _int_arg(req: https_fn.Request, name: str, default=None, minimum=None, maximum=None):
+    value = req.args.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+    if minimum is not None and value < minimum:
+        raise ValueError(f"{name} must be at least {minimum}")
+    if maximum is not None and value > maximum:
+        raise ValueError(f"{name} must be at most {maximum}")
+    return value
+
+
+def _bool_arg(req: https_fn.Request, name: str) -> bool:
+    return req.args.get(name, '').lower() in ('1', 'true', 'yes')
+
+
+def _list_arg(req: https_fn.Request, name: str) -> list:
+    """Accepts ?race=Brute&race=Plant as well as ?race=Brute,Plant"""
+    return [value.strip() for values in req.args.getlist(name) for value in values.split(',') if value.strip()]
+
+
+def search_monsters(req: https_fn.Request, headers: dict) -> https_fn.Response:
+    """
+    Searches the monster database.
+    Query: q, race, element, size, mvp, hide_dummies, hide_zero_exp,
+    min_level, max_level, min_hp, max_hp, sort, order (asc|desc), page, page_size.
+    """
+    try:
+        sort = req.args.get('sort', 'level')
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of: {', '.join(SORT_KEYS)}")
+        order = req.args.get('order', 'asc')
+        if order not in ('asc', 'desc'):
+            raise ValueError("order must be asc or desc")
+        page = _int_arg(req, 'page', 1, minimum=1)
+        page_size = _int_arg(req, 'page_size', DEFAULT_PAGE_SIZE, minimum=1, maximum=MAX_PAGE_SIZE)
+        filters = {
+            'q': req.args.get('q', '').strip(),
+            'race': _list_arg(req, 'race'),
+            'element': _list_arg(req, 'element'),
+            'size': _list_arg(req, 'size'),
+            'mvp': _bool_arg(req, 'mvp'),
+            'hide_dummies': _bool_arg(req, 'hide_dummies'),
+            'hide_zero_exp': _bool_arg(req, 'hide_zero_exp'),
+            'min_level': _int_arg(req, 'min_level'),
+            'max_level': _int_arg(req, 'max_level'),
+            'min_hp': _int_arg(req, 'min_hp'),
+            'max_hp': _int_arg(req, 'max_hp'),
+        }
+    except ValueError as e:
+        return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
+
+    try:
+        db = get_monster_db()
+        total, items = db.query(sort=sort, descending=order == 'desc',
+                                offset=(page - 1) * page_size, limit=page_size, **filters)
+        body = {
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "items": items,
+            "facets": db.facets(),
+        }
+        return https_fn.Response(json.dumps(body), headers=headers)
+    except Exception as e:
+        print(f"Error searching monsters: {e}")
+        return https_fn.Response(json.dumps({"error": str(e)}), status=500, headers=headers)
+
+
+def get_monster(req: https_fn.Request, headers: dict, monster_id: int) -> https_fn.Response:
+    """
+    Full record for one monster (stats, drops, skills, maps...).
+    """
+    try:
+        body = get_monster_db().detail_json(monster_id)
+        if body is None:
+            return https_fn.Response(json.dumps({"error": "Monster not found"}), status=404, headers=headers)
+        return https_fn.Response(body, headers=headers)
+    except Exception as e:
+        print(f"Error fetching monster {monster_id}: {e}")
+        return https_fn.Response(json.dumps({"error": str(e)}), status=500, headers=headers)
+
+
+def get_item_droppers(req: https_fn.Request, headers: dict, item_id: int) -> https_fn.Response:
+    """
+    Monsters that drop an item, highest drop chance first. Optional ?limit=N.
+    """
+    try:
+        limit = _int_arg(req, 'limit', minimum=1)
+    except ValueError as e:
+        return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
+    try:
+        result = get_monster_index().droppers(item_id, limit)
+        if result is None:
+            return https_fn.Response(json.dumps({"error": "Item not found"}), status=404, headers=headers)
+        return https_fn.Response(json.dumps(result), headers=headers)
+    except Exception as e:
+        print(f"Error fetching droppers of item {item_id}: {e}")
+        return https_fn.Response(json.dumps({"error": str(e)}), status=500, headers=headers)
+
+
+def get_map_monsters(req: https_fn.Request, headers: dict, map_code: str) -> https_fn.Response:
+    """
+    Monsters spawning on a map, largest spawn count first. Optional ?limit=N.
+    """
+    try:
+        limit = _int_arg(req, 'limit', minimum=1)
+    except ValueError as e:
+        return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
+    try:
+        result = get_monster_index().map_monsters(map_code, limit)
+        if result is None:
+            return https_fn.Response(json.dumps({"error": "Map not found"}), status=404, headers=headers)
+        return https_fn.Response(json.dumps(result), headers=headers)
+    except Exception as e:
+        print(f"Error fetching monsters of map {map_code}: {e}")
+        return https_fn.Response(json.dumps({"error": str(e)}), status=500, headers=headers)
@@ -1,73 +1,458 @@
 from firebase_admin import firestore
 from firebase_functions import https_fn
 import json
-from datetime import datetime
+import re
+from datetime import datetime, timedelta, timezone
+from ..config.firebase import get_db
+from ..models.kill_stats import KillStats
+from ..models.mvp import Mvp, _parse_datetime
+from ..services.snapshot_cache import SnapshotCache
+from ..services.http_cache import etag_response
+from ..services.respawn_schedule import RespawnSchedule
+from ..services.event_stream import EventBroadcaster, SubscriberLimitReached
+from ..services.pagination import (MAX_PAGE_SIZE, parse_list_params, query_page, page_response,
+                                   encode_time_cursor, decode_time_cursor)
+from ..services import auth, kill_log, serializer
+
+# Firestore rejects batches with more than 500 writes
+MAX_BATCH_WRITES = 500
+
+# Dead locations ordered by respawn window start, for /mvps/upcoming
+# and for reviving locations whose window has closed.
+mvp_schedule = RespawnSchedule()
+
+
+def _respawn_window(data: dict):
+    mvp = Mvp(data)
+    if mvp.status == 'dead' and mvp.respawn_window_start and mvp.respawn_window_end:
+        return mvp.respawn_window_start, mvp.respawn_window_end
+    return None
+
+
+def _rebuild_schedule(docs: dict) -> None:
+    windows = {}
+    for mvp_id, data in docs.items():
+        window = _respawn_window(data)
+        if window:
+            windows[mvp_id] = window
+    mvp_schedule.rebuild(windows)
+
+
+# Live per-location deltas for /mvps/stream, fed by the write path below
+mvp_events = EventBroadcaster()
+
+DELTA_FIELDS = ('status', 'last_killed', 'respawn_at', 'respawn_window_start', 'respawn_window_end')
+
+
+def _publish(mvp_id: str, data: dict) -> None:
+    mvp_events.publish('mvp', {'id': mvp_id, **{f: data.get(f) for f in DELTA_FIELDS}})
+
+
+# Module-level snapshot of the 'mvps' collection, shared by every request
+# handled by this instance. Kept current by create_mvp / update_mvp.
+mvp_cache = SnapshotCache('mvps', on_reload=_rebuild_schedule)
+
+
+def _store(mvp_id: str, data: dict) -> None:
+    """Write-through of one serialized MVP into the snapshot and the schedule, and out to subscribers."""
+    mvp_cache.put(mvp_id, data)
+    _publish(mvp_id, data)
+    window = _respawn_window(data)
+    if window:
+        mvp_schedule.update(mvp_id, *window)
+    else:
+        mvp_schedule.remove(mvp_id)
+
+
+def _serialize(doc) -> dict:
+    # Timestamps stay datetimes; services/serializer.py encodes them
+    data = doc.to_dict()
+    data['id'] = doc.id
+    return data
+
+
+def _load_mvps() -> dict:
+    db = get_db()
+    return {doc.id: _serialize(doc) for doc in db.collection('mvps').stream()}
+
+
+def _revive_expired() -> bool:
+    """
+    Flips every dead MVP whose respawn window has closed back to 'alive'.
+
+    The candidates come from this instance's schedule, which may be behind
+    a kill recorded by another instance, so they are re-read first: only
+    locations still dead with a closed window are flipped, each write
+    conditional on the document being unchanged since that read. All flips
+    go out in one batched commit. Returns True if anything changed.
+    """
+    now = datetime.now(timezone.utc)
+    expired = mvp_schedule.pop_expired(now)
+    if not expired:
+        return False
+
+    db = get_db()
+    revive = []
+    try:
+        for doc in db.get_all([db.collection('mvps').document(mvp_id) for mvp_id in expired]):
+            if not doc.exists:
+                continue
+            data = _serialize(doc)
+            window = _respawn_window(data)
+            if window and window[1] <= now:
+                revive.append((doc, data))
+            else:
+                # Changed elsewhere (e.g. killed again): take the current state
+                _store(doc.id, data)
+        for i in range(0, len(revive), MAX_BATCH_WRITES):
+            batch = db.batch()
+            for doc, _ in revive[i:i + MAX_BATCH_WRITES]:
+                batch.update(doc.reference, {'status': 'alive'},
+                             option=db.write_option(last_update_time=doc.update_time))
+            batch.commit()
+    except Exception as e:
+        # e.g. a location was written between the read and the flip; reload everything next time
+        print(f"Error reviving MVPs {expired}: {e}")
+        mvp_cache.invalidate()
+        return True
+
+    for doc, data in revive:
+        _store(doc.id, {**data, 'status': 'alive'})
+    return True
+
+
+_DURATION_RE = re.compile(r'^(\d+)([smhd]?)$')
+_DURATION_UNITS = {'s': 'seconds', 'm': 'minutes', 'h': 'hours', 'd': 'days'}
+
+
+def parse_duration(value: str) -> timedelta:
+    """Parses '30m', '2h', '90s' or a bare number of minutes."""
+    match = _DURATION_RE.match(value.strip())
+    if not match:
+        raise ValueError(f"Invalid duration: {value}")
+    amount, unit = match.groups()
+    return timedelta(**{_DURATION_UNITS[unit or 'm']: int(amount)})
+
+
+def upcoming_mvps(within: timedelta) -> list:
+    """Dead MVPs whose respawn window opens within `within` (or is open), soonest first."""
+    # Make sure the snapshot (and with it the schedule) is loaded
+    mvp_cache.get_all(_load_mvps)
+    _revive_expired()
+
+    now = datetime.now(timezone.utc)
+    upcoming = []
+    for mvp_id, start, end in mvp_schedule.upcoming(now, now + within):
+        data = mvp_cache.get(mvp_id) or {}
+        upcoming.append({
+            'id': mvp_id,
+            'mob_id': data.get('mob_id'),
+            'name': data.get('name'),
+            'map_name': data.get('map_name'),
+            'respawn_window_start': start.isoformat(),
+            'respawn_window_end': end.isoformat(),
+        })
+    return upcoming
+
+
+def mvp_summary() -> dict:
+    """Location counts by status, from the snapshot."""
+    mvps = mvp_cache.get_all(_load_mvps)
+    if _revive_expired():
+        mvps = mvp_cache.get_all(_load_mvps)
+    counts = {}
+    for data in mvps:
+        status = data.get('status') or 'unknown'
+        counts[status] = counts.get(status, 0) + 1
+    return {'total': len(mvps), 'by_status': counts}
+
 
 def get_all_mvps(req: https_fn.Request, headers: dict) -> https_fn.Response:
-    db = firestore.client()
-    docs = db.collection('mvps').stream()
-    mvps = []
-    for doc in docs:
-        data = doc.to_dict()
-        data['id'] = doc.id
-        # Serialize datetime objects
-        if 'last_killed' in data and data['last_killed'] and hasattr(data['last_killed'], 'isoformat'):
-            data['last_killed'] = data['last_killed'].isoformat()
-        if 'respawn_at' in data and data['respawn_at'] and hasattr(data['respawn_at'], 'isoformat'):
-            data['respawn_at'] = data['respawn_at'].isoformat()
-        mvps.append(data)
-    return https_fn.Response(json.dumps(mvps), headers=headers)
+    """
+    Full list from the snapshot cache, or with ?fields= / ?limit=&cursor=
+    a projected page straight from Firestore.
+    """
+    try:
+        params = parse_list_params(req)
+        if not params.is_default:
+            items, next_cursor = query_page(get_db().collection('mvps'), params, _serialize)
+            return page_response(headers, items, next_cursor)
+    except ValueError as e:
+        return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
+
+    body, etag = mvp_cache.get_body(_load_mvps)
+    if _revive_expired():
+        body, etag = mvp_cache.get_body(_load_mvps)
+    return etag_response(req, headers, body, etag)
+
+def get_upcoming_mvps(req: https_fn.Request, headers: dict) -> https_fn.Response:
+    """
+    Lists dead MVPs whose respawn window opens within `?within=` (default 30m),
+    including those already inside their window, soonest first.
+    """
+    try:
+        within = parse_duration(req.args.get('within', '30m'))
+    except ValueError as e:
+        return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
+
+    upcoming = upcoming_mvps(within)
+    return https_fn.Response(json.dumps(upcoming), headers=headers)
+
+def stream_mvps(req: https_fn.Request, headers: dict) -> https_fn.Response:
+    """
+    Server-sent events: one 'mvp' event per location change (id, status and
+    respawn window). Reconnects resume from the Last-Event-ID header.
+    """
+    last_event_id = req.headers.get('Last-Event-ID') or req.args.get('lastEventId')
+    try:
+        stream = mvp_events.subscribe(last_event_id)
+    except SubscriberLimitReached:
+        return https_fn.Response(json.dumps({"error": "Too many subscribers"}), status=503,
+                                 headers={**headers, 'Retry-After': '30'})
+
+    stream_headers = {
+        **headers,
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        # Tell nginx not to buffer the stream
+        'X-Accel-Buffering': 'no',
+    }
+    return https_fn.Response(stream, headers=stream_headers)
 
 def create_mvp(req: https_fn.Request, headers: dict) -> https_fn.Response:
-    db = firestore.client()
+    db = get_db()
     try:
         data = req.get_json()
         update_time, doc_ref = db.collection('mvps').add(data)
         data['id'] = doc_ref.id
-        return https_fn.Response(json.dumps(data), status=201, headers=headers)
+        _store(doc_ref.id, data)
+        return https_fn.Response(serializer.dumps(data), status=201, headers=headers)
     except Exception as e:
         return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
 
 def get_mvp(req: https_fn.Request, headers: dict, mvp_id: str) -> https_fn.Response:
-    db = firestore.client()
+    db = get_db()
     doc_ref = db.collection('mvps').document(mvp_id)
     doc = doc_ref.get()
     if not doc.exists:
         return https_fn.Response(json.dumps({"error": "MVP not found"}), status=404, headers=headers)
-    
-    data = doc.to_dict()
-    data['id'] = doc.id
-    # Serialize datetime
-    if 'last_killed' in data and data['last_killed'] and hasattr(data['last_killed'], 'isoformat'):
-        data['last_killed'] = data['last_killed'].isoformat()
-    if 'respawn_at' in data and data['respawn_at'] and hasattr(data['respawn_at'], 'isoformat'):
-        data['respawn_at'] = data['respawn_at'].isoformat()
-        
-    return https_fn.Response(json.dumps(data), headers=headers)
+
+    return https_fn.Response(serializer.dumps(_serialize(doc)), headers=headers)
+
+def _current(db, mvp_ids) -> dict:
+    """
+    Current serialized documents for `mvp_ids`, from the snapshot when fresh.
+    Anything not cached is fetched in a single get_all round trip.
+    Ids that don't exist are left out.
+    """
+    current = {}
+    missing = []
+    for mvp_id in mvp_ids:
+        data = mvp_cache.get(mvp_id)
+        if data is not None:
+            current[mvp_id] = data
+        else:
+            missing.append(mvp_id)
+    if missing:
+        refs = [db.collection('mvps').document(mvp_id) for mvp_id in missing]
+        for doc in db.get_all(refs):
+            if doc.exists:
+                current[doc.id] = _serialize(doc)
+    return current
+
+
+def _merge(data: dict, patch: dict) -> dict:
+    """`data` with `patch` applied the way set(merge=True) applies it: non-empty nested maps merge key by key."""
+    merged = dict(data)
+    for key, value in patch.items():
+        if isinstance(value, dict) and value and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _commit_patches(db, pending: list) -> None:
+    batch = db.batch()
+    for _, mvp_id, patch in pending:
+        batch.set(db.collection('mvps').document(mvp_id), patch, merge=True)
+    batch.commit()
+
+
+def _apply_patches(items: list) -> list:
+    """
+    Applies [{id, patch}, ...] in one WriteBatch commit per 500 items,
+    merged like PUT always did (set(merge=True): nested maps merge key by key).
+
+    Existence and the respawn window inputs come from the snapshot, and the
+    response is the snapshot merged with the patch, so there is no read
+    before or after the write on a warm cache. If a batch fails, its items
+    are retried one at a time so only the failing ones report a 409.
+    Kill reports (status 'dead') are appended to the kill log once their
+    batch has committed, credited to the signed-in member.
+    Returns one {id, status, mvp | error} result per item, in order.
+    """
+    db = get_db()
+    results = [None] * len(items)
+    current = _current(db, {item['id'] for item in items if isinstance(item, dict) and item.get('id')})
+
+    pending = []
+    # item index -> uid that reported the kill (or None)
+    kills = {}
+    for i, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get('id') or not isinstance(item.get('patch'), dict):
+            results[i] = {'id': item.get('id') if isinstance(item, dict) else None,
+                          'status': 400, 'error': "Expected {id, patch}"}
+            continue
+        mvp_id, patch = item['id'], dict(item['patch'])
+        if mvp_id not in current:
+            results[i] = {'id': mvp_id, 'status': 404, 'error': "MVP not found"}
+            continue
+        try:
+            # Kill report: compute the respawn window server-side.
+            # An optional 'killed_at' (ISO-8601) backdates the kill.
+            if patch.get('status') == 'dead':
+                killed_at = patch.pop('killed_at', None)
+                # The reporter is whoever's token authorized the request, not a body field
+                patch.pop('reported_by', None)
+                kills[i] = auth.current_uid()
+                patch.update(Mvp(current[mvp_id]).report_kill(killed_at))
+        except ValueError as e:
+            results[i] = {'id': mvp_id, 'status': 400, 'error': str(e)}
+            continue
+        patch.pop('id', None)
+        pending.append((i, mvp_id, patch))
+
+    for start in range(0, len(pending), MAX_BATCH_WRITES):
+        chunk = pending[start:start + MAX_BATCH_WRITES]
+        try:
+            _commit_patches(db, chunk)
+        except Exception as e:
+            print(f"Error applying MVP batch, retrying its items one by one: {e}")
+            # The snapshot may disagree with Firestore; reload it next time
+            mvp_cache.invalidate()
+            committed = []
+            for pending_item in chunk:
+                try:
+                    _commit_patches(db, [pending_item])
+                except Exception as item_error:
+                    i, mvp_id, _ = pending_item
+                    results[i] = {'id': mvp_id, 'status': 409, 'error': str(item_error)}
+                    continue
+                committed.append(pending_item)
+            chunk = committed
+        for i, mvp_id, patch in chunk:
+            updated_data = _merge(current[mvp_id], patch)
+            current[mvp_id] = updated_data
+            _store(mvp_id, updated_data)
+            results[i] = {'id': mvp_id, 'status': 200, 'mvp': updated_data}
+            if i in kills:
+                _log(db, mvp_id, 'kill', patch['last_killed'], kills[i], updated_data)
+    return results
+
+
+def _log(db, mvp_id: str, kind: str, at: datetime, member, mvp: dict) -> None:
+    """Kill log append for a location update that has already been written; a failure is only logged."""
+    try:
+        kill_log.record(db, mvp_id, kind, at, member, mvp)
+    except Exception as e:
+        print(f"Error logging {kind} of MVP {mvp_id}: {e}")
+
 
 def update_mvp(req: https_fn.Request, headers: dict, mvp_id: str) -> https_fn.Response:
-    db = firestore.client()
     try:
         data = req.get_json()
-        doc_ref = db.collection('mvps').document(mvp_id)
-        
-        # Check existence
-        if not doc_ref.get().exists:
-            return https_fn.Response(json.dumps({"error": "MVP not found"}), status=404, headers=headers)
-        
-        doc_ref.set(data, merge=True)
-        
-        # Return updated
-        updated_doc = doc_ref.get()
-        updated_data = updated_doc.to_dict()
-        updated_data['id'] = updated_doc.id
-        # Serialize
-        if 'last_killed' in updated_data and updated_data['last_killed'] and hasattr(updated_data['last_killed'], 'isoformat'):
-            updated_data['last_killed'] = updated_data['last_killed'].isoformat()
-        if 'respawn_at' in updated_data and updated_data['respawn_at'] and hasattr(updated_data['respawn_at'], 'isoformat'):
-            updated_data['respawn_at'] = updated_data['respawn_at'].isoformat()
-            
-        return https_fn.Response(json.dumps(updated_data), headers=headers)
+        result = _apply_patches([{'id': mvp_id, 'patch': data}])[0]
+        if result['status'] != 200:
+            return https_fn.Response(json.dumps({"error": result['error']}), status=result['status'], headers=headers)
+
+        return https_fn.Response(serializer.dumps(result['mvp']), headers=headers)
+    except Exception as e:
+        return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
+
+def update_mvps_batch(req: https_fn.Request, headers: dict) -> https_fn.Response:
+    """
+    Applies several MVP updates (e.g. a burst of kill reports) in one round trip.
+    Body: [{"id": ..., "patch": {...}}, ...] (or {"items": [...]}).
+    Returns per-item results; the request itself succeeds even if some items fail.
+    """
+    try:
+        data = req.get_json()
+        items = data.get('items') if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            return https_fn.Response(json.dumps({"error": "Expected a list of {id, patch}"}), status=400, headers=headers)
+
+        results = _apply_patches(items)
+        return https_fn.Response(serializer.dumps({"results": results}), headers=headers)
+    except Exception as e:
+        return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
+
+
+def report_sighting(req: https_fn.Request, headers: dict, mvp_id: str) -> https_fn.Response:
+    """
+    Logs the MVP seen alive, reported by the signed-in member. Body: {seen_at?: ISO-8601 (default now)}.
+    The first sighting after a kill measures the respawn interval.
+    """
+    data = req.get_json(silent=True) or {}
+    try:
+        seen_at = _parse_datetime(data.get('seen_at')) or datetime.now(timezone.utc)
+    except (ValueError, TypeError):
+        return https_fn.Response(json.dumps({"error": "seen_at must be ISO-8601"}), status=400, headers=headers)
+
+    db = get_db()
+    if mvp_id not in _current(db, [mvp_id]):
+        return https_fn.Response(json.dumps({"error": "MVP not found"}), status=404, headers=headers)
+    try:
+        _, entry = kill_log.record(db, mvp_id, 'sighting', seen_at, auth.current_uid())
     except Exception as e:
+        print(f"Error logging sighting of MVP {mvp_id}: {e}")
         return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
+    entry.pop('recorded_at')
+    return https_fn.Response(serializer.dumps(entry), status=201, headers=headers)
+
+
+def get_mvp_stats(req: https_fn.Request, headers: dict, mvp_id: str) -> https_fn.Response:
+    """
+    Observed respawn statistics of one location next to its configured
+    spawn_delay/spawn_variance: one aggregate document, never a log scan.
+    """
+    db = get_db()
+    mvp = _current(db, [mvp_id]).get(mvp_id)
+    if mvp is None:
+        return https_fn.Response(json.dumps({"error": "MVP not found"}), status=404, headers=headers)
+    stats = KillStats(db.collection(KillStats.collection_name).document(mvp_id).get().to_dict() or {})
+    body = {'id': mvp_id, **stats.summary(mvp.get('spawn_delay'), mvp.get('spawn_variance'))}
+    return https_fn.Response(serializer.dumps(body), headers=headers)
+
+
+def list_kills(req: https_fn.Request, headers: dict, mvp_id: str) -> https_fn.Response:
+    """
+    Kill log of one location, newest first; ?type=kill|sighting filters.
+    Paged with ?limit= and the X-Next-Cursor header passed back as ?cursor=.
+    """
+    try:
+        limit = int(req.args.get('limit', 50))
+        if not 0 < limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        kind = req.args.get('type')
+        if kind not in (None, 'kill', 'sighting'):
+            raise ValueError("type must be kill or sighting")
+        cursor = req.args.get('cursor')
+        if cursor:
+            at, after_id = decode_time_cursor(cursor)
+    except (ValueError, TypeError) as e:
+        return https_fn.Response(json.dumps({"error": str(e) or "Invalid parameters"}), status=400, headers=headers)
+
+    query = get_db().collection(kill_log.LOG_COLLECTION).where(filter=firestore.FieldFilter('mvp_id', '==', mvp_id))
+    if kind:
+        query = query.where(filter=firestore.FieldFilter('type', '==', kind))
+    query = (query.order_by('at', direction=firestore.Query.DESCENDING)
+             .order_by('__name__', direction=firestore.Query.DESCENDING))
+    if cursor:
+        query = query.start_after({'at': at, '__name__': after_id})
+    docs = list(query.limit(limit).stream())
 
+    next_cursor = None
+    if len(docs) == limit:
+        next_cursor = encode_time_cursor(docs[-1].get('at'), docs[-1].id)
+    return page_response(headers, [{**doc.to_dict(), 'id': doc.id} for doc in docs], next_cursor)
@@ -1,7 +1,36 @@
-from firebase_admin import firestore, auth, storage
+from firebase_admin import firestore, auth
 from firebase_functions import https_fn
 import json
+import threading
+from ..config.firebase import get_app, get_db, get_bucket
 from ..models.user import User
+from ..services.singleflight import SingleFlight
+from ..services.snapshot_cache import SnapshotCache
+from ..services.http_cache import etag_response
+from ..services.avatars import AVATAR_SIZES, AvatarError, AvatarStore
+from ..services.pagination import parse_list_params, query_page, page_response
+from ..services import serializer
+
+# Snapshot of the 'users' collection backing GET /users.
+# Profile writes use SERVER_TIMESTAMP, so they invalidate instead of writing through.
+user_cache = SnapshotCache('users')
+# Concurrent GET /users/<uid> for the same uid share one document read
+user_reads = SingleFlight('user')
+# Profile writes per uid. Reads are coalesced per (uid, version), so a GET
+# after a write never joins a read that started before it (as in SnapshotCache).
+_profile_versions = {}
+_profile_versions_lock = threading.Lock()
+
+
+def _profile_version(uid: str) -> int:
+    with _profile_versions_lock:
+        return _profile_versions.get(uid, 0)
+
+
+def _profile_written(uid: str) -> None:
+    with _profile_versions_lock:
+        _profile_versions[uid] = _profile_versions.get(uid, 0) + 1
+    user_cache.invalidate()
 
 
 def update_user(req: https_fn.Request, headers: dict, uid: str) -> https_fn.Response:
@@ -9,7 +38,7 @@ def update_user(req: https_fn.Request, headers: dict, uid: str) -> https_fn.Resp
     Updates user profile (Auth) and user preferences (Firestore).
     Expects JSON body with optional 'displayName' and 'theme'.
     """
-    db = firestore.client()
+    db = get_db()
     try:
         data = req.get_json()
         display_name = data.get('displayName')
@@ -22,7 +51,8 @@ def update_user(req: https_fn.Request, headers: dict, uid: str) -> https_fn.Resp
             try:
                 auth.update_user(
                     uid,
-                    display_name=display_name
+                    display_name=display_name,
+                    app=get_app()
                 )
             except Exception as auth_error:
                 print(
@@ -46,6 +76,7 @@ def update_user(req: https_fn.Request, headers: dict, uid: str) -> https_fn.Resp
 
         # Use set with merge=True to create if doesn't exist
         user_ref.set(update_data, merge=True)
+        _profile_written(uid)
 
         return https_fn.Response(json.dumps({"success": True}), headers=headers)
 
@@ -58,18 +89,17 @@ def get_user(req: https_fn.Request, headers: dict, uid: str) -> https_fn.Respons
     """
     Fetches user data from Firestore.
     """
-    db = firestore.client()
+    db = get_db()
     try:
         user_ref = db.collection('users').document(uid)
-        doc = user_ref.get()
+        doc = user_reads.do((uid, _profile_version(uid)), user_ref.get)
 
         if not doc.exists:
             # If not in Firestore yet, return basic auth info or empty
             # But for now, 404 or default
             return https_fn.Response(json.dumps({}), headers=headers)
 
-        user_data = doc.to_dict()
-        return https_fn.Response(json.dumps(user_data), headers=headers)
+        return https_fn.Response(serializer.dumps(doc.to_dict()), headers=headers)
 
     except Exception as e:
         print(f"Error fetching user {uid}: {e}")
@@ -80,6 +110,8 @@ def upload_avatar(req: https_fn.Request, headers: dict, uid: str) -> https_fn.Re
     """
     Uploads a user avatar to Firebase Storage and updates Auth/Firestore.
     Expects multipart/form-data with 'avatar' file field.
+    The image is resized to fixed square sizes (see services/avatars.py);
+    the response lists them so the client can pick the smallest that fits.
     """
     try:
         if 'avatar' not in req.files:
@@ -89,62 +121,76 @@ def upload_avatar(req: https_fn.Request, headers: dict, uid: str) -> https_fn.Re
         if not file:
             return https_fn.Response(json.dumps({"error": "Empty file"}), status=400, headers=headers)
 
-        # Upload to Firebase Storage
-        bucket = storage.bucket()
-        # Use a fixed name or keep extension?
-        # Keeping original filename might be risky, but for now it's okay.
-        # Better to standardize, e.g., avatar.jpg or keep extension.
-        # Let's keep original name for now to support different extensions easily.
-        blob = bucket.blob(f"avatars/{uid}/{file.filename}")
-        blob.upload_from_file(file.stream, content_type=file.content_type)
+        # Resize and upload to Firebase Storage (skipped if these bytes were uploaded before)
+        try:
+            stored = AvatarStore(get_bucket()).save(file.stream)
+        except AvatarError as e:
+            return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
 
-        # Make public
-        blob.make_public()
-        photo_url = blob.public_url
+        photo_urls = stored['urls']
+        photo_url = photo_urls[str(max(AVATAR_SIZES))]
 
         # Update Auth
-        auth.update_user(uid, photo_url=photo_url)
+        auth.update_user(uid, photo_url=photo_url, app=get_app())
 
         # Update Firestore
-        db = firestore.client()
+        db = get_db()
         db.collection('users').document(uid).set({
             'photo_url': photo_url,
+            'photo_urls': photo_urls,
             'updated_at': firestore.SERVER_TIMESTAMP
         }, merge=True)
+        _profile_written(uid)
 
-        return https_fn.Response(json.dumps({"photoUrl": photo_url}), headers=headers)
+        return https_fn.Response(json.dumps({"photoUrl": photo_url, "photoUrls": photo_urls}), headers=headers)
 
     except Exception as e:
         print(f"Error uploading avatar for {uid}: {e}")
         return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
 
 
+def _serialize_user(doc) -> dict:
+    # Timestamps stay datetimes; services/serializer.py encodes them
+    user_data = doc.to_dict()
+    user_data['uid'] = doc.id
+    return user_data
+
+
+def load_profile(uid: str):
+    """Serialized profile document of `uid`, or None if there is none yet."""
+    doc = get_db().collection('users').document(uid).get()
+    return _serialize_user(doc) if doc.exists else None
+
+
+def count_members() -> int:
+    """Number of user documents, via a server-side count() aggregation."""
+    result = get_db().collection('users').count().get()
+    return int(result[0][0].value)
+
+
+def _load_users() -> dict:
+    db = get_db()
+    return {doc.id: _serialize_user(doc) for doc in db.collection('users').stream()}
+
+
 def get_all_users(req: https_fn.Request, headers: dict) -> https_fn.Response:
     """
     Fetches all users from Firestore.
+    Supports ?fields=display_name,photo_url projection and ?limit=&cursor= paging;
+    the next page's cursor is returned in the X-Next-Cursor header.
     """
-    db = firestore.client()
     try:
-        users_ref = db.collection('users')
-        docs = users_ref.stream()
-
-        users_list = []
-        for doc in docs:
-            user_data = doc.to_dict()
-            # Include ID if needed
-            user_data['uid'] = doc.id
-            # Convert timestamps to string if necessary, but JSON serialization usually handles basic types.
-            # However, Firestore timestamps might need manual conversion if json.dumps fails.
-            # Let's check if we need a custom encoder or just convert here.
-            # Simple conversion for safety:
-            if 'created_at' in user_data and user_data['created_at']:
-                user_data['created_at'] = user_data['created_at'].isoformat()
-            if 'updated_at' in user_data and user_data['updated_at']:
-                user_data['updated_at'] = user_data['updated_at'].isoformat()
-
-            users_list.append(user_data)
-
-        return https_fn.Response(json.dumps(users_list, default=str), headers=headers)
+        params = parse_list_params(req)
+    except ValueError as e:
+        return https_fn.Response(json.dumps({"error": str(e)}), status=400, headers=headers)
+
+    try:
+        if not params.is_default:
+            items, next_cursor = query_page(get_db().collection('users'), params, _serialize_user)
+            return page_response(headers, items, next_cursor)
+
+        body, etag = user_cache.get_body(_load_users)
+        return etag_response(req, headers, body, etag)
 
     except Exception as e:
         print(f"Error fetching all users: {e}")
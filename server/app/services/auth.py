@@ -0,0 +1,251 @@
+"""
+Firebase ID token verification for routes that act on behalf of a member.
+
+A token is verified once (RS256 signature against Google's published
+signing keys, audience/issuer/expiry/subject claims), then its claims are
+kept in a bounded LRU keyed by the token's SHA-256 until the token expires,
+so a client reusing its token (the Firebase SDK refreshes it hourly) costs
+one hash and a dict lookup per request. The signing keys are fetched once
+and kept for the max-age their endpoint sends; an unknown key id (Google
+rotated its keys) triggers an early, rate-limited refetch.
+
+As with firebase_admin.auth.verify_id_token without check_revoked, a
+revoked token stays accepted until it expires (at most an hour).
+
+With FIREBASE_AUTH_EMULATOR_HOST set, the Auth emulator's unsigned tokens
+are accepted instead (never set it in production).
+
+Offline use (tests, benchmarks): build KeySet(fetch=...) returning locally
+minted keys and install a TokenVerifier with set_verifier().
+"""
+import contextvars
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import jwt
+from cryptography import x509
+
+from .metrics import AUTH_VERIFICATIONS
+
+# Google's signing certificates for Firebase ID tokens: {kid: PEM certificate}
+PUBLIC_KEYS_URL = 'https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com'
+PROJECT_ID = os.getenv('FIREBASE_PROJECT_ID') or os.getenv('GOOGLE_CLOUD_PROJECT') or 'big-fish-9dbec'
+# Verified tokens remembered per process
+TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', '10000'))
+# Key lifetime when the key endpoint sends no max-age
+DEFAULT_KEYS_TTL = 3600
+# Minimum seconds between refetches caused by an unknown key id, so forged kids can't hammer Google
+MIN_REFRESH_INTERVAL = 60
+# Clock skew tolerated on iat/exp/auth_time
+LEEWAY = 10
+
+# Route rules (see main._auth_rules)
+SIGNED_IN = 'signed_in'  # any valid token
+OWNER = 'owner'          # a valid token whose uid is the route's <uid>
+OPTIONAL = 'optional'    # anonymous, or a valid token identifying the caller
+
+_MAX_AGE = re.compile(r'max-age=(\d+)')
+
+
+class AuthError(Exception):
+    def __init__(self, message: str, status: int = 401):
+        super().__init__(message)
+        self.status = status
+
+
+def fetch_google_keys() -> Tuple[Dict[str, str], float]:
+    """(kid -> PEM certificate, seconds they may be cached) from Google."""
+    with urllib.request.urlopen(PUBLIC_KEYS_URL, timeout=10) as response:
+        certs = json.loads(response.read())
+        match = _MAX_AGE.search(response.headers.get('Cache-Control', ''))
+    return certs, float(match.group(1)) if match else DEFAULT_KEYS_TTL
+
+
+def _public_key(key: Any) -> Any:
+    """PEM certificates are reduced to their public key; PEM keys and key objects pass through."""
+    if isinstance(key, str) and 'BEGIN CERTIFICATE' in key:
+        return x509.load_pem_x509_certificate(key.encode()).public_key()
+    return key
+
+
+class KeySet:
+    """
+    Signing keys by key id, cached for the lifetime the fetcher reports.
+    `fetch` returns (kid -> key, max-age seconds); keys may be PEM
+    certificates, PEM public keys or key objects.
+    """
+
+    def __init__(self, fetch: Callable[[], Tuple[Dict[str, Any], float]] = fetch_google_keys,
+                 clock: Callable[[], float] = time.monotonic):
+        self._fetch = fetch
+        self._clock = clock
+        self._keys: Dict[str, Any] = {}
+        self._expires = 0.0
+        self._fetched_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.fetches = 0
+
+    def get(self, kid: str) -> Any:
+        keys = self._keys
+        if kid in keys and self._clock() < self._expires:
+            return keys[kid]
+        # One fetch at a time; requests waiting on it then find the new keys
+        with self._lock:
+            now = self._clock()
+            expired = now >= self._expires
+            unknown = kid not in self._keys and (
+                self._fetched_at is None or now - self._fetched_at >= MIN_REFRESH_INTERVAL)
+            if expired or unknown:
+                self._refresh(now)
+            key = self._keys.get(kid)
+        if key is None:
+            raise AuthError("Token signed with an unknown key")
+        return key
+
+    def _refresh(self, now: float) -> None:
+        try:
+            keys, max_age = self._fetch()
+        except Exception as e:
+            print(f"Warning: fetching token signing keys failed: {e}")
+            if not self._keys:
+                raise AuthError("Token signing keys unavailable", status=503)
+            # Keep the keys we have; try again shortly
+            self._expires = now + MIN_REFRESH_INTERVAL
+            return
+        self._keys = {kid: _public_key(key) for kid, key in keys.items()}
+        self._expires = now + max_age
+        self._fetched_at = now
+        self.fetches += 1
+
+
+class TokenVerifier:
+    """
+    Verifies Firebase ID tokens for one project and remembers the verified
+    ones (sha256(token) -> (exp, claims)) in an LRU of `cache_size` entries.
+    Returned claims are shared between requests and must not be modified.
+    """
+
+    def __init__(self, keys: Optional[KeySet] = None, project_id: str = PROJECT_ID,
+                 cache_size: int = TOKEN_CACHE_SIZE, clock: Callable[[], float] = time.time,
+                 emulator: Optional[bool] = None):
+        self.keys = keys or KeySet()
+        self.project_id = project_id
+        self.issuer = f'https://securetoken.google.com/{project_id}'
+        self.cache_size = cache_size
+        self.emulator = bool(os.getenv('FIREBASE_AUTH_EMULATOR_HOST')) if emulator is None else emulator
+        self._clock = clock
+        self._cache: 'OrderedDict[bytes, Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """Claims of a valid token (with 'uid' = 'sub'); raises AuthError otherwise."""
+        digest = hashlib.sha256(token.encode()).digest()
+        now = self._clock()
+        with self._lock:
+            entry = self._cache.get(digest)
+            if entry is not None:
+                if now < entry[0] + LEEWAY:
+                    self._cache.move_to_end(digest)
+                    self.hits += 1
+                    AUTH_VERIFICATIONS.inc(1, 'cached')
+                    return entry[1]
+                del self._cache[digest]
+            self.misses += 1
+
+        try:
+            claims = self._decode(token, now)
+        except AuthError:
+            AUTH_VERIFICATIONS.inc(1, 'rejected')
+            raise
+        AUTH_VERIFICATIONS.inc(1, 'verified')
+        if self.cache_size > 0:
+            with self._lock:
+                self._cache[digest] = (claims['exp'], claims)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return claims
+
+    def _decode(self, token: str, now: float) -> Dict[str, Any]:
+        checks = {'audience': self.project_id, 'issuer': self.issuer, 'leeway': LEEWAY,
+                  'options': {'require': ['exp', 'iat', 'sub']}}
+        try:
+            header = jwt.get_unverified_header(token)
+            if self.emulator and header.get('alg') == 'none':
+                checks['options'].update(verify_signature=False, verify_exp=True, verify_iat=True,
+                                         verify_aud=True, verify_iss=True)
+                claims = jwt.decode(token, **checks)
+            else:
+                if header.get('alg') != 'RS256' or not header.get('kid'):
+                    raise AuthError("Token must be RS256-signed with a key id")
+                claims = jwt.decode(token, self.keys.get(header['kid']), algorithms=['RS256'], **checks)
+        except jwt.PyJWTError as e:
+            raise AuthError(f"Invalid token: {e}")
+
+        sub = claims.get('sub')
+        if not isinstance(sub, str) or not sub or len(sub) > 128:
+            raise AuthError("Invalid token: bad subject")
+        if claims.get('auth_time', 0) > now + LEEWAY:
+            raise AuthError("Invalid token: auth_time is in the future")
+        claims['uid'] = sub
+        return claims
+
+
+_verifier: Optional[TokenVerifier] = None
+_verifier_lock = threading.Lock()
+# Claims of the token the current request was authorized with (None on public routes)
+_claims: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar('auth_claims', default=None)
+
+
+def verifier() -> TokenVerifier:
+    global _verifier
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                _verifier = TokenVerifier()
+    return _verifier
+
+
+def set_verifier(instance: Optional[TokenVerifier]) -> None:
+    """Replaces the process-wide verifier (None: a default one is built on next use)."""
+    global _verifier
+    _verifier = instance
+
+
+def authorize(req, rule: Optional[str], params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Enforces a route's rule with the request's `Authorization: Bearer <ID token>`
+    and makes the claims available through current_user(). Routes without a
+    rule are public and their Authorization header is ignored.
+    """
+    _claims.set(None)
+    if rule is None:
+        return None
+    scheme, _, token = req.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token.strip():
+        if rule == OPTIONAL:
+            return None
+        raise AuthError("Sign-in required")
+    claims = verifier().verify(token.strip())
+    if rule == OWNER and params.get('uid') != claims['uid']:
+        raise AuthError("Not allowed for this user", status=403)
+    _claims.set(claims)
+    return claims
+
+
+def current_user() -> Optional[Dict[str, Any]]:
+    """Verified claims of the current request, if its route requires sign-in."""
+    return _claims.get()
+
+
+def current_uid() -> Optional[str]:
+    claims = _claims.get()
+    return claims['uid'] if claims else None
@@ -0,0 +1,118 @@
+import hashlib
+import io
+import os
+import tempfile
+from typing import BinaryIO, Dict, Tuple
+
+from PIL import Image, ImageOps
+
+# Square variants stored for every avatar, in pixels
+AVATAR_SIZES = (64, 128, 256)
+# Paths are content-addressed, so a stored variant never changes
+CACHE_CONTROL = 'public, max-age=31536000, immutable'
+MAX_UPLOAD_BYTES = int(os.getenv('AVATAR_MAX_BYTES', str(10 * 1024 * 1024)))
+# Refuse to decode images beyond this many pixels (decompression bombs)
+MAX_PIXELS = 40_000_000
+
+_CHUNK_SIZE = 64 * 1024
+# Uploads larger than this are spooled to disk instead of memory
+_SPOOL_MEMORY = 1024 * 1024
+
+
+class AvatarError(ValueError):
+    pass
+
+
+def spool_upload(stream: BinaryIO, max_bytes: int = MAX_UPLOAD_BYTES) -> Tuple[BinaryIO, str]:
+    """
+    Copies an upload stream chunk by chunk into a spooled temp file while
+    hashing it, so memory stays bounded whatever the upload size.
+    Returns (rewound file, sha256 hex digest).
+    """
+    digest = hashlib.sha256()
+    spooled = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MEMORY)
+    size = 0
+    while True:
+        chunk = stream.read(_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            spooled.close()
+            raise AvatarError(f"File too large (max {max_bytes // (1024 * 1024)} MB)")
+        digest.update(chunk)
+        spooled.write(chunk)
+    if size == 0:
+        spooled.close()
+        raise AvatarError("Empty file")
+    spooled.seek(0)
+    return spooled, digest.hexdigest()
+
+
+def render_variants(source: BinaryIO, sizes=AVATAR_SIZES) -> Dict[int, bytes]:
+    """
+    Decodes the image once and returns {size: WebP bytes} of center-cropped
+    squares, keeping transparency. For JPEGs, draft() lets the decoder downscale while decoding,
+    so a 12 MP phone photo is never fully expanded in memory.
+    """
+    try:
+        image = Image.open(source)
+        if image.width * image.height > MAX_PIXELS:
+            raise AvatarError("Image dimensions too large")
+        image.draft('RGB', (max(sizes) * 2, max(sizes) * 2))
+        image = ImageOps.exif_transpose(image)
+        # Palette/grayscale images with a transparent color carry it in info, not in an alpha band
+        has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+    except AvatarError:
+        raise
+    except Exception:
+        raise AvatarError("Unsupported or corrupt image")
+
+    variants = {}
+    # Largest first; each smaller size is resampled from the previous one
+    for size in sorted(sizes, reverse=True):
+        image = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        out = io.BytesIO()
+        image.save(out, 'WEBP', quality=85, method=4)
+        variants[size] = out.getvalue()
+    return variants
+
+
+class AvatarStore:
+    """
+    Stores avatars under avatars/<sha256 of upload>/<size>.webp.
+    Uploading bytes that were seen before (by anyone) skips decoding and
+    uploading entirely and returns the existing URLs.
+    `bucket` is a google.cloud.storage.Bucket or a LocalBucket.
+    """
+
+    def __init__(self, bucket, sizes=AVATAR_SIZES):
+        self.bucket = bucket
+        self.sizes = tuple(sorted(sizes))
+
+    def _path(self, digest: str, size: int) -> str:
+        return f"avatars/{digest}/{size}.webp"
+
+    def save(self, stream: BinaryIO) -> Dict:
+        """Returns {'hash', 'urls': {size: public url}, 'deduped': bool}."""
+        spooled, digest = spool_upload(stream)
+        try:
+            blobs = {size: self.bucket.blob(self._path(digest, size)) for size in self.sizes}
+            # The largest variant is written last, so its presence means all are there
+            if blobs[self.sizes[-1]].exists():
+                return {'hash': digest, 'urls': self._urls(blobs), 'deduped': True}
+
+            variants = render_variants(spooled, self.sizes)
+        finally:
+            spooled.close()
+
+        for size in self.sizes:
+            blob = blobs[size]
+            blob.cache_control = CACHE_CONTROL
+            blob.upload_from_string(variants[size], content_type='image/webp')
+            blob.make_public()
+        return {'hash': digest, 'urls': self._urls(blobs), 'deduped': False}
+
+    def _urls(self, blobs) -> Dict[str, str]:
+        return {str(size): blob.public_url for size, blob in blobs.items()}
@@ -0,0 +1,85 @@
+"""
+Response compression negotiated from Accept-Encoding: brotli when the
+client takes it and the brotli package is installed, else gzip. Bodies
+under COMPRESS_MIN_BYTES go out as-is. Streamed JSON (list pages) is
+compressed chunk by chunk; event streams (SSE) are never touched.
+"""
+import gzip
+import os
+import zlib
+from typing import Iterable, Iterator
+from firebase_functions import https_fn
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Below this many bytes the header overhead and CPU aren't worth it
+MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))
+# Mid-range levels: most of the size win at a fraction of the max-level CPU
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/plain')
+
+
+def negotiate(req: https_fn.Request):
+    """'br', 'gzip' or None, by the client's q-values (br wins ties)."""
+    accepted = req.accept_encodings
+    gzip_q = accepted.quality('gzip')
+    if brotli is not None and accepted.quality('br') and accepted.quality('br') >= gzip_q:
+        return 'br'
+    return 'gzip' if gzip_q else None
+
+
+def compress(req: https_fn.Request, response: https_fn.Response) -> https_fn.Response:
+    """
+    Compresses `response` in place when it's worth it. Any compressible
+    response gets Vary: Accept-Encoding, so caches keep the encodings apart.
+    A strong ETag is weakened on compressed bodies (the bytes differ per
+    encoding); If-None-Match compares weakly, so revalidation still gives 304s.
+    """
+    if response.mimetype not in COMPRESSIBLE_TYPES or 'Content-Encoding' in response.headers:
+        return response
+    response.vary.add('Accept-Encoding')
+    if response.status_code in (204, 304):
+        return response
+
+    if response.is_streamed:
+        # Length unknown up front, so no threshold
+        coding = negotiate(req)
+        if coding is not None:
+            response.response = _compress_stream(response.response, coding)
+            response.headers['Content-Encoding'] = coding
+            response.headers.pop('Content-Length', None)
+        return response
+
+    body = response.get_data()
+    coding = negotiate(req) if len(body) >= MIN_BYTES else None
+    if coding is None:
+        return response
+    if coding == 'br':
+        response.set_data(brotli.compress(body, quality=BROTLI_QUALITY))
+    else:
+        response.set_data(gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0))
+    response.headers['Content-Encoding'] = coding
+    etag = response.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        response.headers['ETag'] = 'W/' + etag
+    return response
+
+
+def _compress_stream(chunks: Iterable[bytes], coding: str) -> Iterator[bytes]:
+    if coding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        compress, finish = compressor.process, compressor.finish
+    else:
+        # wbits 31: gzip container
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        compress, finish = compressor.compress, compressor.flush
+    for chunk in chunks:
+        data = compress(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield finish()
@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import serializer
+
+
+class SubscriberLimitReached(Exception):
+    pass
+
+
+def handler_threads() -> int:
+    """
+    Threads serving requests in this process: ASGI_THREADS under asgi.py,
+    else gunicorn's THREADS (functions-framework's default is cpu_count * 4).
+    """
+    if os.getenv('SERVER_MODE') == 'asgi':
+        return int(os.getenv('ASGI_THREADS', '64'))
+    return int(os.getenv('THREADS') or (os.cpu_count() or 1) * 4)
+
+
+class _Subscription:
+    """
+    Response iterable for one subscriber. The WSGI server calls close() when
+    the client goes away (or if the response is never sent), which frees the
+    subscriber slot even if the stream was never started.
+    """
+
+    def __init__(self, broadcaster: 'EventBroadcaster', stream: Iterator[str]):
+        self._broadcaster = broadcaster
+        self._stream = stream
+        self._closed = False
+
+    def __iter__(self):
+        return self._stream
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._stream.close()
+        self._broadcaster._release()
+
+
+class EventBroadcaster:
+    """
+    Server-sent events fan-out shared by every subscriber of this instance.
+
+    Published events go into one bounded ring buffer; subscribers block on a
+    shared condition and read whatever is newer than their cursor, so a
+    publish costs the same no matter how many clients are connected.
+    A reconnecting client sends Last-Event-ID and is replayed the events it
+    missed, or told to 'reset' (refetch) if they already left the buffer.
+    """
+
+    def __init__(self, buffer_size: Optional[int] = None, max_subscribers: Optional[int] = None,
+                 heartbeat: Optional[float] = None):
+        if buffer_size is None:
+            buffer_size = int(os.getenv('SSE_BUFFER_SIZE', '256'))
+        if max_subscribers is None:
+            # Each open stream holds a handler thread; keep half of them for other requests
+            max_subscribers = int(os.getenv('SSE_MAX_SUBSCRIBERS') or max(1, handler_threads() // 2))
+        if heartbeat is None:
+            heartbeat = float(os.getenv('SSE_HEARTBEAT', '15'))
+        self.max_subscribers = max_subscribers
+        self.heartbeat = heartbeat
+        # Event ids are '<epoch>-<seq>'; the epoch changes with every process,
+        # so ids from another instance (or before a restart) force a reset.
+        self._epoch = format(int(time.time() * 1000), 'x')
+        self._seq = 0
+        self._events: deque = deque(maxlen=buffer_size)
+        self._subscribers = 0
+        self._cond = threading.Condition()
+
+    @property
+    def subscribers(self) -> int:
+        return self._subscribers
+
+    def publish(self, event: str, data: Dict[str, Any]) -> None:
+        payload = serializer.dumps(data).decode('utf-8')
+        with self._cond:
+            self._seq += 1
+            self._events.append((self._seq, event, payload))
+            self._cond.notify_all()
+
+    def _parse_id(self, last_event_id: Optional[str]) -> Optional[int]:
+        """Returns the sequence number for an id from this process, else None."""
+        if not last_event_id:
+            return None
+        epoch, _, seq = last_event_id.partition('-')
+        if epoch != self._epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def _since(self, cursor: int) -> List[Tuple[int, str, str]]:
+        """Events newer than `cursor`. Caller holds the lock."""
+        if not self._events or self._events[-1][0] <= cursor:
+            return []
+        return [e for e in self._events if e[0] > cursor]
+
+    def _format(self, seq: int, event: str, payload: str) -> str:
+        return f"id: {self._epoch}-{seq}\nevent: {event}\ndata: {payload}\n\n"
+
+    def _release(self) -> None:
+        with self._cond:
+            self._subscribers -= 1
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> _Subscription:
+        """
+        Registers a subscriber and returns its SSE text stream.
+        Raises SubscriberLimitReached when the instance is at capacity.
+        """
+        with self._cond:
+            if self._subscribers >= self.max_subscribers:
+                raise SubscriberLimitReached()
+            self._subscribers += 1
+            cursor = self._parse_id(last_event_id)
+            oldest = self._events[0][0] if self._events else self._seq + 1
+            # Unknown id, or the events it missed were already evicted
+            reset = last_event_id is not None and (cursor is None or cursor < oldest - 1)
+            if cursor is None:
+                cursor = self._seq
+        return _Subscription(self, self._stream(cursor, reset))
+
+    def _stream(self, cursor: int, reset: bool) -> Iterator[str]:
+        yield "retry: 3000\n\n"
+        if reset:
+            yield self._format(cursor, 'reset', '{}')
+        while True:
+            with self._cond:
+                events = self._since(cursor)
+                if not events:
+                    self._cond.wait(self.heartbeat)
+                    events = self._since(cursor)
+            if not events:
+                # Comment line: keeps proxies from closing an idle connection
+                yield ": heartbeat\n\n"
+                continue
+            for seq, event, payload in events:
+                cursor = seq
+                yield self._format(seq, event, payload)
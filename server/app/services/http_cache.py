@@ -0,0 +1,57 @@
+import os
+from typing import NamedTuple
+from firebase_functions import https_fn
+
+# Seconds nginx may answer a GET from its micro-cache (sent as X-Accel-Expires); 0 disables it
+MICROCACHE_TTL = int(os.getenv('MICROCACHE_TTL', '2'))
+
+
+class CachePolicy(NamedTuple):
+    # Cache-Control for browsers, unless the handler set its own
+    cache_control: str
+    # Seconds the nginx micro-cache may reuse a 200 (never sent to clients)
+    edge_ttl: int = 0
+
+
+# Polled state (MVP timers, dashboard, lists): browsers revalidate via ETag,
+# nginx absorbs polling bursts for a couple of seconds
+POLLED = CachePolicy('no-cache', MICROCACHE_TTL)
+# Read-only reference data (monster database)
+STATIC = CachePolicy('public, max-age=3600', 60)
+NO_STORE = CachePolicy('no-store')
+
+
+def apply_policy(req: https_fn.Request, response: https_fn.Response, policy: CachePolicy) -> https_fn.Response:
+    """
+    Fills in Cache-Control and the edge TTL for `response`. Only anonymous
+    200s are shared: errors default to no-store, and a request carrying
+    Authorization may get a per-user answer, so it stays private.
+    """
+    if response.status_code != 200:
+        policy = NO_STORE if response.status_code != 304 else policy._replace(edge_ttl=0)
+    if 'Authorization' in req.headers:
+        response.headers.setdefault('Cache-Control', 'private, no-cache')
+        return response
+    response.headers.setdefault('Cache-Control', policy.cache_control)
+    shared = not any(d in response.headers['Cache-Control'] for d in ('no-store', 'private'))
+    if policy.edge_ttl and shared and response.mimetype != 'text/event-stream':
+        response.headers['X-Accel-Expires'] = str(policy.edge_ttl)
+    return response
+
+
+def etag_response(req: https_fn.Request, headers: dict, body: bytes, etag: str) -> https_fn.Response:
+    """
+    Sends `body` with its ETag, or an empty 304 when the client already
+    holds this exact representation (If-None-Match).
+    `no-cache` makes browsers revalidate on every fetch instead of reusing
+    a stale copy, which turns unchanged polls into 304s.
+    """
+    response_headers = {
+        **headers,
+        'ETag': etag,
+        'Cache-Control': 'no-cache',
+        'Access-Control-Expose-Headers': 'ETag',
+    }
+    if req.if_none_match.contains_weak(etag.strip('"')):
+        return https_fn.Response(status=304, headers=response_headers)
+    return https_fn.Response(body, headers=response_headers)
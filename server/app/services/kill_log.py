@@ -0,0 +1,53 @@
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from firebase_admin import firestore
+
+from ..models.kill_stats import KillStats
+
+# Append-only history of kills and spawn sightings, one document per report
+LOG_COLLECTION = 'mvp_kills'
+# Kills kept in each location's stats document
+RECENT_KILLS = int(os.getenv('KILL_LOG_RECENT', '10'))
+
+
+@firestore.transactional
+def _record(transaction, db, mvp_id: str, kind: str, at: datetime, member: Optional[str], mvp: Dict[str, Any]):
+    stats_ref = db.collection(KillStats.collection_name).document(mvp_id)
+    stats = KillStats(stats_ref.get(transaction=transaction).to_dict() or {})
+    duplicate = kind == 'kill' and stats.is_duplicate_kill(at, mvp.get('spawn_delay'), mvp.get('spawn_variance'))
+    if duplicate:
+        interval = None
+    elif kind == 'kill':
+        interval = stats.add_kill(at, member, RECENT_KILLS)
+    else:
+        interval = stats.add_sighting(at)
+    entry = {
+        'mvp_id': mvp_id,
+        'type': kind,
+        'at': at,
+        'reported_by': member,
+        # Respawn interval (minutes) this report measured, if it was the first sign of a respawn
+        'interval': interval,
+        # Another report of the last kill; kept in the log but not in the stats
+        'duplicate': duplicate,
+        'recorded_at': firestore.SERVER_TIMESTAMP,
+    }
+    transaction.create(db.collection(LOG_COLLECTION).document(), entry)
+    if not duplicate:
+        transaction.set(stats_ref, stats.to_dict())
+    return stats, entry
+
+
+def record(db, mvp_id: str, kind: str, at: datetime, member: Optional[str] = None,
+           mvp: Optional[Dict[str, Any]] = None) -> Tuple[KillStats, dict]:
+    """
+    Appends a 'kill' or 'sighting' to the log and folds it into the
+    location's KillStats in one transaction (retried on contention), so the
+    aggregate always matches the log. A kill within the location's minimum
+    respawn time of the last one (from `mvp`'s spawn_delay/spawn_variance)
+    is logged with duplicate=True and left out of the stats.
+    Returns (stats, log entry).
+    """
+    return _record(db.transaction(), db, mvp_id, kind, at, member, mvp or {})
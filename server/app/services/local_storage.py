@@ -0,0 +1,59 @@
+import os
+import shutil
+from pathlib import Path
+from typing import Optional
+
+
+class LocalBlob:
+    """Filesystem stand-in for google.cloud.storage.Blob (the parts we use)."""
+
+    def __init__(self, bucket: 'LocalBucket', name: str):
+        self.bucket = bucket
+        self.name = name
+        self.cache_control: Optional[str] = None
+        self.content_type: Optional[str] = None
+
+    @property
+    def _path(self) -> Path:
+        return self.bucket.root / self.name
+
+    @property
+    def public_url(self) -> str:
+        return f"{self.bucket.base_url}/{self.name}"
+
+    def exists(self) -> bool:
+        return self._path.exists()
+
+    def upload_from_file(self, file_obj, content_type: Optional[str] = None) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._path, 'wb') as out:
+            shutil.copyfileobj(file_obj, out)
+        self.content_type = content_type
+
+    def upload_from_string(self, data: bytes, content_type: Optional[str] = None) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._path.write_bytes(data)
+        self.content_type = content_type
+
+    def download_as_bytes(self) -> bytes:
+        return self._path.read_bytes()
+
+    def make_public(self) -> None:
+        pass
+
+
+class LocalBucket:
+    """
+    Directory-backed stand-in for a Storage bucket, for local development
+    and for exercising upload code without Cloud Storage.
+    Enabled for the app by setting LOCAL_STORAGE_DIR (see app/config/firebase.py).
+    """
+
+    def __init__(self, root: str, base_url: Optional[str] = None):
+        self.root = Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.base_url = (base_url or self.root.as_uri()).rstrip('/')
+        self.name = os.path.basename(str(self.root))
+
+    def blob(self, name: str) -> LocalBlob:
+        return LocalBlob(self, name)
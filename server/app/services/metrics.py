@@ -0,0 +1,277 @@
+"""
+Request instrumentation: per-route latency and payload size histograms,
+Firestore document reads/writes per request, exposed in Prometheus text
+format (GET /metrics) and summarized per response in Server-Timing.
+
+main.api opens a RequestMetrics for each request (held in a context
+variable), and the Firestore client returned by get_db() is wrapped by
+instrument() so every read and write is charged to the current request.
+All bookkeeping is in-process counters; there is no I/O on the request path.
+Values are per process: each instance/worker exposes its own.
+"""
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in sorted(self._series.items())]
+        for label_values, counts, total in series:
+            labels = _labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                yield f'{self.name}_bucket{{{labels}{"," if labels else ""}le="{le}"}} {cumulative}'
+            yield f"{self.name}_sum{{{labels}}} {total}"
+            yield f"{self.name}_count{{{labels}}} {cumulative}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float, *label_values: str) -> None:
+        if not amount:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            yield f"{self.name}{{{_labels(self.labels, label_values)}}} {value}"
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    return ','.join(
+        '%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in zip(names, values)
+    )
+
+
+REQUEST_DURATION = Histogram('bigfish_http_request_duration_seconds', "Time spent handling a request.",
+                             ('method', 'route', 'status'), LATENCY_BUCKETS)
+RESPONSE_SIZE = Histogram('bigfish_http_response_size_bytes', "Response body size (non-streamed responses).",
+                          ('method', 'route'), SIZE_BUCKETS)
+FIRESTORE_TIME = Histogram('bigfish_firestore_seconds_per_request', "Time spent in Firestore calls per request.",
+                           ('method', 'route'), LATENCY_BUCKETS)
+FIRESTORE_READS = Counter('bigfish_firestore_document_reads_total', "Firestore documents read.", ('method', 'route'))
+FIRESTORE_WRITES = Counter('bigfish_firestore_document_writes_total', "Firestore documents written.",
+                           ('method', 'route'))
+SINGLEFLIGHT_CALLS = Counter('bigfish_singleflight_calls_total',
+                             "Reads through a single-flight group: executed, or coalesced into one in flight.",
+                             ('group', 'outcome'))
+AUTH_VERIFICATIONS = Counter('bigfish_auth_token_verifications_total',
+                             "ID tokens checked: cached (verified earlier), verified (signature checked) or rejected.",
+                             ('outcome',))
+REGISTRY = (REQUEST_DURATION, RESPONSE_SIZE, FIRESTORE_TIME, FIRESTORE_READS, FIRESTORE_WRITES, SINGLEFLIGHT_CALLS,
+            AUTH_VERIFICATIONS)
+
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format (0.0.4)."""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+class RequestMetrics:
+    """Counters for one request. Shared with any worker threads the handler fans out to."""
+
+    __slots__ = ('started', 'route', 'reads', 'writes', 'firestore_seconds', '_lock')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.route = None
+        self.reads = 0
+        self.writes = 0
+        self.firestore_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def firestore(self, seconds: float, reads: int = 0, writes: int = 0) -> None:
+        with self._lock:
+            self.firestore_seconds += seconds
+            self.reads += reads
+            self.writes += writes
+
+
+_current: contextvars.ContextVar[Optional[RequestMetrics]] = contextvars.ContextVar('request_metrics', default=None)
+
+
+def current() -> Optional[RequestMetrics]:
+    return _current.get()
+
+
+def start() -> RequestMetrics:
+    metrics = RequestMetrics()
+    _current.set(metrics)
+    return metrics
+
+
+def set_route(route: str) -> None:
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.route = route
+
+
+def finish(metrics: RequestMetrics, method: str, response) -> None:
+    """Records the request and adds its Server-Timing entries to `response`."""
+    _current.set(None)
+    elapsed = time.perf_counter() - metrics.started
+    route = metrics.route or 'unmatched'
+    REQUEST_DURATION.observe(elapsed, method, route, str(response.status_code))
+    FIRESTORE_TIME.observe(metrics.firestore_seconds, method, route)
+    FIRESTORE_READS.inc(metrics.reads, method, route)
+    FIRESTORE_WRITES.inc(metrics.writes, method, route)
+    if not response.is_streamed:
+        RESPONSE_SIZE.observe(response.calculate_content_length() or 0, method, route)
+
+    timing = (f'firestore;dur={metrics.firestore_seconds * 1000:.1f};desc="{metrics.reads} reads {metrics.writes} writes"'
+              f', app;dur={elapsed * 1000:.1f}')
+    existing = response.headers.get('Server-Timing')
+    response.headers['Server-Timing'] = f"{existing}, {timing}" if existing else timing
+    expose = response.headers.get('Access-Control-Expose-Headers')
+    if not expose:
+        response.headers['Access-Control-Expose-Headers'] = 'Server-Timing'
+    elif 'Server-Timing' not in expose:
+        response.headers['Access-Control-Expose-Headers'] = f"{expose}, Server-Timing"
+    response.headers.setdefault('Timing-Allow-Origin', '*')
+
+
+def submit(executor, fn, *args):
+    """executor.submit() that carries the current request's metrics into the worker thread."""
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+# --- Firestore client instrumentation ---
+
+# Firestore classes whose returned instances are wrapped, and how their calls are charged
+_WRAPPED = {'Client', 'CollectionReference', 'DocumentReference', 'Query', 'CollectionGroup',
+            'WriteBatch', 'Transaction', 'AggregationQuery'}
+_DOC_WRITES = {'set', 'update', 'create', 'delete', 'add'}
+
+
+def instrument(client):
+    """Wraps a google.cloud.firestore Client so reads and writes are counted per request."""
+    return _Traced(client)
+
+
+def _unwrap(value):
+    if isinstance(value, _Traced):
+        return value._target
+    if isinstance(value, list):
+        return [_unwrap(item) for item in value]
+    return value
+
+
+def _wrap(value):
+    return _Traced(value) if type(value).__name__ in _WRAPPED else value
+
+
+def _counted_stream(iterator):
+    """Yields from `iterator`, charging one read per document and the time spent waiting for each."""
+    metrics = _current.get()
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            if metrics is not None:
+                metrics.firestore(time.perf_counter() - start)
+            return
+        if metrics is not None:
+            metrics.firestore(time.perf_counter() - start, reads=1)
+        yield item
+
+
+class _Traced:
+    """Transparent proxy; arguments are unwrapped so Firestore internals only see real objects."""
+
+    __slots__ = ('_target', '_kind')
+
+    def __init__(self, target):
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_kind', type(target).__name__)
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+        kind = self._kind
+
+        def call(*args, **kwargs):
+            args = [_unwrap(arg) for arg in args]
+            kwargs = {key: _unwrap(value) for key, value in kwargs.items()}
+            if name == 'stream' or (name == 'get_all' and kind in ('Client', 'Transaction')):
+                return _counted_stream(iter(attr(*args, **kwargs)))
+
+            start = time.perf_counter()
+            result = attr(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            metrics = _current.get()
+            if metrics is not None:
+                if name == 'get':
+                    if kind == 'DocumentReference':
+                        metrics.firestore(elapsed, reads=1)
+                    elif kind == 'AggregationQuery':
+                        # Billed as one read per batch of up to 1000 index entries
+                        metrics.firestore(elapsed, reads=1)
+                    elif kind in ('Query', 'CollectionReference', 'CollectionGroup'):
+                        metrics.firestore(elapsed, reads=len(result))
+                    elif kind == 'Transaction':
+                        return _counted_stream(iter(result))
+                elif name == 'commit':
+                    metrics.firestore(elapsed, writes=len(result or ()))
+                elif name in _DOC_WRITES and kind in ('DocumentReference', 'CollectionReference', 'Transaction'):
+                    metrics.firestore(elapsed, writes=1)
+            return _wrap(result)
+
+        return call
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+    def __eq__(self, other):
+        return self._target == _unwrap(other)
+
+    def __hash__(self):
+        return hash(self._target)
+
+    def __repr__(self):
+        return f"Traced({self._target!r})"
@@ -0,0 +1,273 @@
+import json
+import os
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .monster_shards import MonsterShards, encode, normalize, summarize
+
+_SERVER_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Where the dataset is looked for, first match wins. MONSTERS_DATA_PATH overrides.
+DATA_PATHS = (
+    os.path.join(_SERVER_DIR, 'data', 'monsters.json'),
+    os.path.join(os.path.dirname(_SERVER_DIR), 'client', 'public', 'data', 'monsters.json'),
+)
+
+# Built by `python -m app.services.monster_shards`; used instead of monsters.json when present
+SHARDS_DIR = os.path.join(_SERVER_DIR, 'data', 'monsters')
+SORT_KEYS = ('id', 'level', 'hp', 'baseExp', 'jobExp', 'name')
+
+
+def base_element(element: str) -> str:
+    """'Fire (Lv 1)' -> 'Fire'"""
+    return element.split(' ')[0] if element else ''
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _Codes:
+    """Interns category strings (race, element, size) to small ints."""
+
+    def __init__(self):
+        self.names: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, name: str) -> int:
+        if name not in self._codes:
+            self._codes[name] = len(self.names)
+            self.names.append(name)
+        return self._codes[name]
+
+    def lookup(self, name: str) -> Optional[int]:
+        return self._codes.get(name)
+
+
+class MonsterDB:
+    """
+    Read-only, column-oriented view of monsters.json with prebuilt indexes.
+
+    Built from summaries (see monster_shards.summarize). Rows are positions
+    0..n-1. Numeric columns live in typed arrays and categories are interned
+    to codes. Full records are not held here: `load_detail(id)` returns the
+    encoded record for /monsters/<id>. Filters resolve to row sets through
+    the indexes and sorting uses precomputed rank orders.
+    """
+
+    def __init__(self, monsters: Iterable[Dict[str, Any]], load_detail: Callable[[int], Optional[bytes]]):
+        monsters = sorted(monsters, key=lambda m: m['id'])
+        self._load_detail = load_detail
+        n = len(monsters)
+        self.races, self.elements, self.sizes = _Codes(), _Codes(), _Codes()
+
+        self.ids = array('l', (m['id'] for m in monsters))
+        self.names = [m['name'] for m in monsters]
+        self.element_labels = [m.get('element') or '' for m in monsters]
+        self.levels = array('l', (m.get('level') or 0 for m in monsters))
+        self.hps = array('q', (m.get('hp') or 0 for m in monsters))
+        self.base_exp = array('q', (m.get('baseExp') or 0 for m in monsters))
+        self.job_exp = array('q', (m.get('jobExp') or 0 for m in monsters))
+        self.race_codes = array('B', (self.races.code(m.get('race') or '') for m in monsters))
+        self.element_codes = array('B', (self.elements.code(base_element(m.get('element'))) for m in monsters))
+        self.size_codes = array('B', (self.sizes.code(m.get('size') or '') for m in monsters))
+        self.is_mvp = bytearray(bool(m.get('isMVP')) for m in monsters)
+        self.has_skills = bytearray(bool(m.get('hasSkills')) for m in monsters)
+        self.row_by_id = {monster_id: row for row, monster_id in enumerate(self.ids)}
+
+        # --- Indexes ---
+        self.by_race = self._group(self.race_codes)
+        self.by_element = self._group(self.element_codes)
+        self.by_size = self._group(self.size_codes)
+        self.mvp_rows = frozenset(row for row in range(n) if self.is_mvp[row])
+        self.dummy_rows = frozenset(row for row in range(n) if not self.has_skills[row])
+        self.zero_exp_rows = frozenset(row for row in range(n) if not self.base_exp[row] and not self.job_exp[row])
+
+        # Substring search over "name\0id": trigram postings narrow queries of
+        # 3+ chars; shorter ones scan the (small) text column directly
+        self.search_text = [f"{name.lower()}\0{monster_id}" for name, monster_id in zip(self.names, self.ids)]
+        trigrams: Dict[str, List[int]] = {}
+        for row, text in enumerate(self.search_text):
+            for gram in _trigrams(text):
+                trigrams.setdefault(gram, []).append(row)
+        self.trigrams = {gram: frozenset(rows) for gram, rows in trigrams.items()}
+
+        # Range indexes: (value, row) sorted by value
+        self.level_sorted = sorted((level, row) for row, level in enumerate(self.levels))
+        self.hp_sorted = sorted((hp, row) for row, hp in enumerate(self.hps))
+
+        # Sort orders and per-row ranks for every sort key
+        columns = {
+            'id': self.ids, 'level': self.levels, 'hp': self.hps,
+            'baseExp': self.base_exp, 'jobExp': self.job_exp,
+            'name': [name.lower() for name in self.names],
+        }
+        self.orders: Dict[str, List[int]] = {}
+        self.ranks: Dict[str, array] = {}
+        for key, column in columns.items():
+            order = sorted(range(n), key=lambda row: (column[row], self.ids[row]))
+            rank = array('l', [0]) * n
+            for position, row in enumerate(order):
+                rank[row] = position
+            self.orders[key] = order
+            self.ranks[key] = rank
+
+    @staticmethod
+    def _group(codes: array) -> Dict[int, frozenset]:
+        groups: Dict[int, List[int]] = {}
+        for row, code in enumerate(codes):
+            groups.setdefault(code, []).append(row)
+        return {code: frozenset(rows) for code, rows in groups.items()}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # --- Lookups ---
+
+    def facets(self) -> Dict[str, List[str]]:
+        return {
+            'race': sorted(name for name in self.races.names if name),
+            'element': sorted(name for name in self.elements.names if name),
+            'size': sorted(name for name in self.sizes.names if name),
+        }
+
+    def summary(self, row: int) -> Dict[str, Any]:
+        return {
+            'id': self.ids[row],
+            'name': self.names[row],
+            'level': self.levels[row],
+            'hp': self.hps[row],
+            'race': self.races.names[self.race_codes[row]],
+            'element': self.element_labels[row],
+            'size': self.sizes.names[self.size_codes[row]],
+            'isMVP': bool(self.is_mvp[row]),
+            'baseExp': self.base_exp[row],
+            'jobExp': self.job_exp[row],
+        }
+
+    def detail_json(self, monster_id: int) -> Optional[bytes]:
+        if monster_id not in self.row_by_id:
+            return None
+        return self._load_detail(monster_id)
+
+    # --- Search ---
+
+    def _text_rows(self, text: str) -> Set[int]:
+        text = text.lower()
+        if len(text) < 3:
+            return {row for row, haystack in enumerate(self.search_text) if text in haystack}
+        # Intersect trigram postings (smallest first), then confirm the substring
+        postings = sorted((self.trigrams.get(gram, frozenset()) for gram in _trigrams(text)), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                break
+        return {row for row in candidates if text in self.search_text[row]}
+
+    @staticmethod
+    def _range_rows(index: List[Tuple[int, int]], low: Optional[int], high: Optional[int]) -> Set[int]:
+        start = 0 if low is None else bisect_left(index, (low, -1))
+        end = len(index) if high is None else bisect_right(index, (high, len(index)))
+        return {row for _, row in index[start:end]}
+
+    def _category_rows(self, names: List[str], codes: _Codes, groups: Dict[int, frozenset]) -> Set[int]:
+        rows: Set[int] = set()
+        for name in names:
+            code = codes.lookup(name)
+            if code is not None:
+                rows |= groups[code]
+        return rows
+
+    def query(self, q: str = '', race: List[str] = (), element: List[str] = (), size: List[str] = (),
+              mvp: bool = False, hide_dummies: bool = False, hide_zero_exp: bool = False,
+              min_level: Optional[int] = None, max_level: Optional[int] = None,
+              min_hp: Optional[int] = None, max_hp: Optional[int] = None,
+              sort: str = 'level', descending: bool = False,
+              offset: int = 0, limit: int = 24) -> Tuple[int, List[Dict[str, Any]]]:
+        """Returns (total matches, summaries of the requested page)."""
+        if sort not in self.orders:
+            raise ValueError(f"Unknown sort key: {sort}")
+
+        # Positive filters narrow a candidate set, intersected smallest first
+        filters: List[Set[int]] = []
+        if q:
+            filters.append(self._text_rows(q))
+        if race:
+            filters.append(self._category_rows(race, self.races, self.by_race))
+        if element:
+            filters.append(self._category_rows(element, self.elements, self.by_element))
+        if size:
+            filters.append(self._category_rows(size, self.sizes, self.by_size))
+        if mvp:
+            filters.append(self.mvp_rows)
+        if min_level is not None or max_level is not None:
+            filters.append(self._range_rows(self.level_sorted, min_level, max_level))
+        if min_hp is not None or max_hp is not None:
+            filters.append(self._range_rows(self.hp_sorted, min_hp, max_hp))
+
+        excluded: Set[int] = set()
+        if hide_dummies:
+            excluded |= self.dummy_rows
+        if hide_zero_exp:
+            excluded |= self.zero_exp_rows
+
+        order = self.orders[sort]
+        if filters:
+            filters.sort(key=len)
+            candidates = set(filters[0])
+            for rows in filters[1:]:
+                candidates &= rows
+            candidates -= excluded
+            rank = self.ranks[sort]
+            rows = sorted(candidates, key=rank.__getitem__, reverse=descending)
+        else:
+            # No positive filter: walk the precomputed order
+            ordered = reversed(order) if descending else order
+            rows = [row for row in ordered if row not in excluded] if excluded else list(ordered)
+
+        return len(rows), [self.summary(row) for row in rows[offset:offset + limit]]
+
+
+_lock = threading.Lock()
+_instance: Optional[MonsterDB] = None
+
+
+def shards_dir() -> str:
+    return os.getenv('MONSTER_SHARDS_DIR') or SHARDS_DIR
+
+
+def data_path() -> str:
+    override = os.getenv('MONSTERS_DATA_PATH')
+    if override:
+        return override
+    for path in DATA_PATHS:
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError("monsters.json not found; set MONSTERS_DATA_PATH")
+
+
+def get_monster_db() -> MonsterDB:
+    """
+    Indexes the dataset once per process, on first use. Reads the built
+    summary (details stay on disk, one file per monster) when available,
+    otherwise normalizes monsters.json in memory.
+    """
+    global _instance
+    if _instance is None:
+        with _lock:
+            if _instance is None:
+                _instance = _load()
+    return _instance
+
+
+def _load() -> MonsterDB:
+    shards = MonsterShards(shards_dir())
+    if os.path.exists(os.path.join(shards.root, 'summary.json')):
+        return MonsterDB(shards.summaries(), shards.detail_json)
+    with open(data_path(), 'rb') as f:
+        monsters = json.load(f)
+    details = {monster['id']: encode(normalize(monster)) for monster in monsters}
+    return MonsterDB([summarize(monster) for monster in monsters], details.get)
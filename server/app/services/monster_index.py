@@ -0,0 +1,231 @@
+"""
+Reverse indexes over monsters.json: item id -> monsters that drop it, and
+map code -> monsters that spawn there.
+
+Built once (python -m app.services.monster_index) into a compact binary file
+that is mmap-ed at runtime and binary-searched in place, so a lookup touches
+a few pages of the file and never parses JSON.
+
+Layout (little-endian):
+    header   magic 'BFMI', u16 version, u16 reserved, then (offset, count)
+             u32 pairs for each section below
+    items    (item_id, name_off, name_len, start, n)    sorted by item_id
+    drops    (chance_ppm, mob_id, name_off, name_len, is_mvp)
+                                                        per item, by chance desc
+    maps     (code_off, code_len, start, n)             sorted by code bytes
+    spawns   (count, mob_id, name_off, name_len, is_mvp)
+                                                        per map, by count desc
+    strings  utf-8 names and map codes
+
+Entries carry the monster's name inline so a lookup never needs a second search.
+"""
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from .monster_db import _SERVER_DIR, data_path
+from .monster_shards import _PPM, parse_chance
+
+INDEX_PATHS = (os.path.join(_SERVER_DIR, 'data', 'monster_index.bin'),)
+
+MAGIC = b'BFMI'
+VERSION = 1
+SECTIONS = ('items', 'drops', 'maps', 'spawns', 'strings')
+
+_HEADER = struct.Struct('<4sHH' + 'II' * len(SECTIONS))
+_ITEM = struct.Struct('<IIHxxII')
+_ENTRY = struct.Struct('<IIIHBx')
+_MAP = struct.Struct('<IHxxII')
+_U32 = struct.Struct('<I')
+
+# Drop chances are stored as parts per million (monster_shards.parse_chance): 0.01% -> 100
+_SPAWN_COUNT_RE = re.compile(r'\((\d+)\)\s*$')
+
+
+def parse_spawn_count(spawn: Dict[str, Any]) -> int:
+    """'moc_fild17(5)' -> 5; 0 when the dataset doesn't say (instances, events)"""
+    match = _SPAWN_COUNT_RE.search(spawn.get('mapName') or '')
+    if match:
+        return int(match.group(1))
+    return int(spawn.get('spawnAmount') or 0)
+
+
+def build(monsters: Iterable[Dict[str, Any]]) -> bytes:
+    """Serializes the reverse indexes for `monsters` into the binary format above."""
+    strings = bytearray()
+    string_offsets: Dict[str, tuple] = {}
+
+    def intern(text: str) -> tuple:
+        if text not in string_offsets:
+            encoded = text.encode('utf-8')
+            string_offsets[text] = (len(strings), len(encoded))
+            strings.extend(encoded)
+        return string_offsets[text]
+
+    mobs = {}
+    item_names: Dict[int, str] = {}
+    # item_id -> {mob_id: chance of *not* dropping}; a mob listing an item twice rolls twice
+    misses: Dict[int, Dict[int, float]] = {}
+    spawns: Dict[str, Dict[int, int]] = {}
+    for monster in monsters:
+        mob_id = monster['id']
+        mobs[mob_id] = monster
+        for drop in monster.get('drops') or []:
+            item_id = drop['itemId']
+            item_names.setdefault(item_id, drop.get('itemName') or '')
+            by_mob = misses.setdefault(item_id, {})
+            by_mob[mob_id] = by_mob.get(mob_id, 1.0) * (1 - parse_chance(drop['dropChance']) / _PPM)
+        for spawn in monster.get('maps') or []:
+            code = spawn.get('mapCode')
+            if code:
+                by_mob = spawns.setdefault(code, {})
+                by_mob[mob_id] = by_mob.get(mob_id, 0) + parse_spawn_count(spawn)
+
+    def entry(value: int, mob_id: int) -> bytes:
+        return _ENTRY.pack(value, mob_id, *intern(mobs[mob_id]['name']), bool(mobs[mob_id].get('isMVP')))
+
+    item_rows, drop_rows = [], []
+    for item_id in sorted(misses):
+        ranked = sorted(((round((1 - miss) * _PPM), mob_id) for mob_id, miss in misses[item_id].items()),
+                        key=lambda ranked_entry: (-ranked_entry[0], ranked_entry[1]))
+        item_rows.append(_ITEM.pack(item_id, *intern(item_names[item_id]), len(drop_rows), len(ranked)))
+        drop_rows.extend(entry(*ranked_entry) for ranked_entry in ranked)
+
+    map_rows, spawn_rows = [], []
+    for code in sorted(spawns, key=lambda c: c.encode('utf-8')):
+        ranked = sorted(((count, mob_id) for mob_id, count in spawns[code].items()),
+                        key=lambda ranked_entry: (-ranked_entry[0], ranked_entry[1]))
+        map_rows.append(_MAP.pack(*intern(code), len(spawn_rows), len(ranked)))
+        spawn_rows.extend(entry(*ranked_entry) for ranked_entry in ranked)
+
+    bodies = [
+        (b''.join(item_rows), len(item_rows)),
+        (b''.join(drop_rows), len(drop_rows)),
+        (b''.join(map_rows), len(map_rows)),
+        (b''.join(spawn_rows), len(spawn_rows)),
+        (bytes(strings), len(strings)),
+    ]
+    directory, offset = [], _HEADER.size
+    for body, count in bodies:
+        directory += [offset, count]
+        offset += len(body)
+    return _HEADER.pack(MAGIC, VERSION, 0, *directory) + b''.join(body for body, _ in bodies)
+
+
+class MonsterIndex:
+    """Read-only view over a built index (bytes or an mmap)."""
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        magic, version, _, *directory = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a monster index (or built by another version)")
+        self._sections = {name: (directory[2 * i], directory[2 * i + 1]) for i, name in enumerate(SECTIONS)}
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._sections['strings'][0] + offset
+        return bytes(self._buffer[start:start + length]).decode('utf-8')
+
+    def _find(self, section: str, row: struct.Struct, key) -> Optional[int]:
+        """Binary search for the row whose leading u32 equals `key`; returns its byte offset."""
+        base, count = self._sections[section]
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = _U32.unpack_from(self._buffer, base + mid * row.size)[0]
+            if value < key:
+                lo = mid + 1
+            elif value > key:
+                hi = mid
+            else:
+                return base + mid * row.size
+        return None
+
+    def _find_map(self, code: bytes) -> Optional[int]:
+        base, count = self._sections['maps']
+        strings = self._sections['strings'][0]
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            code_off, code_len, _, _ = _MAP.unpack_from(self._buffer, base + mid * _MAP.size)
+            value = bytes(self._buffer[strings + code_off:strings + code_off + code_len])
+            if value < code:
+                lo = mid + 1
+            elif value > code:
+                hi = mid
+            else:
+                return base + mid * _MAP.size
+        return None
+
+    def _entries(self, section: str, start: int, count: int, limit: Optional[int]):
+        """Yields (value, {'id', 'name', 'isMVP'}) for the first `limit` entries of a run."""
+        base = self._sections[section][0] + start * _ENTRY.size
+        for i in range(count if limit is None else min(count, limit)):
+            value, mob_id, name_off, name_len, is_mvp = _ENTRY.unpack_from(self._buffer, base + i * _ENTRY.size)
+            yield value, {'id': mob_id, 'name': self._string(name_off, name_len), 'isMVP': bool(is_mvp)}
+
+    def droppers(self, item_id: int, limit: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Monsters dropping `item_id`, highest chance (in %) first; None for an unknown item."""
+        position = self._find('items', _ITEM, item_id)
+        if position is None:
+            return None
+        _, name_off, name_len, start, count = _ITEM.unpack_from(self._buffer, position)
+        droppers = [{**mob, 'chance': ppm * 100 / _PPM} for ppm, mob in self._entries('drops', start, count, limit)]
+        return {'itemId': item_id, 'itemName': self._string(name_off, name_len), 'total': count, 'droppers': droppers}
+
+    def map_monsters(self, map_code: str, limit: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Monsters spawning on `map_code`, most numerous first; None for an unknown map."""
+        position = self._find_map(map_code.encode('utf-8'))
+        if position is None:
+            return None
+        _, _, start, count = _MAP.unpack_from(self._buffer, position)
+        monsters = [{**mob, 'count': spawned} for spawned, mob in self._entries('spawns', start, count, limit)]
+        return {'mapCode': map_code, 'total': count, 'monsters': monsters}
+
+
+_lock = threading.Lock()
+_instance: Optional[MonsterIndex] = None
+
+
+def index_path() -> str:
+    return os.getenv('MONSTER_INDEX_PATH') or INDEX_PATHS[0]
+
+
+def get_monster_index() -> MonsterIndex:
+    """
+    Maps the prebuilt index file on first use. If it hasn't been built (local
+    dev), builds it in memory from monsters.json instead.
+    """
+    global _instance
+    if _instance is None:
+        with _lock:
+            if _instance is None:
+                path = index_path()
+                if os.path.exists(path):
+                    with open(path, 'rb') as f:
+                        _instance = MonsterIndex(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+                else:
+                    print(f"Monster index {path} not found; building it in memory")
+                    with open(data_path(), 'rb') as f:
+                        _instance = MonsterIndex(build(json.load(f)))
+    return _instance
+
+
+def main(argv: List[str]) -> None:
+    source = argv[0] if argv else data_path()
+    target = argv[1] if len(argv) > 1 else index_path()
+    with open(source, 'rb') as f:
+        data = build(json.load(f))
+    os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+    with open(target, 'wb') as f:
+        f.write(data)
+    print(f"Wrote {target} ({len(data)} bytes)")
+
+
+if __name__ == '__main__':
+    import sys
+    main(sys.argv[1:])
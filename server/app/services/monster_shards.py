@@ -0,0 +1,156 @@
+"""
+Build step splitting monsters.json into a columnar summary plus one detail
+shard per monster, with numeric strings normalized to numbers:
+
+    summary.json        {"id": [...], "name": [...], ...}   one array per SUMMARY_FIELDS
+    <id>.json           full normalized record of one monster
+
+Every file is also written precompressed (.gz, and .br when the brotli
+package is installed) so nginx can serve them with gzip_static.
+
+Run from server/: python -m app.services.monster_shards [source.json] [out_dir]
+"""
+import gzip
+import json
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SUMMARY_FIELDS = ('id', 'name', 'level', 'hp', 'race', 'element', 'size', 'isMVP',
+                  'baseExp', 'jobExp', 'hasSkills')
+# "1,564 ms" fields, stored as integer milliseconds
+MS_FIELDS = ('attackDelay', 'attackMotion', 'delayMotion')
+
+_NUMBER_RE = re.compile(r'-?\d+(?:\.\d+)?')
+# Drop chance resolution, shared with the monster_index build: 0.01% -> 100, 100% -> 1_000_000
+_PPM = 1_000_000
+
+
+def _number(text: str):
+    """'1,564 ms' -> 1564, '3.5%' -> 3.5; None if there is no number"""
+    match = _NUMBER_RE.search(str(text).replace(',', ''))
+    if match is None:
+        return None
+    value = float(match.group())
+    return int(value) if value.is_integer() else value
+
+
+def parse_chance(chance: str) -> int:
+    """'3.5%' -> 35000 (ppm)"""
+    return round(float(chance.strip().rstrip('%')) * _PPM / 100)
+
+
+def _percent(ppm: int):
+    value = ppm * 100 / _PPM
+    return int(value) if value.is_integer() else value
+
+
+def normalize(monster: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns a copy with attack "80~135" -> [80, 135], delays -> ms ints and
+    drop chances "3.5%" -> 3.5 (percent, rounded to parse_chance's ppm like the
+    drop index).
+    """
+    record = dict(monster)
+    attack = record.get('attack')
+    if isinstance(attack, str):
+        bounds = [_number(part) for part in attack.split('~')]
+        record['attack'] = [bounds[0], bounds[-1]]
+    for field in MS_FIELDS:
+        if isinstance(record.get(field), str):
+            record[field] = _number(record[field])
+    if record.get('drops'):
+        record['drops'] = [
+            {**drop, 'dropChance': _percent(parse_chance(drop['dropChance']))}
+            if isinstance(drop.get('dropChance'), str) else drop
+            for drop in record['drops']
+        ]
+    return record
+
+
+def summarize(monster: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'id': monster['id'],
+        'name': monster['name'],
+        'level': monster.get('level') or 0,
+        'hp': monster.get('hp') or 0,
+        'race': monster.get('race') or '',
+        'element': monster.get('element') or '',
+        'size': monster.get('size') or '',
+        'isMVP': bool(monster.get('isMVP')),
+        'baseExp': monster.get('baseExp') or 0,
+        'jobExp': monster.get('jobExp') or 0,
+        'hasSkills': bool(monster.get('skills')),
+    }
+
+
+def encode(record) -> bytes:
+    return json.dumps(record, separators=(',', ':')).encode('utf-8')
+
+
+def _write(path: str, data: bytes) -> None:
+    with open(path, 'wb') as f:
+        f.write(data)
+    # mtime=0 keeps the .gz bytes stable across builds
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(data))
+
+
+def build(monsters: Iterable[Dict[str, Any]], out_dir: str) -> int:
+    """Writes summary.json and <id>.json shards into out_dir. Returns the monster count."""
+    monsters = sorted(monsters, key=lambda m: m['id'])
+    os.makedirs(out_dir, exist_ok=True)
+    summaries = [summarize(monster) for monster in monsters]
+    columns = {field: [summary[field] for summary in summaries] for field in SUMMARY_FIELDS}
+    _write(os.path.join(out_dir, 'summary.json'), encode(columns))
+    for monster in monsters:
+        _write(os.path.join(out_dir, f"{monster['id']}.json"), encode(normalize(monster)))
+    return len(monsters)
+
+
+class MonsterShards:
+    """Reads a built shard directory; detail() opens only the one monster's file."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def summary_columns(self) -> Dict[str, List[Any]]:
+        with open(os.path.join(self.root, 'summary.json'), 'rb') as f:
+            return json.load(f)
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        columns = self.summary_columns()
+        return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+    def detail_json(self, monster_id: int) -> Optional[bytes]:
+        try:
+            with open(os.path.join(self.root, f"{int(monster_id)}.json"), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def detail(self, monster_id: int) -> Optional[Dict[str, Any]]:
+        body = self.detail_json(monster_id)
+        return None if body is None else json.loads(body)
+
+
+def main(argv: List[str]) -> None:
+    from .monster_db import data_path, shards_dir
+    source = argv[0] if argv else data_path()
+    out_dir = argv[1] if len(argv) > 1 else shards_dir()
+    with open(source, 'rb') as f:
+        count = build(json.load(f), out_dir)
+    print(f"Wrote {count} monster shards to {out_dir}{'' if brotli else ' (brotli not installed: .gz only)'}")
+
+
+if __name__ == '__main__':
+    import sys
+    main(sys.argv[1:])
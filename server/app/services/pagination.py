@@ -0,0 +1,116 @@
+import base64
+import json
+import re
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from firebase_functions import https_fn
+
+from . import serializer
+
+MAX_PAGE_SIZE = 500
+
+# Projection is limited to plain top-level field names
+_FIELD_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+class ListParams(NamedTuple):
+    fields: Optional[List[str]] = None
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
+
+    @property
+    def is_default(self) -> bool:
+        """True for a plain full-list request (no projection, no paging)."""
+        return self.fields is None and self.limit is None and self.cursor is None
+
+
+def encode_cursor(doc_id: str) -> str:
+    return base64.urlsafe_b64encode(doc_id.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+def _valid_doc_id(doc_id) -> bool:
+    return isinstance(doc_id, str) and bool(doc_id) and '/' not in doc_id
+
+
+def encode_time_cursor(at: datetime, doc_id: str) -> str:
+    """Cursor after the document `doc_id` of a query ordered by a timestamp field, then id."""
+    return encode_cursor(json.dumps([at.isoformat(), doc_id]))
+
+
+def decode_time_cursor(cursor: str) -> Tuple[datetime, str]:
+    """(timestamp, document id) of an encode_time_cursor cursor; raises ValueError for anything else."""
+    try:
+        at, doc_id = json.loads(decode_cursor(cursor))
+        at = datetime.fromisoformat(at)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not _valid_doc_id(doc_id):
+        raise ValueError("Invalid cursor")
+    return at, doc_id
+
+
+def parse_list_params(req: https_fn.Request) -> ListParams:
+    """
+    Reads ?fields=a,b&limit=N&cursor=... from the query string.
+    Raises ValueError on anything malformed.
+    """
+    fields = req.args.get('fields')
+    if fields is not None:
+        fields = [f.strip() for f in fields.split(',') if f.strip()]
+        bad = [f for f in fields if not _FIELD_RE.match(f)]
+        if bad or not fields:
+            raise ValueError(f"Invalid fields: {', '.join(bad) or '(empty)'}")
+
+    limit = req.args.get('limit')
+    if limit is not None:
+        if not limit.isdigit() or not 0 < int(limit) <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        limit = int(limit)
+
+    cursor = req.args.get('cursor') or None
+    if cursor is not None:
+        decode_cursor(cursor)
+
+    return ListParams(fields, limit, cursor)
+
+
+def query_page(collection_ref, params: ListParams, serialize: Callable) -> Tuple[list, Optional[str]]:
+    """
+    Runs one page of `collection_ref` ordered by document id, with the
+    projection pushed down to Firestore (select) and the cursor applied
+    with start_after. Returns (serialized docs, next cursor or None).
+    Raises ValueError for a cursor that isn't a document id.
+    """
+    query = collection_ref
+    if params.fields:
+        query = query.select(params.fields)
+    query = query.order_by('__name__')
+    if params.cursor:
+        doc_id = decode_cursor(params.cursor)
+        if not _valid_doc_id(doc_id):
+            raise ValueError("Invalid cursor")
+        query = query.start_after({'__name__': doc_id})
+    if params.limit:
+        query = query.limit(params.limit)
+
+    docs = list(query.stream())
+    items = [serialize(doc) for doc in docs]
+    # A full page means there may be more; the last page can come back empty
+    next_cursor = encode_cursor(docs[-1].id) if params.limit and len(docs) == params.limit else None
+    return items, next_cursor
+
+
+def page_response(headers: dict, items: list, next_cursor: Optional[str]) -> https_fn.Response:
+    """JSON list response, encoded as it streams out; the cursor for the next page goes in X-Next-Cursor."""
+    page_headers = {**headers, 'Access-Control-Expose-Headers': 'X-Next-Cursor'}
+    if next_cursor:
+        page_headers['X-Next-Cursor'] = next_cursor
+    return https_fn.Response(serializer.list_chunks(items), headers=page_headers)
@@ -0,0 +1,73 @@
+import heapq
+import threading
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+
+class RespawnSchedule:
+    """
+    Min-heap of dead MVP locations keyed on respawn window start.
+
+    Entries are replaced lazily: updating a location pushes a new heap item
+    and the old one is skipped when it surfaces, so updates are O(log n) and
+    queries only touch the entries they return.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime, datetime, str]] = []
+        # mvp_id -> (window_start, window_end) of the live heap entry
+        self._windows: Dict[str, Tuple[datetime, datetime]] = {}
+        self._lock = threading.Lock()
+
+    def rebuild(self, windows: Dict[str, Tuple[datetime, datetime]]) -> None:
+        """Replaces the whole schedule, e.g. after a snapshot reload."""
+        heap = [(start, end, mvp_id) for mvp_id, (start, end) in windows.items()]
+        heapq.heapify(heap)
+        with self._lock:
+            self._heap = heap
+            self._windows = dict(windows)
+
+    def update(self, mvp_id: str, start: datetime, end: datetime) -> None:
+        with self._lock:
+            if self._windows.get(mvp_id) == (start, end):
+                return
+            self._windows[mvp_id] = (start, end)
+            heapq.heappush(self._heap, (start, end, mvp_id))
+
+    def remove(self, mvp_id: str) -> None:
+        with self._lock:
+            self._windows.pop(mvp_id, None)
+
+    def _pop_until(self, limit: datetime) -> List[Tuple[datetime, datetime, str]]:
+        """Pops every live entry starting at or before `limit`, in order. Caller holds the lock."""
+        popped = []
+        while self._heap and self._heap[0][0] <= limit:
+            start, end, mvp_id = heapq.heappop(self._heap)
+            if self._windows.get(mvp_id) == (start, end):
+                popped.append((start, end, mvp_id))
+        return popped
+
+    def upcoming(self, now: datetime, horizon: datetime) -> List[Tuple[str, datetime, datetime]]:
+        """
+        Returns (mvp_id, window_start, window_end) for every location whose
+        window opens before `horizon` and has not closed yet, soonest first.
+        """
+        with self._lock:
+            popped = self._pop_until(horizon)
+            for item in popped:
+                heapq.heappush(self._heap, item)
+        return [(mvp_id, start, end) for start, end, mvp_id in popped if end > now]
+
+    def pop_expired(self, now: datetime) -> List[str]:
+        """Removes and returns the ids of locations whose window closed by `now`."""
+        with self._lock:
+            if not self._heap or self._heap[0][0] > now:
+                return []
+            expired = []
+            for start, end, mvp_id in self._pop_until(now):
+                if end <= now:
+                    del self._windows[mvp_id]
+                    expired.append(mvp_id)
+                else:
+                    heapq.heappush(self._heap, (start, end, mvp_id))
+            return expired
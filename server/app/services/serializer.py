@@ -0,0 +1,89 @@
+"""
+Firestore documents -> UTF-8 JSON in one pass.
+
+Values Firestore hands back (timestamps incl. DatetimeWithNanoseconds,
+GeoPoints, document references, bytes) are converted by the encoder's
+default hook while it walks the document, so handlers pass documents
+through as they come instead of patching fields first:
+
+    datetime / timestamp  -> ISO-8601 string
+    GeoPoint              -> {"latitude": ..., "longitude": ...}
+    DocumentReference     -> document path ("mvps/abc")
+    bytes                 -> base64 string
+    NaN / Infinity        -> null (as orjson does; they aren't valid JSON)
+
+orjson is used when installed, else the standard library encoder.
+"""
+import base64
+import json
+import math
+from datetime import date, datetime
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from google.cloud.firestore_v1 import DocumentReference, GeoPoint
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# list_chunks yields once this many bytes of elements have accumulated
+CHUNK_BYTES = 64 * 1024
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, GeoPoint):
+        return {'latitude': value.latitude, 'longitude': value.longitude}
+    if isinstance(value, DocumentReference):
+        return value.path
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode('ascii')
+    # Anything else unexpected still renders rather than failing the response
+    return str(value)
+
+
+_encoder = json.JSONEncoder(default=_default, separators=(',', ':'), ensure_ascii=False, allow_nan=False)
+
+
+def _finite(value: Any) -> Any:
+    """Copy of `value` with NaN/Infinity floats replaced by None (they never reach _default)."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def dumps(value: Any) -> bytes:
+    """`value` (documents, lists of them, plain data) as UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    try:
+        return _encoder.encode(value).encode('utf-8')
+    except ValueError:
+        # Rare: a non-finite float somewhere; encode again without it
+        return _encoder.encode(_finite(value)).encode('utf-8')
+
+
+def list_chunks(items: Iterable[Any], serialize: Optional[Callable[[Any], Any]] = None) -> Iterator[bytes]:
+    """
+    A JSON array encoded element by element, for a streamed response: the
+    output is produced in CHUNK_BYTES pieces, so a large collection is never
+    held as one string. `serialize` (e.g. doc -> dict) is applied lazily.
+    """
+    buffer = bytearray(b'[')
+    first = True
+    for item in items:
+        if not first:
+            buffer += b','
+        first = False
+        buffer += dumps(serialize(item) if serialize else item)
+        if len(buffer) >= CHUNK_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b']'
+    yield bytes(buffer)
@@ -0,0 +1,39 @@
+import random
+from typing import Dict, Iterable, List
+
+from firebase_admin import firestore
+
+
+class ShardedCounter:
+    """
+    A set of named counters spread over `shards` documents of a subcollection
+    (parent/<name>/0 .. parent/<name>/N-1).
+
+    Each increment goes to a random shard, so a burst of concurrent writers
+    lands on different documents instead of contending for one. Reading the
+    totals is a fixed `shards` document reads, however many increments there
+    were. Increments are added to a caller's WriteBatch so they commit
+    atomically with the write they count.
+    """
+
+    def __init__(self, parent_ref, shards: int, name: str = 'counters'):
+        self.parent_ref = parent_ref
+        self.shards = shards
+        self.name = name
+
+    def refs(self) -> List:
+        collection = self.parent_ref.collection(self.name)
+        return [collection.document(str(i)) for i in range(self.shards)]
+
+    def increment(self, batch, field: str, amount: int = 1) -> None:
+        shard = self.parent_ref.collection(self.name).document(str(random.randrange(self.shards)))
+        batch.set(shard, {field: firestore.Increment(amount)}, merge=True)
+
+    @staticmethod
+    def total(snapshots: Iterable) -> Dict[str, int]:
+        """Sums shard snapshots (missing shards count as zero)."""
+        totals: Dict[str, int] = {}
+        for snapshot in snapshots:
+            for field, value in (snapshot.to_dict() or {}).items():
+                totals[field] = totals.get(field, 0) + (value or 0)
+        return totals
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import serializer
+from .singleflight import SingleFlight
+
+
+class SnapshotCache:
+    """
+    In-process snapshot of a whole Firestore collection.
+
+    Reads are served from memory until the snapshot is older than `ttl`
+    seconds, after which the next read reloads it. Writes made through this
+    instance are applied in place (write-through) so the local snapshot never
+    goes stale because of our own writes. The TTL bounds how long a write made
+    by another backend instance can stay invisible here.
+
+    Concurrent misses share one reload (single-flight), so an expired
+    snapshot hit by a burst of requests costs one collection read, not one
+    per request. The flight is keyed by version: a request arriving after
+    a local write never gets a reload that started before it.
+    """
+
+    def __init__(self, name: str, ttl: Optional[float] = None,
+                 on_reload: Optional[Callable[[Dict[str, Dict[str, Any]]], None]] = None):
+        self.name = name
+        # Called with the fresh documents after every reload from Firestore
+        self.on_reload = on_reload
+        if ttl is None:
+            ttl = float(os.getenv('SNAPSHOT_CACHE_TTL', '30'))
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # Bumped on every local write; lets a reload started before a write
+        # detect that its result is already outdated.
+        self.version = 0
+        self._docs: Optional[Dict[str, Dict[str, Any]]] = None
+        self._list: Optional[List[Dict[str, Any]]] = None
+        # Serialized form of _list and its content hash, built on demand
+        self._body: Optional[Tuple[bytes, str]] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._flight = SingleFlight(f'snapshot:{name}')
+
+    def _fresh(self) -> bool:
+        return self._docs is not None and (time.monotonic() - self._loaded_at) < self.ttl
+
+    def get_all(self, loader: Callable[[], Dict[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Returns every document in the collection, ordered by id.
+        `loader` is called on a miss and must return a dict of id -> document.
+        """
+        with self._lock:
+            if self._fresh():
+                self.hits += 1
+                if self._list is None:
+                    self._list = [self._docs[k] for k in sorted(self._docs)]
+                return self._list
+            self.misses += 1
+            version = self.version
+        return self._flight.do(('load', version), lambda: self._load(loader, version))
+
+    def _load(self, loader: Callable[[], Dict[str, Dict[str, Any]]], version: int) -> List[Dict[str, Any]]:
+        docs = loader()
+        snapshot = [docs[k] for k in sorted(docs)]
+
+        with self._lock:
+            # Only keep the load if no local write raced with it
+            stored = self.version == version
+            if stored:
+                self._docs = docs
+                self._list = snapshot
+                self._body = None
+                self._loaded_at = time.monotonic()
+        if stored and self.on_reload:
+            self.on_reload(docs)
+        return snapshot
+
+    def get_body(self, loader: Callable[[], Dict[str, Dict[str, Any]]],
+                 encode: Optional[Callable[[List[Dict[str, Any]]], bytes]] = None) -> Tuple[bytes, str]:
+        """
+        Returns the collection as serialized JSON bytes plus a strong ETag.
+        The bytes are reused until the snapshot changes, so repeated reads
+        skip both Firestore and encoding (serializer.dumps unless `encode`).
+        """
+        with self._lock:
+            if self._fresh() and self._body is not None:
+                self.hits += 1
+                return self._body
+            version = self.version
+        return self._flight.do(('body', version), lambda: self._encode(loader, encode))
+
+    def _encode(self, loader: Callable[[], Dict[str, Dict[str, Any]]],
+                encode: Optional[Callable[[List[Dict[str, Any]]], bytes]]) -> Tuple[bytes, str]:
+        snapshot = self.get_all(loader)
+        body = (encode or serializer.dumps)(snapshot)
+        result = (body, '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest())
+
+        with self._lock:
+            # Memoize only if the snapshot we encoded is still the current one
+            if self._list is snapshot:
+                self._body = result
+        return result
+
+    def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Returns a single cached document, or None if unknown or stale."""
+        with self._lock:
+            if not self._fresh():
+                return None
+            return self._docs.get(doc_id)
+
+    def put(self, doc_id: str, data: Dict[str, Any]) -> None:
+        """Write-through: replaces (or adds) one document in the snapshot."""
+        with self._lock:
+            self.version += 1
+            if self._docs is not None:
+                self._docs[doc_id] = data
+                self._list = None
+                self._body = None
+
+    def invalidate(self) -> None:
+        """Drops the snapshot so the next read reloads from Firestore."""
+        with self._lock:
+            self.version += 1
+            self._docs = None
+            self._list = None
+            self._body = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'name': self.name,
+                'hits': self.hits,
+                'misses': self.misses,
+                'version': self.version,
+                'size': len(self._docs) if self._docs is not None else 0,
+                'age': (time.monotonic() - self._loaded_at) if self._docs is not None else None,
+                'ttl': self.ttl,
+                'coalesced': self._flight.coalesced,
+            }
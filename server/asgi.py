@@ -0,0 +1,145 @@
+"""
+ASGI entry point serving the same API as main.api.
+
+    uvicorn asgi:app --app-dir server --port 8000
+
+The event loop owns the connections: request bodies (e.g. avatar uploads)
+are received asynchronously and only handed to a worker thread once
+complete, so a slow client no longer ties up a worker. Handlers from
+app/routes are reused unchanged and run on a bounded thread pool
+(ASGI_THREADS). Streaming responses (/mvps/stream) are pulled chunk by
+chunk on the pool and closed when the client disconnects.
+"""
+import asyncio
+import io
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from flask import Flask, request
+
+# Read by app/services/event_stream.py to size the /mvps/stream cap from THREADS;
+# set before importing main, which builds the /mvps/stream broadcaster
+os.environ.setdefault('SERVER_MODE', 'asgi')
+
+import main  # noqa: E402
+
+# Worker threads running route handlers; also bounds concurrent Firestore calls
+THREADS = int(os.getenv('ASGI_THREADS', '64'))
+# Request bodies larger than this are spooled to disk while being received
+_SPOOL_MEMORY = 1024 * 1024
+
+_executor = ThreadPoolExecutor(max_workers=THREADS, thread_name_prefix='asgi')
+# Provides the request context the handlers expect (as functions-framework does)
+_flask = Flask(__name__)
+
+
+def _environ(scope, body) -> dict:
+    """Builds the WSGI environ werkzeug needs from an ASGI HTTP scope."""
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': quote(scope.get('root_path', '')),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': io.StringIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for raw_name, raw_value in scope['headers']:
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            environ[name] = value
+            continue
+        key = f'HTTP_{name}'
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _handle(environ):
+    with _flask.request_context(environ):
+        return main.api(request)
+
+
+async def _read_body(receive):
+    body = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MEMORY)
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            body.close()
+            return None
+        body.write(message.get('body', b''))
+        if not message.get('more_body'):
+            body.seek(0)
+            return body
+
+
+async def _watch_disconnect(receive, disconnected: asyncio.Event):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            disconnected.set()
+            return
+
+
+async def _http(scope, receive, send):
+    loop = asyncio.get_running_loop()
+    body = await _read_body(receive)
+    if body is None:
+        return
+    try:
+        response = await loop.run_in_executor(_executor, _handle, _environ(scope, body))
+    finally:
+        body.close()
+
+    headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in response.headers.items()]
+    await send({'type': 'http.response.start', 'status': response.status_code, 'headers': headers})
+
+    if not response.is_streamed:
+        await send({'type': 'http.response.body', 'body': response.get_data()})
+        return
+
+    disconnected = asyncio.Event()
+    watcher = asyncio.create_task(_watch_disconnect(receive, disconnected))
+    chunks = response.iter_encoded()
+    try:
+        while not disconnected.is_set():
+            # Blocks a pool thread until the next chunk (or heartbeat) is ready;
+            # a disconnect is noticed once that chunk arrives
+            chunk = await loop.run_in_executor(_executor, next, chunks, None)
+            if chunk is None:
+                break
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        watcher.cancel()
+        # Releases the stream's subscriber slot
+        await loop.run_in_executor(_executor, response.close)
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            _executor.shutdown(wait=False, cancel_futures=True)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'http':
+        await _http(scope, receive, send)
+    elif scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
@@ -0,0 +1,81 @@
+"""
+Micro-benchmark: Firebase ID token checks on the request path, offline.
+
+An RSA key is minted locally and served through an injected KeySet fetcher,
+so no network or Firebase project is involved. Compares a full verification
+(RS256 signature + claims, what firebase_admin.auth.verify_id_token does once
+its keys are cached) with a repeat request answered from the verified-token
+LRU, and checks that forged, expired and wrong-audience tokens are rejected.
+Time is the best of 5 runs.
+Run from server/:  python benchmarks/bench_auth.py [tokens]
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+
+from app.services.auth import AuthError, KeySet, TokenVerifier  # noqa: E402
+
+PROJECT = 'bench-project'
+
+
+def mint(private_key, uid, kid='bench-key', audience=PROJECT, expires_in=3600):
+    now = int(time.time())
+    claims = {'iss': f'https://securetoken.google.com/{PROJECT}', 'aud': audience, 'sub': uid,
+              'iat': now, 'exp': now + expires_in, 'auth_time': now}
+    return jwt.encode(claims, private_key, algorithm='RS256', headers={'kid': kid})
+
+
+def _best_of(fn, repeat=5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    keys = KeySet(fetch=lambda: ({'bench-key': private_key.public_key()}, 3600))
+    tokens = [mint(private_key, f"member{i}") for i in range(count)]
+
+    verifier = TokenVerifier(keys, project_id=PROJECT, cache_size=count)
+    assert verifier.verify(tokens[0])['uid'] == 'member0'
+
+    forged = mint(rsa.generate_private_key(public_exponent=65537, key_size=2048), 'member0')
+    for name, token in (('forged signature', forged),
+                        ('expired', mint(private_key, 'member0', expires_in=-120)),
+                        ('wrong audience', mint(private_key, 'member0', audience='other-project')),
+                        ('unknown key', mint(private_key, 'member0', kid='rotated'))):
+        try:
+            verifier.verify(token)
+        except AuthError:
+            continue
+        raise AssertionError(f"{name} token was accepted")
+    assert keys.fetches == 1, "the unknown kid refetch is rate-limited"
+
+    def uncached():
+        fresh = TokenVerifier(keys, project_id=PROJECT, cache_size=0)
+        for token in tokens:
+            fresh.verify(token)
+
+    def cached():
+        for token in tokens:
+            verifier.verify(token)
+
+    cached()  # warm: every token verified once
+    print(f"{count} tokens, RS256 2048-bit")
+    print(f"{'path':<24} {'us/token':>9}")
+    for name, fn in (('full verification', uncached), ('verified-token cache', cached)):
+        print(f"{name:<24} {_best_of(fn) / count * 1e6:>9.1f}")
+    print(f"cache hits {verifier.hits}, misses {verifier.misses}, key fetches {keys.fetches}")
+
+
+if __name__ == '__main__':
+    main()
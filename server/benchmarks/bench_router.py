@@ -0,0 +1,118 @@
+"""
+Micro-benchmark: route dispatch cost of app.router.Router versus the
+if/startswith chain main.api used before it.
+
+Only dispatch is measured (path -> handler + params); handlers are stubs.
+Run from server/:  python benchmarks/bench_router.py [iterations]
+"""
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.router import Router  # noqa: E402
+
+
+def _stub(name):
+    def handler(req, headers, **params):
+        return name, params
+    handler.__name__ = name
+    return handler
+
+
+get_all_mvps = _stub('get_all_mvps')
+create_mvp = _stub('create_mvp')
+get_mvp = _stub('get_mvp')
+update_mvp = _stub('update_mvp')
+get_all_users = _stub('get_all_users')
+get_user = _stub('get_user')
+update_user = _stub('update_user')
+upload_avatar = _stub('upload_avatar')
+
+
+def legacy_dispatch(method, path):
+    """The routing section of main.api before the router was introduced."""
+    if len(path) > 1 and path.endswith('/'):
+        path = path[:-1]
+    if path == '/mvps':
+        if method == 'GET':
+            return get_all_mvps, {}
+        if method == 'POST':
+            return create_mvp, {}
+    if path.startswith('/mvps/'):
+        mvp_id = path.split('/')[-1]
+        if method == 'GET':
+            return get_mvp, {'mvp_id': mvp_id}
+        if method == 'PUT':
+            return update_mvp, {'mvp_id': mvp_id}
+    if path == '/users':
+        if method == 'GET':
+            return get_all_users, {}
+    if '/users/' in path and path.endswith('/avatar'):
+        parts = path.split('/')
+        if len(parts) == 4:
+            user_id = parts[2]
+            if method == 'POST':
+                return upload_avatar, {'uid': user_id}
+    if path.startswith('/users/'):
+        user_id = path.split('/')[-1]
+        if method == 'PUT':
+            return update_user, {'uid': user_id}
+        if method == 'GET':
+            return get_user, {'uid': user_id}
+    return None, {}
+
+
+router = Router()
+router.add('GET', '/mvps', get_all_mvps)
+router.add('POST', '/mvps', create_mvp)
+router.add('GET', '/mvps/<mvp_id>', get_mvp)
+router.add('PUT', '/mvps/<mvp_id>', update_mvp)
+router.add('GET', '/users', get_all_users)
+router.add('GET', '/users/<uid>', get_user)
+router.add('PUT', '/users/<uid>', update_user)
+router.add('POST', '/users/<uid>/avatar', upload_avatar)
+router.compile()
+
+
+def router_dispatch(method, path):
+    handler, params, _ = router.match(method, path)
+    return handler, params
+
+
+REQUESTS = [
+    ('GET', '/mvps'),
+    ('POST', '/mvps'),
+    ('GET', '/mvps/Xk3lq0Zp9aBcDeFgHiJk'),
+    ('PUT', '/mvps/Xk3lq0Zp9aBcDeFgHiJk'),
+    ('GET', '/users'),
+    ('GET', '/users/uG7pQ2sRtVwXyZ0aB1cD2eF3'),
+    ('PUT', '/users/uG7pQ2sRtVwXyZ0aB1cD2eF3'),
+    ('POST', '/users/uG7pQ2sRtVwXyZ0aB1cD2eF3/avatar'),
+    ('GET', '/nope'),
+]
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    # Both must agree before timing means anything
+    for method, path in REQUESTS:
+        assert legacy_dispatch(method, path) == router_dispatch(method, path), (method, path)
+
+    print(f"{'route':<48} {'legacy ns':>10} {'router ns':>10}")
+    totals = [0.0, 0.0]
+    for method, path in REQUESTS:
+        row = []
+        for i, dispatch in enumerate((legacy_dispatch, router_dispatch)):
+            seconds = min(timeit.repeat(lambda: dispatch(method, path), number=iterations, repeat=3))
+            ns = seconds / iterations * 1e9
+            totals[i] += ns
+            row.append(ns)
+        print(f"{method + ' ' + path:<48} {row[0]:>10.0f} {row[1]:>10.0f}")
+    print(f"{'total':<48} {totals[0]:>10.0f} {totals[1]:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Micro-benchmark: encoding a 5,000-document list the way the MVP and user
+handlers did (per-field isoformat patching, then json.dumps, default=str
+for users) versus app.services.serializer (one pass, orjson when installed),
+both as one body (snapshot ETag path) and streamed (page_response path).
+
+Documents mimic what Firestore returns: DatetimeWithNanoseconds timestamps,
+a GeoPoint, nested maps and lists. Time is the best of 5 runs; peak memory
+is measured with tracemalloc on a separate run.
+Run from server/:  python benchmarks/bench_serializer.py [documents]
+"""
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds  # noqa: E402
+from google.cloud.firestore_v1 import GeoPoint  # noqa: E402
+
+from app.services import serializer  # noqa: E402
+
+MVP_TIME_FIELDS = ('last_killed', 'respawn_at', 'respawn_window_start', 'respawn_window_end')
+
+
+def _timestamp(rng: random.Random) -> DatetimeWithNanoseconds:
+    moment = datetime(2025, 5, 1, tzinfo=timezone.utc) + timedelta(seconds=rng.randrange(90 * 86400))
+    return DatetimeWithNanoseconds(moment.year, moment.month, moment.day, moment.hour, moment.minute,
+                                   moment.second, rng.randrange(1_000_000), tzinfo=timezone.utc)
+
+
+def make_docs(count: int):
+    """(id, data) pairs shaped like mvps documents with a few profile-style extras."""
+    rng = random.Random(7)
+    docs = []
+    for i in range(count):
+        data = {
+            'mob_id': 1000 + i % 300,
+            'name': f"MVP {i}",
+            'map_name': f"map_{i % 120:03d}",
+            'spawn_delay': rng.choice((60, 90, 120)),
+            'spawn_variance': 10,
+            'status': rng.choice(('alive', 'dead')),
+            'notes': "Spawns near the north portal" if i % 4 == 0 else None,
+            'location': GeoPoint(rng.uniform(-90, 90), rng.uniform(-180, 180)),
+            'drops': [{'item_id': 600 + j, 'rate': rng.random()} for j in range(3)],
+            'reported_by': {'uid': f"u{i % 50}", 'at': _timestamp(rng)},
+        }
+        for field in MVP_TIME_FIELDS:
+            data[field] = _timestamp(rng)
+        docs.append((f"doc{i:05d}", data))
+    return docs
+
+
+def legacy_encode(docs) -> bytes:
+    """mvp._serialize + _serialize_fields, then json.dumps (default=str as get_all_users did)."""
+    items = []
+    for doc_id, data in docs:
+        data = dict(data)
+        data['id'] = doc_id
+        for field in MVP_TIME_FIELDS:
+            if data.get(field) and hasattr(data[field], 'isoformat'):
+                data[field] = data[field].isoformat()
+        items.append(data)
+    return json.dumps(items, default=str).encode('utf-8')
+
+
+def _with_id(doc):
+    doc_id, data = doc
+    return {**data, 'id': doc_id}
+
+
+def serializer_encode(docs) -> bytes:
+    return serializer.dumps([_with_id(doc) for doc in docs])
+
+
+def serializer_stream(docs) -> int:
+    """Drains the streamed encoding; returns its size (the chunks are discarded, as a socket would)."""
+    return sum(len(chunk) for chunk in serializer.list_chunks(docs, _with_id))
+
+
+def _best_of(fn, docs, repeat=5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(docs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak(fn, docs) -> int:
+    tracemalloc.start()
+    fn(docs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    docs = make_docs(count)
+
+    # The new output must carry the same data (it's compact and encodes GeoPoints as objects)
+    legacy = json.loads(legacy_encode(docs))
+    current = json.loads(serializer_encode(docs))
+    assert [d['id'] for d in legacy] == [d['id'] for d in current]
+    assert all(a[f] == b[f] for a, b in zip(legacy, current) for f in MVP_TIME_FIELDS + ('name', 'drops'))
+    assert json.loads(b''.join(serializer.list_chunks(docs, _with_id))) == current
+
+    backend = 'orjson' if serializer.orjson is not None else 'json (stdlib)'
+    print(f"{count} documents, serializer backend: {backend}")
+    print(f"{'path':<28} {'ms':>9} {'body KB':>9} {'peak KB':>9}")
+    for name, fn in (('legacy patch + json.dumps', legacy_encode),
+                     ('serializer.dumps', serializer_encode),
+                     ('serializer.list_chunks', serializer_stream)):
+        result = fn(docs)
+        size = result if isinstance(result, int) else len(result)
+        print(f"{name:<28} {_best_of(fn, docs) * 1000:>9.1f} {size / 1024:>9.0f} {_peak(fn, docs) / 1024:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Cold-start report for the API function.
+
+Runs a fresh interpreter that imports main.py under `-X importtime`, then
+serves one request in-process, and prints JSON with:
+  - the slowest modules by cumulative import time,
+  - main.py's own startup phases (app/config/startup.py),
+  - time from interpreter start to the first response.
+
+Run from server/:  python benchmarks/cold_start.py [--top N] [--path /mvps]
+Point FIRESTORE_EMULATOR_HOST at an emulator to include real first-read latency.
+Compare the output across releases to catch cold-start regressions.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Executed in the child interpreter
+CHILD = r'''
+import json, sys, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+from flask import Flask, request
+flask_app = Flask('cold_start')
+with flask_app.test_request_context(sys.argv[1]):
+    response = main.api(request)
+t2 = time.perf_counter()
+from app.config import startup
+print(json.dumps({
+    'import_main_ms': round((t1 - t0) * 1000, 2),
+    'first_request_ms': round((t2 - t1) * 1000, 2),
+    'status': response.status_code,
+    'startup': startup.report(),
+}))
+'''
+
+
+def parse_importtime(stderr: str):
+    """Parses `-X importtime` lines: 'import time: self | cumulative | name'."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append({
+            # Nested imports are indented by two spaces per level
+            'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+            'module': name.strip(),
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000,
+        })
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--top', type=int, default=25, help='number of modules to list')
+    parser.add_argument('--path', default='/mvps', help='path of the first request')
+    args = parser.parse_args()
+
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD, args.path],
+        cwd=SERVER_DIR, capture_output=True, text=True, env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'},
+    )
+    result_lines = [line for line in proc.stdout.splitlines() if line.startswith('{"import_main_ms"')]
+    if proc.returncode != 0 or not result_lines:
+        sys.stderr.write(proc.stderr[-4000:])
+        sys.exit(proc.returncode or 1)
+
+    modules = parse_importtime(proc.stderr)
+    report = json.loads(result_lines[-1])
+    # Top-level entries partition the total import time
+    report['modules_total_ms'] = round(sum(m['cumulative_ms'] for m in modules if m['depth'] == 0), 2)
+    report['slowest_modules'] = sorted(modules, key=lambda m: m['cumulative_ms'], reverse=True)[:args.top]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,341 @@
+"""
+Benchmark suite for the api routes against the Firestore emulator.
+
+For each MVP volume (--mvps 50,500,5000) the emulator is cleared and seeded
+with generated MVP locations and --users members, using the writer from
+migrations/seed_local.py. The API is then started (functions-framework, or
+uvicorn with --mode asgi) and driven by closed-loop clients, one scenario at
+a time:
+
+  - polling:  the tracker view: GET /mvps with If-None-Match, upcoming respawns, dashboard
+  - kills:    kill reports, single PUT /mvps/<id> and PUT /mvps/batch bursts
+  - members:  member list, paged projections and single profiles
+  - avatars:  POST /users/<uid>/avatar with a generated JPEG
+  - mixed:    all of the above, weighted like a raid night
+
+Firestore reads/writes per request come from the Server-Timing header the
+API adds to every response. Writes carry unsigned emulator ID tokens for the
+acting member (see load_test.emulator_token). Avatar uploads also update
+Firebase Auth: set FIREBASE_AUTH_EMULATOR_HOST (firebase emulators:start
+--only firestore,auth) to have the members created there, otherwise those
+requests end in 400.
+
+Run from server/ with the emulator up:
+    python benchmarks/emulator_bench.py [--mvps 50,500,5000] [--users 10000] [--duration 15] > bench.json
+
+Prints one JSON report: per volume and scenario, throughput, p50/p95/p99
+latency, status codes, Firestore reads/writes per request, and a per-route
+breakdown. --rng-seed makes the generated data and request mix repeatable.
+"""
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from load_test import SERVER_DIR, emulator_token, percentile, start_server, wait_ready
+
+sys.path.insert(0, os.path.join(os.path.dirname(SERVER_DIR), 'migrations'))
+from seed_local import write_local_data  # noqa: E402
+
+SCENARIOS = ('polling', 'kills', 'members', 'avatars')
+# Share of requests per scenario in the mixed run
+MIXED_WEIGHTS = {'polling': 70, 'members': 15, 'kills': 12, 'avatars': 3}
+
+# (mob_id, name, spawn_delay minutes, spawn_variance minutes)
+MVPS = [
+    (1038, 'Osiris', 60, 10), (1039, 'Baphomet', 120, 10), (1046, 'Doppelganger', 120, 10),
+    (1059, 'Mistress', 120, 10), (1086, 'Golden Thief Bug', 60, 10), (1087, 'Orc Hero', 60, 10),
+    (1112, 'Drake', 120, 10), (1115, 'Eddga', 120, 10), (1147, 'Maya', 120, 10),
+    (1150, 'Moonlight Flower', 60, 10), (1157, 'Pharaoh', 60, 10), (1159, 'Phreeoni', 120, 10),
+    (1190, 'Orc Lord', 120, 10), (1251, 'Stormy Knight', 60, 10), (1252, 'Hatii', 120, 10),
+    (1272, 'Dark Lord', 60, 10), (1312, 'Turtle General', 60, 10), (1373, 'Lord of Death', 133, 10),
+    (1389, 'Dracula', 60, 10), (1418, 'Evil Snake Lord', 94, 10), (1492, 'Incantation Samurai', 91, 10),
+    (1511, 'Amon Ra', 60, 10), (1583, 'Tao Gunka', 300, 10), (1630, 'White Lady', 117, 10),
+    (1685, 'Vesper', 120, 10), (1688, 'Lady Tanee', 420, 10), (1719, 'Detardeurus', 180, 10),
+    (1734, 'Kiel D-01', 120, 60), (1751, 'Valkyrie Randgris', 480, 10), (1768, 'Gloom Under Night', 300, 10),
+]
+THEMES = ('dark', 'light', 'system')
+
+_SERVER_TIMING_RE = re.compile(r'firestore;dur=[\d.]+;desc="(\d+) reads (\d+) writes"')
+
+
+def mvp_id(i):
+    return f'bench-mvp-{i:05d}'
+
+
+def user_id(i):
+    return f'bench-user-{i:05d}'
+
+
+def generate(mvp_count, user_count, rng):
+    """Generated collections in the {collection: {doc_id: {data, subcollections}}} form seed_local writes."""
+    now = datetime.now(timezone.utc)
+    mvps = {}
+    for i in range(mvp_count):
+        mob_id, name, delay, variance = MVPS[i % len(MVPS)]
+        data = {'mob_id': mob_id, 'name': name, 'map_name': f'bench_{i // len(MVPS)}',
+                'spawn_delay': delay, 'spawn_variance': variance, 'status': 'alive', 'notes': None}
+        if rng.random() < 0.4:
+            killed = now - timedelta(minutes=rng.randint(0, delay + variance))
+            start = killed + timedelta(minutes=delay)
+            data.update(status='dead', last_killed=killed, respawn_at=start,
+                        respawn_window_start=start, respawn_window_end=start + timedelta(minutes=variance))
+        mvps[mvp_id(i)] = {'data': data, 'subcollections': {}}
+
+    users = {}
+    for i in range(user_count):
+        users[user_id(i)] = {'data': {
+            'display_name': f'Member {i}',
+            'theme': rng.choice(THEMES),
+            'created_at': now - timedelta(days=rng.randint(0, 700)),
+        }, 'subcollections': {}}
+    return {'mvps': mvps, 'users': users}
+
+
+def clear_emulator(host, project):
+    """Deletes every document in the emulator's default database."""
+    conn = http.client.HTTPConnection(host, timeout=60)
+    conn.request('DELETE', f'/emulator/v1/projects/{project}/databases/(default)/documents')
+    response = conn.getresponse()
+    response.read()
+    if response.status != 200:
+        raise RuntimeError(f"Could not clear the emulator at {host}: HTTP {response.status}")
+
+
+def create_auth_users(host, project, uids):
+    """Creates the uploaders in the Auth emulator so auth.update_user() succeeds."""
+    conn = http.client.HTTPConnection(host, timeout=30)
+    for uid in uids:
+        conn.request('POST', f'/identitytoolkit.googleapis.com/v1/projects/{project}/accounts',
+                     json.dumps({'localId': uid}),
+                     {'Content-Type': 'application/json', 'Authorization': 'Bearer owner'})
+        conn.getresponse().read()
+
+
+def avatar_payload(rng):
+    from PIL import Image
+    image = Image.new('RGB', (640, 640), tuple(rng.randrange(256) for _ in range(3)))
+    # Some noise so the bytes (and the content hash) differ between uploads
+    for _ in range(64):
+        image.putpixel((rng.randrange(640), rng.randrange(640)), (rng.randrange(256), 0, 0))
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=85)
+    boundary = 'benchboundary'
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="avatar"; filename="a.jpg"\r\n'
+            f'Content-Type: image/jpeg\r\n\r\n').encode() + buffer.getvalue() + f'\r\n--{boundary}--\r\n'.encode()
+    return body, {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+
+
+class Client:
+    """One simulated user: picks requests for a scenario and keeps its own ETag and paging state."""
+
+    def __init__(self, rng, mvp_count, user_count, uploaders):
+        self.rng = rng
+        self.mvp_count = mvp_count
+        self.user_count = user_count
+        self.uploaders = uploaders
+        self.etag = None
+        self.cursor = None
+        self.tokens = {}
+
+    def polling(self):
+        roll = self.rng.random()
+        if roll < 0.75:
+            return 'GET', '/mvps', 'GET /mvps', None, {'If-None-Match': self.etag} if self.etag else {}
+        if roll < 0.9:
+            return 'GET', '/mvps/upcoming?within=1h', 'GET /mvps/upcoming', None, {}
+        return 'GET', '/dashboard', 'GET /dashboard', None, {}
+
+    def kills(self):
+        if self.rng.random() < 0.8:
+            path = f'/mvps/{mvp_id(self.rng.randrange(self.mvp_count))}'
+            return 'PUT', path, 'PUT /mvps/<id>', json.dumps({'status': 'dead'}), self.auth(self.member())
+        items = [{'id': mvp_id(self.rng.randrange(self.mvp_count)), 'patch': {'status': 'dead'}} for _ in range(10)]
+        return 'PUT', '/mvps/batch', 'PUT /mvps/batch', json.dumps({'items': items}), self.auth(self.member())
+
+    def member(self):
+        return user_id(self.rng.randrange(self.user_count))
+
+    def auth(self, uid, headers=None):
+        """`headers` plus a token for `uid`; tokens are minted once per member, like a signed-in client."""
+        if uid not in self.tokens:
+            self.tokens[uid] = emulator_token(uid, os.environ['GCLOUD_PROJECT'])
+        return {'Content-Type': 'application/json', **(headers or {}), 'Authorization': f'Bearer {self.tokens[uid]}'}
+
+    def members(self):
+        roll = self.rng.random()
+        if roll < 0.4:
+            return 'GET', '/users', 'GET /users', None, {}
+        if roll < 0.7:
+            path = '/users?fields=display_name,photo_url&limit=50'
+            if self.cursor:
+                path += f'&cursor={self.cursor}'
+            return 'GET', path, 'GET /users?limit', None, {}
+        return 'GET', f'/users/{user_id(self.rng.randrange(self.user_count))}', 'GET /users/<uid>', None, {}
+
+    def avatars(self):
+        body, headers = avatar_payload(self.rng)
+        uid = self.rng.choice(self.uploaders)
+        return 'POST', f'/users/{uid}/avatar', 'POST /users/<uid>/avatar', body, self.auth(uid, headers)
+
+    def next_request(self, scenario):
+        if scenario == 'mixed':
+            scenario = self.rng.choices(list(MIXED_WEIGHTS), weights=list(MIXED_WEIGHTS.values()))[0]
+        return getattr(self, scenario)()
+
+    def seen(self, label, response):
+        if label == 'GET /mvps' and response.getheader('ETag'):
+            self.etag = response.getheader('ETag')
+        elif label == 'GET /users?limit':
+            self.cursor = response.getheader('X-Next-Cursor')
+
+
+def drive(port, scenario, state, stop, results, lock):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    while not stop.is_set():
+        method, path, label, body, headers = state.next_request(scenario)
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body, headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+            timing = _SERVER_TIMING_RE.search(response.getheader('Server-Timing') or '')
+            reads, writes = (int(timing.group(1)), int(timing.group(2))) if timing else (0, 0)
+            state.seen(label, response)
+        except OSError:
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+            status, reads, writes = 0, 0, 0
+        elapsed = time.perf_counter() - start
+        with lock:
+            results.append((label, elapsed, status, reads, writes))
+
+
+def summarize(results, duration):
+    ok = [r for r in results if 0 < r[2] < 500]
+    statuses = {}
+    for r in results:
+        statuses[str(r[2] or 'connection_error')] = statuses.get(str(r[2] or 'connection_error'), 0) + 1
+    latencies = [r[1] for r in ok]
+    count = len(ok) or 1
+    by_route = {}
+    for r in ok:
+        by_route.setdefault(r[0], []).append(r)
+    return {
+        'requests': len(results),
+        'errors': len(results) - len(ok),
+        'statuses': statuses,
+        'throughput_rps': round(len(ok) / duration, 1),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'firestore_reads_per_request': round(sum(r[3] for r in ok) / count, 2),
+        'firestore_writes_per_request': round(sum(r[4] for r in ok) / count, 2),
+        'by_route': {
+            label: {
+                'count': len(rows),
+                'p50_ms': percentile([r[1] for r in rows], 50),
+                'p95_ms': percentile([r[1] for r in rows], 95),
+                'p99_ms': percentile([r[1] for r in rows], 99),
+                'reads_per_request': round(sum(r[3] for r in rows) / len(rows), 2),
+                'writes_per_request': round(sum(r[4] for r in rows) / len(rows), 2),
+            }
+            for label, rows in sorted(by_route.items())
+        },
+    }
+
+
+def run_scenario(port, scenario, mvp_count, args):
+    uploaders = [user_id(i) for i in range(min(args.users, 20))]
+    stop = threading.Event()
+    results, lock = [], threading.Lock()
+    threads = [
+        threading.Thread(target=drive, daemon=True, args=(
+            port, scenario, Client(random.Random(f'{args.rng_seed}-{scenario}-{i}'), mvp_count, args.users, uploaders),
+            stop, results, lock))
+        for i in range(args.clients)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=60)
+    with lock:
+        return summarize(list(results), args.duration)
+
+
+def run_volume(mvp_count, env, args):
+    host, project = env['FIRESTORE_EMULATOR_HOST'], env['GCLOUD_PROJECT']
+    clear_emulator(host, project)
+    started = time.perf_counter()
+    # seed_local reports progress on stdout, which is reserved for the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        write_local_data(generate(mvp_count, args.users, random.Random(args.rng_seed)))
+    seed_seconds = time.perf_counter() - started
+    if args.auth_emulator and 'avatars' in args.scenarios:
+        create_auth_users(args.auth_emulator, project, [user_id(i) for i in range(min(args.users, 20))])
+
+    server = start_server(args.mode, args.port, env, args)
+    try:
+        wait_ready(args.port)
+        report = {'mvps': mvp_count, 'users': args.users, 'seed_seconds': round(seed_seconds, 2), 'scenarios': {}}
+        for scenario in args.scenarios:
+            print(f"Running {scenario} with {mvp_count} MVPs...", file=sys.stderr)
+            report['scenarios'][scenario] = run_scenario(args.port, scenario, mvp_count, args)
+        return report
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mvps', default='50,500,5000', help="comma-separated MVP location volumes")
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS + ('mixed',)))
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=15.0, help="seconds per scenario")
+    parser.add_argument('--mode', choices=('wsgi', 'asgi'), default='wsgi')
+    parser.add_argument('--workers', type=int, default=1, help="uvicorn worker processes (asgi)")
+    parser.add_argument('--port', type=int, default=8110)
+    parser.add_argument('--rng-seed', default='bigfish')
+    args = parser.parse_args()
+    args.scenarios = [name for name in args.scenarios.split(',') if name]
+    unknown = set(args.scenarios) - set(SCENARIOS + ('mixed',))
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    os.environ.setdefault('FIRESTORE_EMULATOR_HOST', '127.0.0.1:8081')
+    os.environ.setdefault('GCLOUD_PROJECT', 'big-fish-9dbec')
+    env = dict(os.environ)
+    args.auth_emulator = env.get('FIREBASE_AUTH_EMULATOR_HOST')
+    # Makes the API accept the unsigned benchmark tokens even without a running Auth emulator
+    env.setdefault('FIREBASE_AUTH_EMULATOR_HOST', '127.0.0.1:9099')
+    # Keep avatar uploads off Cloud Storage
+    env.setdefault('LOCAL_STORAGE_DIR', tempfile.mkdtemp(prefix='emulator_bench_'))
+
+    report = {
+        'emulator': env['FIRESTORE_EMULATOR_HOST'],
+        'auth_emulator': args.auth_emulator,
+        'mode': args.mode,
+        'clients': args.clients,
+        'duration_s': args.duration,
+        'rng_seed': args.rng_seed,
+        'volumes': [run_volume(int(count), env, args) for count in args.mvps.split(',')],
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
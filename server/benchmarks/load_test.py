@@ -0,0 +1,211 @@
+"""
+Load test comparing the two serving modes against the Firestore emulator:
+
+  - wsgi: functions-framework --target=api (what the Dockerfile runs by default)
+  - asgi: uvicorn asgi:app (SERVER_MODE=asgi)
+
+Each mode is started on its own port and driven by the same closed-loop
+workload: concurrent clients issuing a mix of list, dashboard and monster
+search reads, while a few "slow uploaders" trickle avatar-sized request
+bodies. Prints JSON with per-mode throughput and latency percentiles.
+
+Writes carry Auth-emulator-style unsigned ID tokens minted here, which the
+API accepts because the server runs with FIREBASE_AUTH_EMULATOR_HOST set.
+
+Run from server/ with the emulator up (firebase emulators:start --only firestore):
+    python benchmarks/load_test.py [--clients 32] [--slow-uploaders 8] [--duration 20]
+"""
+import argparse
+import base64
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (weight, method, path) for the regular clients
+WORKLOAD = [
+    (6, 'GET', '/mvps'),
+    (2, 'GET', '/dashboard'),
+    (1, 'GET', '/mvps/upcoming?within=2h'),
+    (1, 'GET', '/monsters?q=or&hide_dummies=true'),
+]
+
+
+def emulator_token(uid, project='big-fish-9dbec'):
+    """An unsigned ID token like the Auth emulator issues, valid for an hour."""
+    now = int(time.time())
+    claims = {'iss': f'https://securetoken.google.com/{project}', 'aud': project, 'sub': uid,
+              'user_id': uid, 'iat': now, 'exp': now + 3600, 'auth_time': now}
+
+    def encode(part):
+        return base64.urlsafe_b64encode(json.dumps(part).encode()).rstrip(b'=').decode()
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode(claims)}."
+
+
+def percentile(samples, p):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return round(samples[min(len(samples) - 1, int(len(samples) * p / 100))] * 1000, 2)
+
+
+def wait_ready(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/mvps')
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not come up")
+
+
+def start_server(mode, port, env, args):
+    if mode == 'wsgi':
+        cmd = ['functions-framework', '--target=api', '--source=main.py', f'--port={port}']
+    else:
+        cmd = [sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', str(port),
+               '--workers', str(args.workers), '--log-level', 'warning']
+    return subprocess.Popen(cmd, cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def seed(port, count):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    headers = {'Content-Type': 'application/json', 'Authorization': f"Bearer {emulator_token('loadtest')}"}
+    for i in range(count):
+        body = json.dumps({'name': f'Load test MVP {i}', 'mob_id': 1039, 'map_name': f'load_{i}',
+                           'spawn_delay': 60 + i % 60, 'spawn_variance': 10, 'status': 'alive'})
+        conn.request('POST', '/mvps', body, headers)
+        conn.getresponse().read()
+
+
+def slow_upload(port, stop, size, seconds):
+    """Sends an avatar-sized multipart body in small pieces over `seconds`, like a phone on bad signal."""
+    boundary = 'loadtest'
+    head = (f'--{boundary}\r\nContent-Disposition: form-data; name="avatar"; filename="a.jpg"\r\n'
+            f'Content-Type: image/jpeg\r\n\r\n').encode()
+    tail = f'\r\n--{boundary}--\r\n'.encode()
+    payload = head + b'\0' * size + tail
+    token = emulator_token('loadtest')
+    pieces = 20
+    while not stop.is_set():
+        try:
+            sock = socket.create_connection(('127.0.0.1', port), timeout=30)
+            sock.sendall((f'POST /users/loadtest/avatar HTTP/1.1\r\nHost: localhost\r\n'
+                          f'Authorization: Bearer {token}\r\n'
+                          f'Content-Type: multipart/form-data; boundary={boundary}\r\n'
+                          f'Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n').encode())
+            step = len(payload) // pieces + 1
+            for i in range(0, len(payload), step):
+                if stop.is_set():
+                    break
+                sock.sendall(payload[i:i + step])
+                time.sleep(seconds / pieces)
+            sock.recv(4096)
+            sock.close()
+        except OSError:
+            time.sleep(0.1)
+
+
+def client(port, stop, results, lock, rng):
+    paths = [(method, path) for weight, method, path in WORKLOAD for _ in range(weight)]
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    while not stop.is_set():
+        method, path = rng.choice(paths)
+        start = time.perf_counter()
+        try:
+            conn.request(method, path)
+            response = conn.getresponse()
+            response.read()
+            ok = response.status < 500
+        except OSError:
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            results.append((path.split('?')[0], elapsed, ok))
+
+
+def run_mode(mode, port, env, args):
+    server = start_server(mode, port, env, args)
+    try:
+        wait_ready(port)
+        if args.seed:
+            seed(port, args.seed)
+        stop = threading.Event()
+        results, lock = [], threading.Lock()
+        threads = [threading.Thread(target=slow_upload, args=(port, stop, args.upload_bytes, args.upload_seconds))
+                   for _ in range(args.slow_uploaders)]
+        threads += [threading.Thread(target=client, args=(port, stop, results, lock, random.Random(i)))
+                    for i in range(args.clients)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join(timeout=args.upload_seconds + 5)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    latencies = [elapsed for _, elapsed, ok in results if ok]
+    by_path = {}
+    for path, elapsed, ok in results:
+        if ok:
+            by_path.setdefault(path, []).append(elapsed)
+    return {
+        'requests': len(results),
+        'errors': sum(1 for _, _, ok in results if not ok),
+        'throughput_rps': round(len(latencies) / args.duration, 1),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'by_path': {path: {'count': len(samples), 'p50_ms': percentile(samples, 50), 'p95_ms': percentile(samples, 95)}
+                    for path, samples in sorted(by_path.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', default='wsgi,asgi')
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--slow-uploaders', type=int, default=8)
+    parser.add_argument('--upload-bytes', type=int, default=512 * 1024)
+    parser.add_argument('--upload-seconds', type=float, default=3.0)
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--seed', type=int, default=50, help="MVP documents to create before the run (0 to skip)")
+    parser.add_argument('--workers', type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument('--port', type=int, default=8100)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault('FIRESTORE_EMULATOR_HOST', '127.0.0.1:8081')
+    env.setdefault('GCLOUD_PROJECT', 'big-fish-9dbec')
+    # Makes the API accept the unsigned tokens above; no Auth emulator is needed
+    env.setdefault('FIREBASE_AUTH_EMULATOR_HOST', '127.0.0.1:9099')
+    # Uploads are junk bytes (rejected after they are received); keep them off Cloud Storage
+    env.setdefault('LOCAL_STORAGE_DIR', tempfile.mkdtemp(prefix='load_test_'))
+
+    report = {'emulator': env['FIRESTORE_EMULATOR_HOST'], 'clients': args.clients,
+              'slow_uploaders': args.slow_uploaders, 'duration_s': args.duration, 'modes': {}}
+    for offset, mode in enumerate(args.modes.split(',')):
+        report['modes'][mode] = run_mode(mode, args.port + offset, env, args)
+        # Only seed once; both modes share the emulator
+        args.seed = 0
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,7 @@
+import time
+_t = time.perf_counter()
+
 from firebase_functions import https_fn
-from firebase_admin import initialize_app
 import json
 import os
 import sys
@@ -7,49 +9,86 @@ import sys
 # Add the current directory to sys.path to allow importing 'app' module
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app.routes import mvp, user
-
-# Initialize Firebase Admin
-# Use GOOGLE_APPLICATION_CREDENTIALS env var or default credentials
-options = {
-    'storageBucket': 'big-fish-9dbec.firebasestorage.app'
+from app.config import startup
+startup.begin(_t)
+_t = startup.phase('firebase_functions', _t)
+
+# Firebase Admin is initialized lazily on first use (see app/config/firebase.py)
+from app.routes import bank, dashboard, event, loan, monitoring, monster, mvp, user
+_t = startup.phase('app.routes', _t)
+from app.router import Router
+from app.services import auth, compression, http_cache, metrics
+
+# --- ROUTING ---
+# Compiled once at import into a segment trie; see app/router.py
+router = Router()
+router.add('GET', '/mvps', mvp.get_all_mvps)
+router.add('POST', '/mvps', mvp.create_mvp)
+router.add('GET', '/mvps/upcoming', mvp.get_upcoming_mvps)
+router.add('PUT', '/mvps/batch', mvp.update_mvps_batch)
+router.add('GET', '/mvps/stream', mvp.stream_mvps)
+router.add('GET', '/mvps/<mvp_id>', mvp.get_mvp)
+router.add('PUT', '/mvps/<mvp_id>', mvp.update_mvp)
+router.add('GET', '/mvps/<mvp_id>/stats', mvp.get_mvp_stats)
+router.add('GET', '/mvps/<mvp_id>/kills', mvp.list_kills)
+router.add('POST', '/mvps/<mvp_id>/sightings', mvp.report_sighting)
+router.add('GET', '/users', user.get_all_users)
+router.add('GET', '/users/<uid>', user.get_user)
+router.add('PUT', '/users/<uid>', user.update_user)
+router.add('POST', '/users/<uid>/avatar', user.upload_avatar)
+router.add('GET', '/dashboard', dashboard.get_dashboard)
+router.add('GET', '/monsters', monster.search_monsters)
+router.add('GET', '/monsters/<int:monster_id>', monster.get_monster)
+router.add('GET', '/items/<int:item_id>/droppers', monster.get_item_droppers)
+router.add('GET', '/maps/<map_code>/monsters', monster.get_map_monsters)
+router.add('GET', '/events', event.list_events)
+router.add('POST', '/events', event.create_event)
+router.add('GET', '/events/<event_id>', event.get_event)
+router.add('GET', '/events/<event_id>/signups', event.list_signups)
+router.add('POST', '/events/<event_id>/signup', event.signup)
+router.add('DELETE', '/events/<event_id>/signup/<uid>', event.cancel_signup)
+router.add('GET', '/bank', bank.get_bank)
+router.add('POST', '/bank/transaction', bank.post_transaction)
+router.add('GET', '/bank/transactions', bank.list_transactions)
+router.add('POST', '/bank/snapshots', bank.create_snapshot)
+router.add('GET', '/loans', loan.list_loans)
+router.add('POST', '/loans', loan.create_loan)
+router.add('GET', '/loans/out', loan.list_out)
+router.add('GET', '/loans/overdue', loan.list_overdue)
+router.add('GET', '/loans/unpaid', loan.list_unpaid)
+router.add('GET', '/loans/<loan_id>', loan.get_loan)
+router.add('PUT', '/loans/<loan_id>', loan.update_loan)
+router.add('GET', '/metrics', monitoring.get_metrics)
+router.compile()
+# Handler -> pattern, used as the route label in metrics (keeps label cardinality bounded)
+_patterns = {handler: pattern for _, pattern, handler in router.routes()}
+# Caching of GET routes by pattern; unlisted GETs are POLLED, other methods NO_STORE.
+# /metrics and /mvps/stream set their own no-store / no-cache and are never shared.
+_cache_policies = {
+    '/monsters': http_cache.STATIC,
+    '/monsters/<int:monster_id>': http_cache.STATIC,
+    '/items/<int:item_id>/droppers': http_cache.STATIC,
+    '/maps/<map_code>/monsters': http_cache.STATIC,
 }
-
-if not os.getenv("FIREBASE_CONFIG"):
-    # Local dev or manual credential path
-    cred_path = os.getenv("SERVICE_ACCOUNT_FILE")
-
-    # Fallback: Check project root for service account file if not provided/found
-    if not cred_path or not os.path.exists(cred_path):
-        try:
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            project_root = os.path.dirname(current_dir)
-            for f in os.listdir(project_root):
-                if f.endswith('.json') and 'firebase-adminsdk' in f:
-                    cred_path = os.path.join(project_root, f)
-                    print(f"Found service account in root: {cred_path}")
-                    break
-        except Exception:
-            pass
-
-    if cred_path and os.path.exists(cred_path):
-        from firebase_admin import credentials
-        cred = credentials.Certificate(cred_path)
-        try:
-            initialize_app(cred, options)
-        except ValueError:
-            pass  # Already initialized
-    else:
-        try:
-            initialize_app(options=options)
-        except ValueError:
-            pass
-else:
-    # Cloud environment
-    try:
-        initialize_app(options=options)
-    except ValueError:
-        pass
+# Routes acting for a member need a Firebase ID token (Authorization: Bearer); unlisted routes are public.
+# OWNER routes also require the token's uid to be the path's <uid>.
+_auth_rules = {
+    dashboard.get_dashboard: auth.OPTIONAL,
+    mvp.create_mvp: auth.SIGNED_IN,
+    mvp.update_mvp: auth.SIGNED_IN,
+    mvp.update_mvps_batch: auth.SIGNED_IN,
+    mvp.report_sighting: auth.SIGNED_IN,
+    user.update_user: auth.OWNER,
+    user.upload_avatar: auth.OWNER,
+    event.create_event: auth.SIGNED_IN,
+    event.signup: auth.SIGNED_IN,
+    event.cancel_signup: auth.OWNER,
+    bank.post_transaction: auth.SIGNED_IN,
+    bank.create_snapshot: auth.SIGNED_IN,
+    loan.create_loan: auth.SIGNED_IN,
+    loan.update_loan: auth.SIGNED_IN,
+}
+startup.phase('router', _t)
 
 
 @https_fn.on_request()
@@ -62,7 +101,7 @@ def api(req: https_fn.Request) -> https_fn.Response:
     headers = {
         'Access-Control-Allow-Origin': '*',
         'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-        'Access-Control-Allow-Headers': 'Content-Type, Authorization',
+        'Access-Control-Allow-Headers': 'Content-Type, Authorization, If-None-Match, Last-Event-ID, Idempotency-Key',
         'Content-Type': 'application/json'
     }
 
@@ -70,50 +109,32 @@ def api(req: https_fn.Request) -> https_fn.Response:
     if req.method == 'OPTIONS':
         return https_fn.Response('', status=204, headers=headers)
 
-    path = req.path
-    # Normalize path (remove trailing slash if present and not root)
-    if len(path) > 1 and path.endswith('/'):
-        path = path[:-1]
-
-    # --- ROUTING ---
-
-    # /mvps
-    if path == '/mvps':
-        if req.method == 'GET':
-            return mvp.get_all_mvps(req, headers)
-        if req.method == 'POST':
-            return mvp.create_mvp(req, headers)
-
-    # /mvps/<id>
-    if path.startswith('/mvps/'):
-        mvp_id = path.split('/')[-1]
-        if req.method == 'GET':
-            return mvp.get_mvp(req, headers, mvp_id)
-        if req.method == 'PUT':
-            return mvp.update_mvp(req, headers, mvp_id)
-
-    # /users
-    if path == '/users':
-        if req.method == 'GET':
-            return user.get_all_users(req, headers)
-
-    # /users/<id>/avatar
-    if '/users/' in path and path.endswith('/avatar'):
-        # Extract user_id from /users/<user_id>/avatar
-        parts = path.split('/')
-        # parts = ['', 'users', '<user_id>', 'avatar']
-        if len(parts) == 4:
-            user_id = parts[2]
-            if req.method == 'POST':
-                return user.upload_avatar(req, headers, user_id)
+    request_metrics = metrics.start()
+    response = compression.compress(req, _route(req, headers))
+    metrics.finish(request_metrics, req.method, response)
+    startup.first_response()
+    return response
+
+
+def _route(req: https_fn.Request, headers: dict) -> https_fn.Response:
+    handler, params, allowed = router.match(req.method, req.path)
+    if handler is not None:
+        pattern = _patterns[handler]
+        metrics.set_route(pattern)
+        if req.method in ('GET', 'HEAD'):
+            policy = _cache_policies.get(pattern, http_cache.POLLED)
+        else:
+            policy = http_cache.NO_STORE
+        try:
+            auth.authorize(req, _auth_rules.get(handler), params)
+        except auth.AuthError as e:
+            return https_fn.Response(json.dumps({"error": str(e)}), status=e.status,
+                                     headers={**headers, 'WWW-Authenticate': 'Bearer'})
+        return http_cache.apply_policy(req, handler(req, headers, **params), policy)
 
-    # /users/<id>
-    if path.startswith('/users/'):
-        user_id = path.split('/')[-1]
-        if req.method == 'PUT':
-            return user.update_user(req, headers, user_id)
-        if req.method == 'GET':
-            return user.get_user(req, headers, user_id)
+    if allowed:
+        return https_fn.Response(json.dumps({"error": "Method Not Allowed", "path": req.path}), status=405,
+                                 headers={**headers, 'Allow': ', '.join(allowed + ['OPTIONS'])})
 
     # Default 404
-    return https_fn.Response(json.dumps({"error": "Not Found", "path": path}), status=404, headers=headers)
+    return https_fn.Response(json.dumps({"error": "Not Found", "path": req.path}), status=404, headers=headers)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the server the way main.py does: `app` from server/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
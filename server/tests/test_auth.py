@@ -0,0 +1,216 @@
+import io
+import json
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from app.services import auth
+from app.services.auth import AuthError, KeySet, TokenVerifier
+
+PROJECT = 'test-project'
+ISSUER = f'https://securetoken.google.com/{PROJECT}'
+
+
+@pytest.fixture(scope='module')
+def private_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class Fetcher:
+    """Serves the given keys and counts fetches, like Google's key endpoint."""
+
+    def __init__(self, keys, max_age=3600):
+        self.keys = keys
+        self.max_age = max_age
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return dict(self.keys), self.max_age
+
+
+class Request:
+    def __init__(self, token=None):
+        self.headers = {'Authorization': f'Bearer {token}'} if token else {}
+
+
+def mint(private_key, uid='u1', kid='k1', **claims):
+    now = int(time.time())
+    payload = {'iss': ISSUER, 'aud': PROJECT, 'sub': uid, 'iat': now, 'exp': now + 3600, 'auth_time': now}
+    payload.update(claims)
+    return jwt.encode(payload, private_key, algorithm='RS256', headers={'kid': kid})
+
+
+@pytest.fixture
+def fetcher(private_key):
+    return Fetcher({'k1': private_key.public_key()})
+
+
+@pytest.fixture
+def verifier(fetcher):
+    return TokenVerifier(KeySet(fetcher), project_id=PROJECT, emulator=False)
+
+
+def test_valid_token(verifier, private_key):
+    claims = verifier.verify(mint(private_key, uid='member-1'))
+    assert claims['uid'] == claims['sub'] == 'member-1'
+
+
+@pytest.mark.parametrize('claims', [
+    {'exp': int(time.time()) - 120},
+    {'aud': 'other-project'},
+    {'iss': 'https://securetoken.google.com/other-project'},
+    {'sub': ''},
+    {'iat': int(time.time()) + 600},
+])
+def test_invalid_claims_are_rejected(verifier, private_key, claims):
+    with pytest.raises(AuthError) as error:
+        verifier.verify(mint(private_key, **claims))
+    assert error.value.status == 401
+
+
+def test_forged_signature_is_rejected(verifier):
+    forged = mint(rsa.generate_private_key(public_exponent=65537, key_size=2048))
+    with pytest.raises(AuthError):
+        verifier.verify(forged)
+
+
+def test_unknown_kid_refetches_at_most_once_per_interval(private_key):
+    clock = Clock()
+    fetcher = Fetcher({'k1': private_key.public_key()})
+    verifier = TokenVerifier(KeySet(fetcher, clock=clock), project_id=PROJECT, emulator=False)
+    verifier.verify(mint(private_key))
+    assert fetcher.calls == 1
+
+    # Keys rotated: the first token with the new kid triggers a refetch...
+    rotated = mint(private_key, kid='k2')
+    clock.now += auth.MIN_REFRESH_INTERVAL
+    fetcher.keys = {'k2': private_key.public_key()}
+    assert verifier.verify(rotated)['uid'] == 'u1'
+    assert fetcher.calls == 2
+
+    # ...but a stream of unknown kids right after it doesn't
+    for i in range(5):
+        with pytest.raises(AuthError):
+            verifier.verify(mint(private_key, uid=f'u{i}', kid='bogus'))
+    assert fetcher.calls == 2
+    clock.now += auth.MIN_REFRESH_INTERVAL
+    with pytest.raises(AuthError):
+        verifier.verify(mint(private_key, uid='late', kid='bogus'))
+    assert fetcher.calls == 3
+
+
+def test_keys_are_kept_for_their_max_age(private_key):
+    clock = Clock()
+    fetcher = Fetcher({'k1': private_key.public_key()}, max_age=600)
+    keys = KeySet(fetcher, clock=clock)
+    keys.get('k1')
+    clock.now += 599
+    keys.get('k1')
+    assert fetcher.calls == 1
+    clock.now += 1
+    keys.get('k1')
+    assert fetcher.calls == 2
+
+
+def test_fetch_google_keys_reads_max_age(monkeypatch):
+    class Response(io.BytesIO):
+        headers = {'Cache-Control': 'public, max-age=19800, must-revalidate, no-transform'}
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(auth.urllib.request, 'urlopen',
+                        lambda url, timeout: Response(json.dumps({'k1': 'PEM'}).encode()))
+    assert auth.fetch_google_keys() == ({'k1': 'PEM'}, 19800.0)
+
+
+def test_cached_until_exp(fetcher, private_key):
+    clock = Clock(time.time())
+    verifier = TokenVerifier(KeySet(fetcher), project_id=PROJECT, clock=clock, emulator=False)
+    token = mint(private_key)
+    exp = jwt.decode(token, options={'verify_signature': False})['exp']
+
+    first = verifier.verify(token)
+    assert verifier.verify(token) is first
+    assert (verifier.hits, verifier.misses) == (1, 1)
+
+    # Past exp (+ leeway) the cached entry is dropped and the token is checked again
+    clock.now = exp + auth.LEEWAY
+    verifier.verify(token)
+    assert (verifier.hits, verifier.misses) == (1, 2)
+
+
+def test_cache_is_bounded_lru(fetcher, private_key):
+    verifier = TokenVerifier(KeySet(fetcher), project_id=PROJECT, cache_size=2, emulator=False)
+    a, b, c = (mint(private_key, uid=uid) for uid in 'abc')
+    verifier.verify(a)
+    verifier.verify(b)
+    verifier.verify(a)  # a is now the most recently used
+    verifier.verify(c)  # evicts b
+    misses = verifier.misses
+    verifier.verify(a)
+    assert verifier.misses == misses
+    verifier.verify(b)
+    assert verifier.misses == misses + 1
+
+
+def _unsigned(uid='u1'):
+    now = int(time.time())
+    return jwt.encode({'iss': ISSUER, 'aud': PROJECT, 'sub': uid, 'iat': now, 'exp': now + 3600},
+                      None, algorithm='none')
+
+
+def test_unsigned_token_rejected_outside_emulator(verifier):
+    with pytest.raises(AuthError):
+        verifier.verify(_unsigned())
+
+
+def test_unsigned_token_accepted_by_emulator(fetcher):
+    verifier = TokenVerifier(KeySet(fetcher), project_id=PROJECT, emulator=True)
+    assert verifier.verify(_unsigned('emu'))['uid'] == 'emu'
+    assert fetcher.calls == 0
+
+
+@pytest.fixture
+def installed(verifier):
+    auth.set_verifier(verifier)
+    yield verifier
+    auth.set_verifier(None)
+
+
+def test_authorize_rules(installed, private_key):
+    token = mint(private_key, uid='u1')
+
+    assert auth.authorize(Request(), None, {}) is None
+    assert auth.authorize(Request(), auth.OPTIONAL, {}) is None
+    assert auth.current_uid() is None
+
+    with pytest.raises(AuthError) as error:
+        auth.authorize(Request(), auth.SIGNED_IN, {})
+    assert error.value.status == 401
+
+    auth.authorize(Request(token), auth.SIGNED_IN, {})
+    assert auth.current_uid() == 'u1'
+
+    auth.authorize(Request(token), auth.OWNER, {'uid': 'u1'})
+    with pytest.raises(AuthError) as error:
+        auth.authorize(Request(token), auth.OWNER, {'uid': 'u2'})
+    assert error.value.status == 403
+
+    # An invalid token isn't anonymous, even where sign-in is optional
+    with pytest.raises(AuthError):
+        auth.authorize(Request('garbage'), auth.OPTIONAL, {})
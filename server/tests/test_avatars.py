@@ -0,0 +1,85 @@
+import io
+
+import pytest
+from PIL import Image
+
+from app.services import avatars
+from app.services.avatars import AVATAR_SIZES, AvatarError, AvatarStore
+from app.services.local_storage import LocalBucket
+
+
+def _image_bytes(image, fmt, **options):
+    out = io.BytesIO()
+    image.save(out, fmt, **options)
+    return out.getvalue()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AvatarStore(LocalBucket(str(tmp_path), 'http://storage.test/bucket'))
+
+
+def test_upload_stores_square_webp_variants(store, tmp_path):
+    photo = _image_bytes(Image.new('RGB', (1200, 800), (200, 30, 30)), 'JPEG')
+
+    stored = store.save(io.BytesIO(photo))
+
+    assert stored['deduped'] is False
+    digest = stored['hash']
+    assert stored['urls'] == {str(size): f"http://storage.test/bucket/avatars/{digest}/{size}.webp"
+                              for size in AVATAR_SIZES}
+    for size in AVATAR_SIZES:
+        with Image.open(tmp_path / 'avatars' / digest / f'{size}.webp') as variant:
+            assert variant.format == 'WEBP'
+            assert variant.size == (size, size)
+
+
+def test_same_bytes_are_deduplicated(store, monkeypatch):
+    photo = _image_bytes(Image.new('RGB', (300, 300), (0, 90, 200)), 'PNG')
+    first = store.save(io.BytesIO(photo))
+
+    def render_variants(*args, **kwargs):
+        raise AssertionError("a known upload must not be decoded again")
+    monkeypatch.setattr(avatars, 'render_variants', render_variants)
+    second = store.save(io.BytesIO(photo))
+
+    assert second == {**first, 'deduped': True}
+
+
+def test_photo_urls_name_every_size_and_largest_is_the_profile_photo(store):
+    stored = store.save(io.BytesIO(_image_bytes(Image.new('RGB', (64, 64)), 'PNG')))
+    photo_urls = stored['urls']
+
+    # upload_avatar stores these as photo_urls and the largest as photo_url
+    assert sorted(photo_urls, key=int) == [str(size) for size in AVATAR_SIZES]
+    assert photo_urls[str(max(AVATAR_SIZES))].endswith(f"/{max(AVATAR_SIZES)}.webp")
+
+
+@pytest.mark.parametrize('mode', ['RGBA', 'P'])
+def test_transparency_is_kept(store, tmp_path, mode):
+    image = Image.new('RGBA', (200, 200), (255, 0, 0, 255))
+    image.paste((0, 0, 0, 0), (0, 0, 100, 200))
+    if mode == 'P':
+        # Palette PNG with one transparent palette entry (alpha lives in info['transparency'])
+        image = image.convert('RGB').quantize(colors=4)
+        index = image.getpixel((10, 10))
+        source = _image_bytes(image, 'PNG', transparency=index)
+    else:
+        source = _image_bytes(image, 'PNG')
+
+    stored = store.save(io.BytesIO(source))
+
+    size = max(AVATAR_SIZES)
+    with Image.open(tmp_path / 'avatars' / stored['hash'] / f'{size}.webp') as variant:
+        variant = variant.convert('RGBA')
+        assert variant.getpixel((5, size // 2))[3] == 0
+        assert variant.getpixel((size - 5, size // 2))[3] == 255
+
+
+def test_rejects_corrupt_empty_and_oversized_uploads(store):
+    with pytest.raises(AvatarError):
+        store.save(io.BytesIO(b'not an image'))
+    with pytest.raises(AvatarError):
+        store.save(io.BytesIO(b''))
+    with pytest.raises(AvatarError):
+        avatars.spool_upload(io.BytesIO(b'x' * 11), max_bytes=10)
@@ -0,0 +1,151 @@
+import datetime
+
+import pytest
+from google.api_core import exceptions
+from google.cloud.firestore_v1 import _helpers
+from google.cloud.firestore_v1.field_path import FieldPath
+
+from app.models.bank import LedgerEntry
+from app.routes import bank
+
+DOCUMENTS = 'projects/test/databases/(default)/documents'
+
+
+class WriteResult:
+    def __init__(self, update_time):
+        self.update_time = update_time
+
+
+class Snapshot:
+    def __init__(self, data):
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return self._data
+
+
+class DocumentRef:
+    def __init__(self, db, path):
+        self._db = db
+        self.path = path
+        self.id = path.rsplit('/', 1)[-1]
+
+    def get(self, transaction=None):
+        return Snapshot(self._db.docs.get(self.path))
+
+
+class Collection:
+    def __init__(self, db, name):
+        self._db = db
+        self.name = name
+
+    def document(self, doc_id=None):
+        return DocumentRef(self._db, f'{self.name}/{doc_id or "auto-%d" % len(self._db.docs)}')
+
+
+class Batch:
+    """
+    Builds the same Write protos the Firestore client sends and applies them
+    the way the server does (update mask, then field transforms), so merge
+    semantics are the real ones.
+    """
+
+    def __init__(self, db):
+        self._db = db
+        self._writes = []
+
+    def create(self, ref, data):
+        self._writes += [(ref, pb) for pb in _helpers.pbs_for_create(f'{DOCUMENTS}/{ref.path}', data)]
+
+    def set(self, ref, data, merge=False):
+        self._writes += [(ref, pb) for pb in _helpers.pbs_for_set_with_merge(f'{DOCUMENTS}/{ref.path}', data, merge)]
+
+    def commit(self):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for ref, pb in self._writes:
+            doc = self._db.docs.get(ref.path)
+            if 'current_document' in pb and pb.current_document.exists is False and doc is not None:
+                raise exceptions.AlreadyExists(ref.path)
+            fields = _helpers.decode_dict(pb.update.fields, None)
+            if 'update_mask' in pb:
+                doc = doc or {}
+                for path in pb.update_mask.field_paths:
+                    parts = FieldPath.from_api_repr(path).parts
+                    value = fields
+                    for part in parts:
+                        value = value[part]
+                    _set_path(doc, parts, value)
+            else:
+                doc = fields
+            for transform in pb.update_transforms:
+                parts = FieldPath.from_api_repr(transform.field_path).parts
+                if 'increment' in transform:
+                    _set_path(doc, parts, _get_path(doc, parts) + _helpers.decode_value(transform.increment, None))
+                else:
+                    _set_path(doc, parts, now)
+            self._db.docs[ref.path] = doc
+        return [WriteResult(now) for _ in self._writes]
+
+
+def _get_path(doc, parts):
+    for part in parts:
+        doc = doc.get(part) if isinstance(doc, dict) else None
+    return doc or 0
+
+
+def _set_path(doc, parts, value):
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+class FakeDB:
+    def __init__(self):
+        self.docs = {}
+
+    def collection(self, name):
+        return Collection(self, name)
+
+    def batch(self):
+        return Batch(self)
+
+
+def _deposit(db, **data):
+    entry = LedgerEntry({'type': 'deposit', 'member': 'u1', **data})
+    entry.validate()
+    bank._post_deposit(db, db.collection(LedgerEntry.collection_name).document(), entry)
+
+
+def _balance(db):
+    return bank._serialize_balance(db.docs[f'{bank.BALANCE_COLLECTION}/{bank.BALANCE_DOC}'])
+
+
+def test_zeny_only_deposit_keeps_the_inventory():
+    db = FakeDB()
+    _deposit(db, items=[{'item_id': 607, 'name': 'Yggdrasil Berry', 'quantity': 3}])
+    _deposit(db, zeny=1000)
+
+    balance = _balance(db)
+    assert balance['zeny'] == 1000
+    assert balance['entries'] == 2
+    assert balance['items'] == [{'item_id': 607, 'name': 'Yggdrasil Berry', 'quantity': 3}]
+
+
+def test_item_deposits_merge_per_item():
+    db = FakeDB()
+    _deposit(db, items=[{'item_id': 607, 'name': 'Yggdrasil Berry', 'quantity': 3}])
+    _deposit(db, items=[{'item_id': 608, 'quantity': 2}, {'item_id': 607, 'quantity': 1}])
+
+    assert _balance(db)['items'] == [{'item_id': 607, 'name': 'Yggdrasil Berry', 'quantity': 4},
+                                     {'item_id': 608, 'name': None, 'quantity': 2}]
+
+
+def test_replayed_entry_is_not_posted_twice():
+    db = FakeDB()
+    entry = LedgerEntry({'type': 'deposit', 'member': 'u1', 'zeny': 50})
+    entry.validate()
+    ref = db.collection(LedgerEntry.collection_name).document('deposit-key-1')
+    bank._post_deposit(db, ref, entry)
+    with pytest.raises(exceptions.AlreadyExists):
+        bank._post_deposit(db, ref, entry)
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.services.event_stream import EventBroadcaster, SubscriberLimitReached
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _stream_cap(entry_point, **env):
+    """max_subscribers of the /mvps/stream broadcaster once `entry_point` is imported, in a fresh process."""
+    env = {**{k: v for k, v in os.environ.items() if k not in ('SERVER_MODE', 'SSE_MAX_SUBSCRIBERS')}, **env}
+    code = f"import {entry_point}; from app.routes import mvp; print(mvp.mvp_events.max_subscribers)"
+    output = subprocess.run([sys.executable, '-c', code], cwd=SERVER_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return int(output.split()[-1])
+
+
+def test_stream_cap_follows_the_asgi_pool():
+    assert _stream_cap('asgi', ASGI_THREADS='10', THREADS='100') == 5
+
+
+def test_stream_cap_follows_gunicorn_threads():
+    assert _stream_cap('main', ASGI_THREADS='10', THREADS='100') == 50
+
+
+def test_closing_a_stream_frees_its_slot():
+    broadcaster = EventBroadcaster(max_subscribers=1, heartbeat=0.01)
+    first = broadcaster.subscribe()
+    with pytest.raises(SubscriberLimitReached):
+        broadcaster.subscribe()
+    first.close()
+    broadcaster.subscribe().close()
+    assert broadcaster.subscribers == 0
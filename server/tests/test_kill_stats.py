@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.kill_stats import KillStats
+
+T0 = datetime(2025, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def at(minutes):
+    return T0 + timedelta(minutes=minutes)
+
+
+def test_sighting_after_kill_measures_interval():
+    stats = KillStats({})
+    assert stats.add_kill(at(0), 'u1', 10) is None
+    assert stats.add_sighting(at(125)) == 125
+    # Only the first sign of the respawn counts
+    assert stats.add_sighting(at(127)) is None
+    assert (stats.count, stats.mean, stats.min, stats.max) == (1, 125, 125, 125)
+
+
+def test_welford_matches_sample_variance():
+    stats = KillStats({})
+    kill = 0
+    for interval in (118, 125, 131, 122):
+        stats.add_kill(at(kill), 'u1', 10)
+        kill += interval
+        stats.add_sighting(at(kill))
+    assert stats.mean == pytest.approx(124)
+    assert stats.variance == pytest.approx(30)
+
+
+@pytest.mark.parametrize('offset, duplicate', [(0.33, True), (-5, True), (109.9, True), (110, False), (-110, False)])
+def test_duplicate_kill_is_within_minimum_respawn(offset, duplicate):
+    stats = KillStats({})
+    stats.add_kill(at(0), 'u1', 10)
+    # spawn_delay 120, variance 10: nothing respawns within 110 minutes of a kill
+    assert stats.is_duplicate_kill(at(offset), 120, 10) is duplicate
+
+
+def test_duplicate_check_needs_a_kill_and_a_spawn_delay():
+    stats = KillStats({})
+    assert not stats.is_duplicate_kill(at(0), 120, 10)
+    stats.add_kill(at(0), 'u1', 10)
+    assert not stats.is_duplicate_kill(at(1), None, None)
+
+
+def test_summary_round_trips_through_to_dict():
+    stats = KillStats({})
+    stats.add_kill(at(0), 'u1', 1)
+    stats.add_sighting(at(121))
+    stats.add_kill(at(130), 'u2', 1)
+    summary = KillStats(stats.to_dict()).summary(120, 10)
+    assert summary['kills'] == 2
+    assert summary['recent_kills'] == [{'at': at(130).isoformat(), 'by': 'u2'}]
+    assert summary['kills_by_member'] == {'u1': 1, 'u2': 1}
+    assert summary['configured'] == {'spawn_delay': 120, 'spawn_variance': 10}
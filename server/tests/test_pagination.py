@@ -0,0 +1,31 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services.pagination import decode_time_cursor, encode_cursor, encode_time_cursor
+
+
+def test_time_cursor_round_trip():
+    at = datetime(2026, 5, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)
+    assert decode_time_cursor(encode_time_cursor(at, 'entry-1')) == (at, 'entry-1')
+
+
+@pytest.mark.parametrize('payload', [
+    [123, 'x'],
+    ['2026-05-01T12:00:00+00:00', 5],
+    ['2026-05-01T12:00:00+00:00', ''],
+    ['2026-05-01T12:00:00+00:00', 'bank_ledger/x'],
+    ['yesterday', 'x'],
+    ['2026-05-01T12:00:00+00:00'],
+    {'at': '2026-05-01T12:00:00+00:00', 'id': 'x'},
+    None,
+])
+def test_forged_time_cursors_are_rejected(payload):
+    with pytest.raises(ValueError):
+        decode_time_cursor(encode_cursor(json.dumps(payload)))
+
+
+def test_undecodable_time_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        decode_time_cursor(encode_cursor('not json'))
@@ -0,0 +1,35 @@
+from app.router import Router
+
+
+def _router(*routes):
+    router = Router()
+    for method, pattern in routes:
+        router.add(method, pattern, f"{method} {pattern}")
+    router.compile()
+    return router
+
+
+def test_literal_wins_over_param():
+    router = _router(('GET', '/mvps/<mvp_id>'), ('GET', '/mvps/upcoming'))
+    assert router.match('GET', '/mvps/upcoming') == ('GET /mvps/upcoming', {}, ['GET'])
+    assert router.match('GET', '/mvps/abc') == ('GET /mvps/<mvp_id>', {'mvp_id': 'abc'}, ['GET'])
+
+
+def test_backtracks_from_literal_to_param():
+    router = _router(('GET', '/a/b/c'), ('GET', '/a/<x>/d'))
+    assert router.match('GET', '/a/b/d') == ('GET /a/<x>/d', {'x': 'b'}, ['GET'])
+
+
+def test_backtracks_between_sibling_params():
+    router = _router(('GET', '/a/<int:x>/b'), ('GET', '/a/<y>/c'))
+    assert router.match('GET', '/a/5/b') == ('GET /a/<int:x>/b', {'x': 5}, ['GET'])
+    assert router.match('GET', '/a/5/c') == ('GET /a/<y>/c', {'y': '5'}, ['GET'])
+    assert router.match('GET', '/a/z/c') == ('GET /a/<y>/c', {'y': 'z'}, ['GET'])
+    assert router.match('GET', '/a/5/d') == (None, {}, [])
+
+
+def test_int_converter_and_method_not_allowed():
+    router = _router(('GET', '/monsters/<int:monster_id>'), ('PUT', '/users/<uid>'))
+    assert router.match('GET', '/monsters/1039') == ('GET /monsters/<int:monster_id>', {'monster_id': 1039}, ['GET'])
+    assert router.match('GET', '/monsters/osiris') == (None, {}, [])
+    assert router.match('DELETE', '/users/u1') == (None, {}, ['PUT'])
@@ -0,0 +1,42 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services import serializer
+
+DOC = {
+    'name': 'Baphomet',
+    'last_killed': datetime(2025, 5, 1, 12, 0, tzinfo=timezone.utc),
+    'interval': {'mean': float('nan'), 'max': float('inf'), 'min': -float('inf'), 'count': 0},
+    'samples': [1.5, float('nan')],
+}
+EXPECTED = {
+    'name': 'Baphomet',
+    'last_killed': '2025-05-01T12:00:00+00:00',
+    'interval': {'mean': None, 'max': None, 'min': None, 'count': 0},
+    'samples': [1.5, None],
+}
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def backend(request, monkeypatch):
+    if request.param == 'orjson':
+        if serializer.orjson is None:
+            pytest.skip("orjson not installed")
+    else:
+        monkeypatch.setattr(serializer, 'orjson', None)
+    return request.param
+
+
+def test_backends_agree_on_non_finite_floats(backend):
+    body = serializer.dumps(DOC)
+    assert b'NaN' not in body and b'Infinity' not in body
+    assert json.loads(body) == EXPECTED
+
+
+def test_list_chunks_is_one_json_array(backend, monkeypatch):
+    monkeypatch.setattr(serializer, 'CHUNK_BYTES', 16)
+    chunks = list(serializer.list_chunks([DOC] * 5))
+    assert len(chunks) > 1
+    assert json.loads(b''.join(chunks)) == [EXPECTED] * 5
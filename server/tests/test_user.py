@@ -0,0 +1,74 @@
+import json
+import threading
+
+from app.routes import user
+
+
+class Snapshot:
+    def __init__(self, data):
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class SlowDocument:
+    """A users/<uid> document whose first read blocks until released, like a slow Firestore round trip."""
+
+    def __init__(self, data):
+        self.data = data
+        self.reads = 0
+        self.first_read_started = threading.Event()
+        self.release_first_read = threading.Event()
+
+    def get(self):
+        self.reads += 1
+        data = dict(self.data)
+        if self.reads == 1:
+            self.first_read_started.set()
+            self.release_first_read.wait(5)
+        return Snapshot(data)
+
+    def set(self, data, merge=False):
+        self.data.update({k: v for k, v in data.items() if k != 'updated_at'})
+
+
+class FakeDB:
+    def __init__(self, document):
+        self._document = document
+
+    def collection(self, name):
+        return self
+
+    def document(self, doc_id):
+        return self._document
+
+
+class Request:
+    def __init__(self, body=None):
+        self._body = body
+
+    def get_json(self, silent=False):
+        return self._body
+
+
+def test_read_after_write_does_not_join_an_older_read(monkeypatch):
+    document = SlowDocument({'theme': 'light'})
+    monkeypatch.setattr(user, 'get_db', lambda: FakeDB(document))
+    responses = {}
+
+    def get(name):
+        responses[name] = json.loads(user.get_user(Request(), {}, 'u1').get_data())
+
+    before = threading.Thread(target=get, args=('before',))
+    before.start()
+    assert document.first_read_started.wait(5)
+
+    assert user.update_user(Request({'theme': 'dark'}), {}, 'u1').status_code == 200
+    get('after')
+    document.release_first_read.set()
+    before.join(5)
+
+    assert responses == {'before': {'theme': 'light'}, 'after': {'theme': 'dark'}}
+    assert document.reads == 2